@@ -1,10 +1,67 @@
+import os
+from typing import Dict
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import SQLModel, create_engine, Session
 
 sqlite_file_name = "autodidact.db"
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
+SQL_ECHO = os.environ.get("SQL_ECHO", "0") == "1"
+DB_PROFILE = os.environ.get("DB_PROFILE", "performance")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+
+# "performance": WAL lets readers run alongside a writer, and with synchronous=NORMAL a
+# commit no longer fsyncs (a power loss can drop the last transactions, never corrupt).
+# "default" leaves SQLite's own settings alone.
+DB_PROFILES: Dict[str, Dict[str, str]] = {
+    "default": {},
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": os.environ.get("DB_BUSY_TIMEOUT_MS", "5000"),
+        "cache_size": str(-int(os.environ.get("DB_CACHE_KB", "65536"))),  # negative = KiB
+        "mmap_size": os.environ.get("DB_MMAP_BYTES", str(256 * 1024 * 1024)),
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def apply_sqlite_pragmas(dbapi_connection, pragmas: Dict[str, str]):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def configure_sqlite(engine: Engine, profile: str = DB_PROFILE) -> Engine:
+    """
+    Applies a pragma profile to every new connection of the engine.
+    """
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Unknown database profile '{profile}'")
+    pragmas = DB_PROFILES[profile]
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, pragmas)
+
+    return engine
+
+
 connect_args = {"check_same_thread": False}
-engine = create_engine(sqlite_url, echo=True, connect_args=connect_args)
+engine = configure_sqlite(create_engine(
+    sqlite_url,
+    echo=SQL_ECHO,
+    connect_args=connect_args,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+))
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
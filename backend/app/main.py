@@ -1,13 +1,32 @@
+import math
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app import metrics
 from app.database import create_db_and_tables
-from app.routers import topics, resources, pedagogy
+from app.pagination import NEXT_CURSOR_HEADER
+from app.routers import topics, resources, pedagogy, jobs, search
+from app.services import ingest
+from app.services.fetcher import fetcher
+from app.services.jobs import job_queue
+from app.services.llm import LLMService, default_provider
+from app.services.resilience import LLMError
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     create_db_and_tables()
+    # Warm the model catalog in the background so the first page load doesn't pay for it
+    warm_task = LLMService().warm_models()
+    # Ingestion workers; jobs interrupted by the last shutdown are picked up again
+    await job_queue.start()
     yield
+    await job_queue.stop()
+    warm_task.cancel()
+    await fetcher.aclose()
+    await default_provider.aclose()
+    ingest.shutdown_pdf_pool()
 
 app = FastAPI(lifespan=lifespan, title="Autodidact API")
 
@@ -17,11 +36,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    stats = metrics.RequestDBStats()
+    token = metrics.request_db_stats.set(stats)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (/topics/{topic_id}) rather than raw path to keep cardinality bounded
+        route = request.scope.get("route")
+        labels = {"method": request.method, "route": getattr(route, "path", "unmatched"), "status": status}
+        metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, **labels)
+        metrics.HTTP_REQUEST_DB_QUERIES.observe(stats.queries, route=labels["route"])
+        metrics.HTTP_REQUEST_DB_SECONDS.observe(stats.seconds, route=labels["route"])
+        metrics.request_db_stats.reset(token)
+
+@app.exception_handler(LLMError)
+async def llm_error_handler(request: Request, exc: LLMError):
+    """
+    Rate limiting and provider outages surface as 429/503 with a Retry-After hint.
+    """
+    headers = {"Retry-After": str(math.ceil(exc.retry_after))} if exc.retry_after else None
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail, "retry_after": exc.retry_after},
+        headers=headers,
+    )
+
 app.include_router(topics.router)
 app.include_router(resources.router)
 app.include_router(pedagogy.router)
+app.include_router(jobs.router)
+app.include_router(search.router)
 
 
 @app.get("/")
@@ -31,3 +84,10 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """
+    Prometheus text exposition of request, LLM, cache, database and ingestion metrics.
+    """
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,192 @@
+# Minimal Prometheus-style instrumentation: labelled counters and histograms,
+# rendered in the text exposition format by GET /metrics.
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label key -> [per-bucket counts..., sum, count]
+        self._values: Dict[LabelKey, List[float]] = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._values.get(_label_key(labels))
+        return series[-1] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+registry: list = []
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- HTTP ---
+HTTP_REQUEST_DURATION = Histogram("http_request_duration_seconds", "HTTP request latency by route template.")
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database queries issued per HTTP request.",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 1000),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in database queries per HTTP request.")
+
+# --- LLM ---
+LLM_REQUESTS = Counter("llm_requests_total", "LLM generations by model, prompt type and outcome (ok, error, cache_hit).")
+LLM_REQUEST_DURATION = Histogram("llm_request_duration_seconds", "Provider latency of LLM generations.")
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the provider, by direction (prompt, completion).")
+LLM_FAILED_ATTEMPTS = Counter(
+    "llm_failed_attempts_total",
+    "Retryable provider failures by model, reason (rate_limited, unavailable) and whether another attempt followed.",
+)
+ACTIVITY_GENERATION_FAILURES = Counter(
+    "activity_generation_failures_total", "Concepts whose activities failed in a batch, by reason (llm, malformed)."
+)
+
+# --- Caches ---
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Cache lookups by cache, tier and result (hit, miss).")
+
+# --- Database ---
+DB_QUERIES = Counter("db_queries_total", "Database queries executed.")
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "Database query latency.")
+
+# --- Ingestion ---
+INGEST_DURATION = Histogram("ingest_duration_seconds", "Ingestion stage latency by resource type and stage.")
+
+# --- Retrieval ---
+RETRIEVAL_DURATION = Histogram("retrieval_duration_seconds", "Context retrieval latency by purpose (ask, elaborate).")
+RETRIEVAL_CONTEXT_TOKENS = Histogram(
+    "retrieval_context_tokens", "Estimated tokens of retrieved context added to a prompt, by purpose.",
+    buckets=(0, 250, 500, 1000, 2000, 4000, 8000, 16000),
+)
+
+
+class RequestDBStats:
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Holds a mutable per-request accumulator; sync endpoints run in a worker thread with a
+# copy of the context, which still points at the same object.
+request_db_stats: ContextVar[RequestDBStats | None] = ContextVar("request_db_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    operation = statement.lstrip().split(" ", 1)[0].upper()
+    DB_QUERIES.inc(operation=operation)
+    DB_QUERY_DURATION.observe(elapsed, operation=operation)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
@@ -1,6 +1,7 @@
 from typing import Optional, List
 from datetime import datetime
 import uuid
+from sqlalchemy import Index, event
 from sqlmodel import Field, SQLModel, Relationship
 from enum import Enum
 
@@ -13,12 +14,28 @@ class TopicStatus(str, Enum):
     PENDING = "pending"
     COMPLETED = "completed"
 
+class SummaryStatus(str, Enum):
+    PENDING = "pending"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
 class LinkType(str, Enum):
     RELATED = "related"
     PREREQUISITE = "prerequisite"
     MENTIONED = "mentioned"
 
 class Link(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_link_source_id", "source_id"),
+        Index("ix_link_target_id", "target_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     source_id: uuid.UUID
     target_id: uuid.UUID
@@ -32,27 +49,77 @@ class TopicBase(SQLModel):
     status: TopicStatus = Field(default=TopicStatus.PENDING)
 
 class Topic(TopicBase, table=True):
+    __table_args__ = (
+        # Children of a topic, in syllabus order
+        Index("ix_topic_parent_id_order_index", "parent_id", "order_index"),
+        # All topics, oldest first (the listing's keyset)
+        Index("ix_topic_created_at_id", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships could be added here if needed, but keeping it simple for now
     # resources: List["Resource"] = Relationship(back_populates="topic")
 
+class TopicTreeNode(TopicBase):
+    id: uuid.UUID
+    created_at: datetime
+    depth: int # Distance from the requested root
+    child_count: int = 0
+    concept_count: int = 0
+    activity_count: int = 0
+    completed_activity_count: int = 0
+    children: List["TopicTreeNode"] = [] # Empty past max_depth even when child_count > 0
+
 class ResourceBase(SQLModel):
     type: ResourceType
     path_or_url: str
+    title: Optional[str] = None # Original filename for uploads
     content_summary: Optional[str] = None
+    summary_status: SummaryStatus = Field(default=SummaryStatus.COMPLETED)
 
 class Resource(ResourceBase, table=True):
+    # A topic's resources, oldest first; id ends the listing's keyset, so pages need no sort
+    __table_args__ = (Index("ix_resource_topic_id_created_at", "topic_id", "created_at", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     topic_id: uuid.UUID = Field(foreign_key="topic.id")
     raw_content: Optional[str] = None # For full text search
+    content_hash: Optional[str] = Field(default=None, index=True) # SHA-256 of the uploaded file
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class ResourceListItem(ResourceBase):
+    # Resource without raw_content, for listings; GET /resources/{id} has the full row
+    id: uuid.UUID
+    topic_id: uuid.UUID
+    content_hash: Optional[str] = None
+    created_at: datetime
+
+class ResourceChunk(SQLModel, table=True):
+    # Ids are never reused, so one always names the same text (the vector index relies on it)
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    resource_id: uuid.UUID = Field(foreign_key="resource.id", index=True)
+    chunk_index: int
+    content: str
+    start_offset: int # Character offsets into Resource.raw_content
+    end_offset: int
+    page_start: Optional[int] = None # 1-based, PDFs only
+    page_end: Optional[int] = None
+    token_count: int
+    content_hash: str # Lets re-ingestion keep rows whose text didn't change
+
 class NoteBase(SQLModel):
     content: str
 
 class Note(NoteBase, table=True):
+    __table_args__ = (
+        Index("ix_note_topic_id", "topic_id"),
+        Index("ix_note_resource_id", "resource_id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     topic_id: Optional[uuid.UUID] = Field(default=None, foreign_key="topic.id")
     resource_id: Optional[uuid.UUID] = Field(default=None, foreign_key="resource.id")
@@ -77,6 +144,9 @@ class ConceptBase(SQLModel):
     order_index: int = 0
 
 class Concept(ConceptBase, table=True):
+    # A topic's concepts, in teaching order; id ends the listing's keyset, so pages need no sort
+    __table_args__ = (Index("ix_concept_topic_id_order_index", "topic_id", "order_index", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     topic_id: uuid.UUID = Field(foreign_key="topic.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -89,6 +159,115 @@ class ActivityBase(SQLModel):
     user_score: Optional[int] = None # 1-5 Scale
 
 class Activity(ActivityBase, table=True):
+    # A concept's activities, oldest first; id ends the listing's keyset
+    __table_args__ = (Index("ix_activity_concept_id_created_at", "concept_id", "created_at", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     concept_id: uuid.UUID = Field(foreign_key="concept.id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ConceptActivitiesResult(SQLModel):
+    concept_id: uuid.UUID
+    status: str # generated, failed
+    activity_count: int = 0
+    error: Optional[str] = None
+
+class ActivityBatchResult(SQLModel):
+    activities: List[Activity]
+    concepts: List[ConceptActivitiesResult] # One per requested concept, in teaching order
+
+class Job(SQLModel, table=True):
+    # Workers claim the longest-due queued jobs (see jobs.due_jobs)
+    __table_args__ = (Index("ix_job_status_run_after", "status", "run_after"),)
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    kind: str
+    status: JobStatus = Field(default=JobStatus.QUEUED)
+    stage: Optional[str] = None # Last step reached, for progress reporting
+    resource_id: Optional[uuid.UUID] = Field(default=None, foreign_key="resource.id")
+    payload: Optional[str] = None # JSON arguments for the handler
+    attempts: int = 0
+    max_attempts: int = 3
+    error: Optional[str] = None
+    run_after: datetime = Field(default_factory=datetime.utcnow) # Retries are delayed with backoff
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class IngestAccepted(SQLModel):
+    job_id: Optional[uuid.UUID] = None # None when nothing was left to do (e.g. a deduplicated upload)
+    resource: Resource
+
+class BulkIngestItem(SQLModel):
+    source: str # URL or uploaded filename
+    status: str # queued (extraction and summary pending), created (summary reused), duplicate, failed (too large)
+    resource_id: Optional[uuid.UUID] = None
+    error: Optional[str] = None
+
+class BulkIngestAccepted(SQLModel):
+    job_id: Optional[uuid.UUID] = None # Extraction and summarization job for every queued item
+    items: List[BulkIngestItem]
+
+class SearchHit(SQLModel):
+    kind: str # resource (a chunk of its text), note, topic, concept
+    id: str # Chunk id for resources, else the row's id
+    topic_id: Optional[uuid.UUID] = None
+    resource_id: Optional[uuid.UUID] = None
+    title: Optional[str] = None
+    snippet: str # Matches wrapped in <mark></mark>
+    score: float # BM25, lower is better
+    chunk_index: Optional[int] = None
+    page: Optional[int] = None
+
+class SemanticHit(SQLModel):
+    chunk_id: int
+    resource_id: uuid.UUID
+    topic_id: uuid.UUID
+    title: Optional[str] = None # Resource title, or its path/URL
+    chunk_index: int
+    page: Optional[int] = None
+    content: str
+    score: float # Cosine similarity, higher is better
+
+# --- Full-text search ---
+# FTS5 indexes over the text columns. They are external-content tables: the text stays in
+# the source table (snippets read it from there) and triggers keep the index in sync.
+FTS_TOKENIZE = "porter unicode61 remove_diacritics 2"
+FTS_INDEXES = {
+    # name: (source table, source rowid column, indexed columns, BM25 column weights)
+    "resourcechunk_fts": ("resourcechunk", "id", ("content",), (1.0,)),
+    "note_fts": ("note", "rowid", ("content",), (1.0,)),
+    "topic_fts": ("topic", "rowid", ("title", "description"), (10.0, 1.0)),
+    "concept_fts": ("concept", "rowid", ("title", "description"), (10.0, 1.0)),
+}
+
+def fts_ddl(name: str) -> List[str]:
+    table, rowid, columns, weights = FTS_INDEXES[name]
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    delete = f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old});"
+    insert = f"INSERT INTO {name}(rowid, {cols}) VALUES (new.{rowid}, {new});"
+    return [
+        # prefix='2 3' keeps short prefix queries (entr*) off a full term scan
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({cols}, content='{table}', "
+        f"content_rowid='{rowid}', tokenize='{FTS_TOKENIZE}', prefix='2 3')",
+        # Persistent ranking function, so queries can ORDER BY rank
+        f"INSERT INTO {name}({name}, rank) VALUES ('rank', 'bm25({', '.join(map(str, weights))})')",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE OF {cols} ON {table} BEGIN {delete} {insert} END",
+    ]
+
+@event.listens_for(SQLModel.metadata, "after_create")
+def _create_fts_indexes(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        return
+    for name in FTS_INDEXES:
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).first()
+        for statement in fts_ddl(name):
+            connection.exec_driver_sql(statement)
+        if not exists:
+            # Index rows written before the table existed
+            connection.exec_driver_sql(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
@@ -0,0 +1,98 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A page is ordered by a unique tuple of columns, e.g. (created_at, id). The next page
+starts strictly after the last row returned, so every page is an index range scan no
+matter how deep the client has paged, and rows inserted meanwhile are neither skipped
+nor repeated. The cursor for the next page goes out in the X-Next-Cursor header; it
+is absent on the last page.
+"""
+import base64
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+from sqlmodel import Session
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", "500"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _dump(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return value.hex
+    return value
+
+
+def _load(value: Any, column):
+    python_type = column.type.python_type
+    # Cursors come from clients: each value must have the JSON type _dump writes for its column
+    expected = str if python_type in (datetime, uuid.UUID) else python_type
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise ValueError(f"expected {expected.__name__} for {column.key}, got {type(value).__name__}")
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_dump(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("wrong number of values")
+        return [_load(v, c) for v, c in zip(values, columns)]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def _after(columns: Sequence[Any], values: Sequence[Any]):
+    # (a, b, c) > (x, y, z), spelled out so each branch can use the sort index
+    branches = []
+    for i, column in enumerate(columns):
+        equal = [c == v for c, v in zip(columns[:i], values[:i])]
+        branches.append(and_(*equal, column > values[i]))
+    return or_(*branches)
+
+
+def page_query(statement, columns: Sequence[Any], cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE):
+    """
+    statement restricted to the page after cursor, ordered by columns, with one extra row.
+    """
+    if cursor:
+        statement = statement.where(_after(columns, decode_cursor(cursor, columns)))
+    # One extra row tells whether there is a next page without a COUNT query
+    return statement.order_by(*columns).limit(limit + 1)
+
+
+def paginate(
+    session: Session,
+    statement,
+    columns: Sequence[Any],
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> list:
+    """
+    Runs statement ordered by columns (ascending, and unique together), returning at most
+    limit rows after cursor and setting the next page's cursor on the response.
+    """
+    rows = session.exec(page_query(statement, columns, cursor, limit)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, c.key) for c in columns])
+    return rows
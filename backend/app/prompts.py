@@ -40,16 +40,59 @@ def summary_prompt(text: str) -> str:
     3. Focus on the core ideas and strip away unnecessary complexity.
     
     Text:
-    {text[:10000]} # Truncate to avoid token limits
+    {text}
     """
 
-def elaboration_prompt(topic_title: str, current_description: str, instruction: str) -> str:
+def chunk_summary_prompt(text: str) -> str:
+    # Deliberately free of chunk position/count so an unchanged section renders the
+    # same prompt (and hits the LLM cache) even when other parts of the document change.
+    return f"""
+    You are taking study notes on one section of a longer document.
+
+    Instructions:
+    1. Capture every key concept, definition, claim and example in this section.
+    2. Be concise: use short bullet points, no introduction or conclusion.
+    3. Do not add information that is not in the text.
+
+    Section:
+    {text}
+    """
+
+def combine_summaries_prompt(section_notes: list[str]) -> str:
+    notes = "\n\n---\n\n".join(section_notes)
+    return f"""
+    Below are study notes taken on consecutive sections of one document.
+    Summarize the whole document using the **Feynman Technique**.
+
+    Instructions:
+    1. Explain the key concepts as if you were teaching a new student.
+    2. Use simple, clear language. Avoid jargon unless you define it immediately.
+    3. Focus on the core ideas and strip away unnecessary complexity.
+    4. Follow the order of the document; merge ideas that repeat across sections.
+
+    Section notes:
+    {notes}
+    """
+
+def _sources_block(sources: str) -> str:
+    # Empty without sources, so prompts (and their LLM cache keys) stay as they were
+    if not sources:
+        return ""
+    return f"""
+    Sources from the learner's own library (numbered passages):
+    {sources}
+
+    Ground your answer in these sources where they are relevant and cite them as [n].
+    Do not cite a source for anything it does not say.
+    """
+
+def elaboration_prompt(topic_title: str, current_description: str, instruction: str, sources: str = "") -> str:
     return f"""
     You are an expert tutor applying the **Feynman Technique** to explain "{topic_title}".
     
     Current Context: {current_description}
     User Instruction: {instruction}
-
+{_sources_block(sources)}
     Instructions:
     1. **Explanation**: Write a comprehensive description in Markdown. Imagine you are explaining this to a smart 12-year-old. Use analogies and simple language to demystify complex ideas.
     2. **Concepts**: Identify 3-5 core concepts (chunks) that make up this topic. For each concept, provide:
@@ -80,11 +123,11 @@ def elaboration_prompt(topic_title: str, current_description: str, instruction:
     }}
     """
 
-def chat_prompt(topic_title: str, context: str, question: str) -> str:
+def chat_prompt(topic_title: str, context: str, question: str, sources: str = "") -> str:
     return f"""
     You are a Socratic Tutor specializing in "{topic_title}".
     Context: {context}
-
+{_sources_block(sources)}
     User Question: {question}
 
     Instructions:
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
+from app.database import get_session
+from app.models import Job
+import uuid
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/{job_id}", response_model=Job)
+def get_job(job_id: uuid.UUID, session: Session = Depends(get_session)):
+    job = session.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,25 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Response
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, select
 from typing import List, Optional
+from app import metrics
 from app.database import get_session
-from app.models import Topic, Concept, Activity, ActivityStatus, ActivityType
+from app.models import Topic, Concept, Activity, ActivityBatchResult, ActivityStatus, ConceptActivitiesResult
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
 from app.services.llm import LLMService
+from app.services.persistence import activity_type, bulk_insert, load_in_order
+from app.services.resilience import LLMError
+from app.services.singleflight import generation_flights
+import os
 import uuid
 import json
+import asyncio
 
 router = APIRouter(tags=["pedagogy"])
 llm_service = LLMService()
 
+# Concurrent LLM calls per batch activity request (the global scheduler still applies)
+ACTIVITY_BATCH_PARALLELISM = int(os.environ.get("ACTIVITY_BATCH_PARALLELISM", "4"))
+
+# Unique sort keys for listings; the concept and activity lookup indexes end in them
+CONCEPT_ORDER = (Concept.order_index, Concept.id)
+ACTIVITY_ORDER = (Activity.created_at, Activity.id)
+
+def topic_concepts(topic_id: uuid.UUID):
+    return select(Concept).where(Concept.topic_id == topic_id)
+
+def concept_activities(concept_id: uuid.UUID):
+    return select(Activity).where(Activity.concept_id == concept_id)
+
 # --- CONCEPTS ---
 
 @router.get("/concepts/", response_model=List[Concept])
-def read_concepts(topic_id: uuid.UUID, session: Session = Depends(get_session)):
+def read_concepts(
+    topic_id: uuid.UUID,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: Session = Depends(get_session)
+):
     """
     List concepts for a specific topic, ordered by order_index.
+    Paginated; the next page's cursor is in the X-Next-Cursor header.
     """
-    statement = select(Concept).where(Concept.topic_id == topic_id).order_by(Concept.order_index)
-    results = session.exec(statement).all()
-    return results
+    return paginate(session, topic_concepts(topic_id), CONCEPT_ORDER, response, cursor, limit)
 
 @router.post("/concepts/generate", response_model=List[Concept])
 async def generate_concepts(
@@ -34,50 +60,63 @@ async def generate_concepts(
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
 
-    # Generate concepts
-    try:
-        concepts_data = await llm_service.generate_concepts(
-            topic_title=topic.title,
-            description=topic.description or "",
-            model_name=model_name
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM Generation failed: {str(e)}")
-
-    # Clear existing concepts? Or append? For now, we'll append/overwrite order.
-    # Let's just add them.
-    
-    new_concepts = []
-    # Find max order index
-    existing_concepts = session.exec(select(Concept).where(Concept.topic_id == topic_id)).all()
-    current_max_order = max([c.order_index for c in existing_concepts]) if existing_concepts else 0
-    
-    for item in concepts_data:
-        concept = Concept(
-            topic_id=topic.id,
-            title=item["title"],
-            description=item.get("description", ""),
-            order_index=current_max_order + item.get("order_index", 1)
-        )
-        session.add(concept)
-        new_concepts.append(concept)
-    
-    session.commit()
-    for c in new_concepts:
-        session.refresh(c)
-        
-    return new_concepts
+    # Duplicate clicks/tabs share one generation instead of each inserting their own rows
+    key = ("concepts/generate", topic_id, model_name)
+    ids = await generation_flights.do(key, lambda: _generate_and_save_concepts(session.get_bind(), topic_id, model_name))
+    return load_in_order(session, Concept, ids)
+
+async def _generate_and_save_concepts(engine: Engine, topic_id: uuid.UUID, model_name: str | None) -> List[uuid.UUID]:
+    # Runs as a shared flight that can outlive the request, so it has a session of its own
+    with Session(engine) as session:
+        topic = session.get(Topic, topic_id)
+        # Generate concepts
+        try:
+            concepts_data = await llm_service.generate_concepts(
+                topic_title=topic.title,
+                description=topic.description or "",
+                model_name=model_name
+            )
+        except LLMError:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"LLM Generation failed: {str(e)}")
+
+        # Clear existing concepts? Or append? For now, we'll append/overwrite order.
+        # Let's just add them.
+
+        new_concepts = []
+        # Find max order index
+        existing_concepts = session.exec(select(Concept).where(Concept.topic_id == topic.id)).all()
+        current_max_order = max([c.order_index for c in existing_concepts]) if existing_concepts else 0
+
+        for item in concepts_data:
+            concept = Concept(
+                topic_id=topic.id,
+                title=item["title"],
+                description=item.get("description", ""),
+                order_index=current_max_order + item.get("order_index", 1)
+            )
+            new_concepts.append(concept)
+
+        bulk_insert(session, new_concepts)
+        session.commit()
+        return [c.id for c in new_concepts]
 
 # --- ACTIVITIES ---
 
 @router.get("/activities/", response_model=List[Activity])
-def read_activities(concept_id: uuid.UUID, session: Session = Depends(get_session)):
+def read_activities(
+    concept_id: uuid.UUID,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: Session = Depends(get_session)
+):
     """
-    List activities for a specific concept.
+    List activities for a specific concept, oldest first.
+    Paginated; the next page's cursor is in the X-Next-Cursor header.
     """
-    statement = select(Activity).where(Activity.concept_id == concept_id)
-    results = session.exec(statement).all()
-    return results
+    return paginate(session, concept_activities(concept_id), ACTIVITY_ORDER, response, cursor, limit)
 
 @router.post("/activities/generate", response_model=List[Activity])
 async def generate_activities(
@@ -92,19 +131,14 @@ async def generate_activities(
     if not concept:
         raise HTTPException(status_code=404, detail="Concept not found")
 
-    # Get Topic context too for better generation
-    topic = session.get(Topic, concept.topic_id)
-    context = f"Topic: {topic.title}\nConcept: {concept.title}\nConcept Description: {concept.description}"
+    key = ("activities/generate", concept_id, model_name)
+    ids = await generation_flights.do(key, lambda: _generate_and_save_activities(session.get_bind(), concept_id, model_name))
+    return load_in_order(session, Activity, ids)
 
-    try:
-        activities_data = await llm_service.generate_activities(
-            concept_title=concept.title,
-            context=context,
-            model_name=model_name
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM Generation failed: {str(e)}")
+def _activity_context(topic: Topic, concept: Concept) -> str:
+    return f"Topic: {topic.title}\nConcept: {concept.title}\nConcept Description: {concept.description}"
 
+def _build_activities(concept: Concept, activities_data: List[dict]) -> List[Activity]:
     new_activities = []
     for item in activities_data:
         # Handle content being dict or string
@@ -112,22 +146,115 @@ async def generate_activities(
         if isinstance(content_val, dict):
             content_val = json.dumps(content_val)
         
-        activity = Activity(
+        new_activities.append(Activity(
             concept_id=concept.id,
-            type=item["type"],
+            type=activity_type(item.get("type")),
             instructions=item["instructions"],
             content=content_val,
             status=ActivityStatus.PENDING
-        )
-        session.add(activity)
-        new_activities.append(activity)
-
-    session.commit()
-    for a in new_activities:
-        session.refresh(a)
-        
+        ))
     return new_activities
 
+async def _generate_and_save_activities(engine: Engine, concept_id: uuid.UUID, model_name: str | None) -> List[uuid.UUID]:
+    with Session(engine) as session:
+        concept = session.get(Concept, concept_id)
+        # Get Topic context too for better generation
+        topic = session.get(Topic, concept.topic_id)
+
+        try:
+            activities_data = await llm_service.generate_activities(
+                concept_title=concept.title,
+                context=_activity_context(topic, concept),
+                model_name=model_name
+            )
+        except LLMError:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"LLM Generation failed: {str(e)}")
+
+        new_activities = _build_activities(concept, activities_data)
+        bulk_insert(session, new_activities)
+        session.commit()
+        return [a.id for a in new_activities]
+
+@router.post("/activities/generate/batch", response_model=ActivityBatchResult)
+async def generate_activities_batch(
+    topic_id: uuid.UUID = Body(..., embed=True),
+    concept_ids: Optional[List[uuid.UUID]] = Body(None, embed=True),
+    model_name: str = Body(None, embed=True),
+    session: Session = Depends(get_session)
+):
+    """
+    Generates activities for every concept of a topic (or only `concept_ids`) in one request.
+    LLM calls fan out concurrently and all activities are saved in a single transaction.
+    The result lists each concept's status, with the error for concepts that failed.
+    """
+    topic = session.get(Topic, topic_id)
+    if not topic:
+        raise HTTPException(status_code=404, detail="Topic not found")
+
+    statement = topic_concepts(topic_id).order_by(*CONCEPT_ORDER)
+    if concept_ids:
+        statement = statement.where(Concept.id.in_(concept_ids))
+    concepts = session.exec(statement).all()
+    if concept_ids and len(concepts) != len(set(concept_ids)):
+        raise HTTPException(status_code=404, detail="Concept not found in topic")
+
+    key = ("activities/generate/batch", topic_id, model_name, tuple(sorted(str(c.id) for c in concepts)))
+    concept_ids = [c.id for c in concepts]
+    ids, statuses = await generation_flights.do(
+        key, lambda: _generate_and_save_activities_batch(session.get_bind(), topic_id, concept_ids, model_name)
+    )
+    return ActivityBatchResult(activities=load_in_order(session, Activity, ids), concepts=statuses)
+
+async def _generate_and_save_activities_batch(
+    engine: Engine, topic_id: uuid.UUID, concept_ids: List[uuid.UUID], model_name: str | None
+) -> tuple[List[uuid.UUID], List[ConceptActivitiesResult]]:
+    with Session(engine) as session:
+        topic = session.get(Topic, topic_id)
+        concepts = load_in_order(session, Concept, concept_ids)
+        limit = asyncio.Semaphore(ACTIVITY_BATCH_PARALLELISM)
+
+        async def generate(concept: Concept) -> List[dict]:
+            async with limit:
+                return await llm_service.generate_activities(
+                    concept_title=concept.title,
+                    context=_activity_context(topic, concept),
+                    model_name=model_name
+                )
+
+        results = await asyncio.gather(*[generate(c) for c in concepts], return_exceptions=True)
+
+        new_activities = []
+        errors = []
+        statuses = []
+        for concept, result in zip(concepts, results):
+            # A malformed reply for one concept must not discard the others
+            reason = "llm"
+            if not isinstance(result, Exception):
+                try:
+                    activities = _build_activities(concept, result)
+                except Exception as e:
+                    result = ValueError(f"Malformed activities: {e!r}")
+                    reason = "malformed"
+            if isinstance(result, Exception):
+                # Reported per concept in the response; the counter is for monitoring
+                metrics.ACTIVITY_GENERATION_FAILURES.inc(reason=reason)
+                errors.append(result)
+                statuses.append(ConceptActivitiesResult(concept_id=concept.id, status="failed", error=str(result)))
+                continue
+            new_activities.extend(activities)
+            statuses.append(ConceptActivitiesResult(concept_id=concept.id, status="generated", activity_count=len(activities)))
+
+        if errors and not new_activities:
+            if isinstance(errors[0], LLMError):
+                raise errors[0]
+            raise HTTPException(status_code=500, detail=f"LLM Generation failed: {str(errors[0])}")
+
+        bulk_insert(session, new_activities)
+        session.commit()
+        return [a.id for a in new_activities], statuses
+
 @router.patch("/activities/{activity_id}/complete", response_model=Activity)
 def complete_activity(
     activity_id: uuid.UUID,
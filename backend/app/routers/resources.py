@@ -1,17 +1,244 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+import os
+import json
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response
 from sqlmodel import Session, select
 from app.database import get_session
-from app.models import Resource, ResourceType, Topic
+from app.metrics import INGEST_DURATION
+from app.models import (
+    BulkIngestAccepted, BulkIngestItem, IngestAccepted, Job, JobStatus, Resource, ResourceChunk, ResourceListItem, ResourceType,
+    SummaryStatus, Topic,
+)
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
 from app.services.llm import LLMService
 from app.services import ingest
+from app.services.blobstore import BlobTooLargeError, StoredBlob, blob_store
+from app.services.jobs import job_queue
+from app.services.vector_index import vector_index
 import uuid
-from typing import List
+from typing import Dict, List
 
 router = APIRouter(prefix="/resources", tags=["resources"])
 llm_service = LLMService()
 
-@router.post("/upload/pdf", response_model=Resource)
+INGEST_JOB = "ingest_resource"
+BULK_INGEST_JOB = "ingest_resources"
+EMBED_JOB = "embed_resources"
+BULK_INGEST_PARALLELISM = int(os.environ.get("BULK_INGEST_PARALLELISM", "8"))
+BULK_SUMMARY_PARALLELISM = int(os.environ.get("BULK_SUMMARY_PARALLELISM", "4"))
+
+def _mark_summary_failed(session: Session, job: Job):
+    resource = session.get(Resource, job.resource_id)
+    if resource:
+        resource.summary_status = SummaryStatus.FAILED
+        session.add(resource)
+
+@job_queue.handler(INGEST_JOB, on_failure=_mark_summary_failed)
+async def run_ingest_job(session: Session, job: Job):
+    """
+    Extracts, chunks, embeds and summarizes a resource. Each step is committed, so a
+    retry resumes after the last step that succeeded. A refresh re-extracts existing
+    text and skips the summary when nothing changed.
+    """
+    resource = session.get(Resource, job.resource_id)
+    if resource is None:
+        raise ValueError(f"Resource {job.resource_id} no longer exists")
+    payload = json.loads(job.payload or "{}")
+
+    unchanged = False
+    refresh = payload.get("refresh") and job.stage in ("queued", "extract")
+    if resource.raw_content is None or refresh:
+        job.stage = "extract"
+        session.add(job)
+        session.commit()
+        text = await _extract(resource)
+        unchanged = text == resource.raw_content and payload.get("summarized")
+        resource.raw_content = text
+        with INGEST_DURATION.time(resource_type=resource.type.value, stage="chunk"):
+            ingest.sync_chunks(session, resource)
+        session.add(resource)
+        session.commit()
+
+    # Only chunks missing from the vector index are embedded, so a retry redoes no work
+    job.stage = "embed"
+    session.add(job)
+    session.commit()
+    with INGEST_DURATION.time(resource_type=resource.type.value, stage="embed"):
+        await _embed_chunks(session, resource.id)
+    if unchanged:
+        resource.summary_status = SummaryStatus.COMPLETED
+        session.add(resource)
+        session.commit()
+        return
+
+    job.stage = "summarize"
+    session.add(job)
+    session.commit()
+    with INGEST_DURATION.time(resource_type=resource.type.value, stage="summarize"):
+        resource.content_summary = await llm_service.summarize_text(
+            resource.raw_content, model_name=payload.get("model_name")
+        )
+    resource.summary_status = SummaryStatus.COMPLETED
+    session.add(resource)
+    session.commit()
+
+async def _extract(resource: Resource) -> str:
+    with INGEST_DURATION.time(resource_type=resource.type.value, stage="extract"):
+        if resource.type == ResourceType.PDF:
+            return await ingest.extract_text_from_pdf(resource.path_or_url)
+        return await ingest.extract_text_from_url(resource.path_or_url)
+
+async def _embed_chunks(session: Session, resource_id: uuid.UUID):
+    chunks = session.exec(
+        select(ResourceChunk.id, ResourceChunk.content).where(ResourceChunk.resource_id == resource_id)
+    ).all()
+    await asyncio.to_thread(vector_index.sync_resource, resource_id, [tuple(c) for c in chunks])
+
+@job_queue.handler(EMBED_JOB)
+async def run_embed_job(session: Session, job: Job):
+    """
+    Brings the vector index up to date with the chunks of resources whose text was
+    stored without going through an ingest job (deduplicated uploads, bulk ingestion).
+    """
+    ids = json.loads(job.payload or "{}").get("resource_ids") or [str(job.resource_id)]
+    job.stage = "embed"
+    session.add(job)
+    session.commit()
+    for resource_id in ids:
+        await _embed_chunks(session, uuid.UUID(resource_id))
+
+def _enqueue_embedding(session: Session, resources: List[Resource]) -> Job | None:
+    if not resources:
+        return None
+    return job_queue.enqueue(session, EMBED_JOB, payload={"resource_ids": [str(r.id) for r in resources]})
+
+def _accept(session: Session, resource: Resource, model_name: str | None, refresh: bool = False) -> IngestAccepted:
+    """
+    Stores the pending resource and its ingestion job in one transaction and wakes a worker.
+    """
+    # A refresh keeps the summary if the text turns out unchanged, but only if it was complete
+    summarized = resource.summary_status == SummaryStatus.COMPLETED
+    payload = {"model_name": model_name, "refresh": refresh, "summarized": summarized}
+    resource.summary_status = SummaryStatus.PENDING
+    session.add(resource)
+    job = job_queue.enqueue(session, INGEST_JOB, resource_id=resource.id, payload=payload)
+    session.commit()
+    session.refresh(resource)
+    job_queue.notify()
+    return IngestAccepted(job_id=job.id, resource=resource)
+
+def _mark_batch_failed(session: Session, job: Job):
+    ids = [uuid.UUID(i) for i in json.loads(job.payload or "{}").get("resource_ids", [])]
+    for resource in session.exec(
+        select(Resource).where(Resource.id.in_(ids), Resource.summary_status == SummaryStatus.PENDING)
+    ).all():
+        resource.summary_status = SummaryStatus.FAILED
+        session.add(resource)
+
+@job_queue.handler(BULK_INGEST_JOB, on_failure=_mark_batch_failed)
+async def run_bulk_ingest_job(session: Session, job: Job):
+    """
+    Extracts, chunks and embeds the resources that have no text yet, then summarizes
+    them, each step running concurrently and committed together. A retry only revisits
+    the resources whose summary is still pending, re-extracting those that failed.
+    """
+    payload = json.loads(job.payload or "{}")
+    ids = [uuid.UUID(i) for i in payload.get("resource_ids", [])]
+    resources = session.exec(
+        select(Resource).where(Resource.id.in_(ids), Resource.summary_status == SummaryStatus.PENDING)
+    ).all()
+    errors = []
+
+    missing = [r for r in resources if r.raw_content is None]
+    if missing:
+        job.stage = "extract"
+        session.add(job)
+        session.commit()
+        extract_limit = asyncio.Semaphore(BULK_INGEST_PARALLELISM)
+
+        async def extract(resource: Resource) -> str:
+            async with extract_limit:
+                return await _extract(resource)
+
+        texts = await asyncio.gather(*(extract(r) for r in missing), return_exceptions=True)
+        extracted = []
+        for resource, text in zip(missing, texts):
+            if isinstance(text, Exception):
+                print(f"Extraction failed for resource {resource.id}: {text}")
+                errors.append(text)
+                continue
+            resource.raw_content = text
+            with INGEST_DURATION.time(resource_type=resource.type.value, stage="chunk"):
+                ingest.sync_chunks(session, resource)
+            session.add(resource)
+            extracted.append(resource)
+        session.commit()
+
+        job.stage = "embed"
+        session.add(job)
+        session.commit()
+        for resource in extracted:
+            with INGEST_DURATION.time(resource_type=resource.type.value, stage="embed"):
+                await _embed_chunks(session, resource.id)
+
+    resources = [r for r in resources if r.raw_content is not None]
+    job.stage = "summarize"
+    session.add(job)
+    session.commit()
+
+    limit = asyncio.Semaphore(BULK_SUMMARY_PARALLELISM)
+
+    async def summarize(resource: Resource) -> str:
+        async with limit:
+            with INGEST_DURATION.time(resource_type=resource.type.value, stage="summarize"):
+                return await llm_service.summarize_text(resource.raw_content, model_name=payload.get("model_name"))
+
+    results = await asyncio.gather(*(summarize(r) for r in resources), return_exceptions=True)
+    for resource, result in zip(resources, results):
+        if isinstance(result, Exception):
+            errors.append(result)
+            continue
+        resource.content_summary = result
+        resource.summary_status = SummaryStatus.COMPLETED
+        session.add(resource)
+    session.commit()
+    if errors:
+        raise RuntimeError(f"{len(errors)} resources failed to extract or summarize: {errors[0]}")
+
+def _resource_for_upload(session: Session, topic_id: uuid.UUID, blob: StoredBlob, filename: str | None) -> tuple[Resource, bool]:
+    """
+    Returns the topic's existing resource for this file content, or a new unsaved one
+    (flagged True). A new resource reuses the text and summary of an identical earlier upload.
+    """
+    same_topic = session.exec(
+        select(Resource).where(Resource.content_hash == blob.sha256, Resource.topic_id == topic_id)
+    ).first()
+    if same_topic:
+        return same_topic, False
+
+    resource = Resource(
+        topic_id=topic_id,
+        type=ResourceType.PDF,
+        path_or_url=blob.path,
+        title=filename,
+        content_hash=blob.sha256,
+        summary_status=SummaryStatus.PENDING,
+    )
+    previous = session.exec(
+        select(Resource).where(
+            Resource.content_hash == blob.sha256,
+            Resource.summary_status == SummaryStatus.COMPLETED,
+        )
+    ).first()
+    if previous:
+        resource.raw_content = previous.raw_content
+        resource.content_summary = previous.content_summary
+        resource.summary_status = SummaryStatus.COMPLETED
+    return resource, True
+
+@router.post("/upload/pdf", response_model=IngestAccepted, status_code=202)
 async def upload_pdf(
+    response: Response,
     topic_id: uuid.UUID = Form(...),
     file: UploadFile = File(...),
     model_name: str | None = Form(None),
@@ -22,27 +249,29 @@ async def upload_pdf(
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
 
-    content = await file.read()
     try:
-        text = ingest.extract_text_from_pdf(content)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to extract text from PDF: {str(e)}")
+        blob = await blob_store.save_upload(file, extension=".pdf")
+    except BlobTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
-    summary = await llm_service.summarize_text(text, model_name=model_name)
+    # Identical file seen before: reuse its text and summary instead of re-extracting
+    resource, is_new = _resource_for_upload(session, topic_id, blob, file.filename)
+    if not is_new:
+        response.status_code = 200
+        return IngestAccepted(resource=resource)
+    if resource.summary_status == SummaryStatus.COMPLETED:
+        session.add(resource)
+        ingest.sync_chunks(session, resource)
+        job = _enqueue_embedding(session, [resource])
+        session.commit()
+        session.refresh(resource)
+        job_queue.notify()
+        response.status_code = 200
+        return IngestAccepted(job_id=job.id, resource=resource)
 
-    resource = Resource(
-        topic_id=topic_id,
-        type=ResourceType.PDF,
-        path_or_url=file.filename, # In real app, save file and store path
-        raw_content=text,
-        content_summary=summary
-    )
-    session.add(resource)
-    session.commit()
-    session.refresh(resource)
-    return resource
+    return _accept(session, resource, model_name)
 
-@router.post("/add/url", response_model=Resource)
+@router.post("/add/url", response_model=IngestAccepted, status_code=202)
 async def add_url(
     topic_id: uuid.UUID,
     url: str,
@@ -54,26 +283,140 @@ async def add_url(
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
 
-    try:
-        text = ingest.extract_text_from_url(url)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to fetch URL: {str(e)}")
-
-    summary = await llm_service.summarize_text(text, model_name=model_name)
-
     resource = Resource(
         topic_id=topic_id,
         type=ResourceType.URL,
         path_or_url=url,
-        raw_content=text,
-        content_summary=summary
+        summary_status=SummaryStatus.PENDING,
     )
-    session.add(resource)
+    return _accept(session, resource, model_name)
+
+@router.post("/bulk", response_model=BulkIngestAccepted, status_code=202)
+async def bulk_ingest(
+    topic_id: uuid.UUID = Form(...),
+    urls: List[str] = Form([]),
+    files: List[UploadFile] = File([]),
+    model_name: str | None = Form(None),
+    session: Session = Depends(get_session)
+):
+    """
+    Adds many URLs and PDFs to a topic at once. All new resources are inserted in one
+    transaction and a single batch job fetches, extracts and summarizes them
+    concurrently. Returns a status per item.
+    """
+    topic = session.get(Topic, topic_id)
+    if not topic:
+        raise HTTPException(status_code=404, detail="Topic not found")
+
+    items: List[BulkIngestItem] = []
+    queued: List[Resource] = [] # Resources still needing text and a summary
+    created: List[Resource] = [] # Copies of earlier uploads, text and summary included
+
+    by_hash: Dict[str, Resource] = {} # Files repeated within this request
+    for file in files:
+        item = BulkIngestItem(source=file.filename or "upload.pdf", status="queued")
+        items.append(item)
+        try:
+            blob = await blob_store.save_upload(file, extension=".pdf")
+        except BlobTooLargeError as e:
+            item.status, item.error = "failed", str(e)
+            continue
+        if blob.sha256 in by_hash:
+            item.status, item.resource_id = "duplicate", by_hash[blob.sha256].id
+            continue
+        resource, is_new = _resource_for_upload(session, topic_id, blob, file.filename)
+        item.resource_id = resource.id
+        if not is_new:
+            item.status = "duplicate"
+            continue
+        by_hash[blob.sha256] = resource
+        if resource.summary_status == SummaryStatus.COMPLETED:
+            item.status = "created"
+            session.add(resource)
+            ingest.sync_chunks(session, resource)
+            created.append(resource)
+        else:
+            queued.append(resource)
+
+    known_urls: Dict[str, uuid.UUID] = dict(session.exec(
+        select(Resource.path_or_url, Resource.id).where(Resource.topic_id == topic_id, Resource.type == ResourceType.URL)
+    ).all())
+    for url in urls:
+        item = BulkIngestItem(source=url, status="queued")
+        items.append(item)
+        if url in known_urls:
+            item.status, item.resource_id = "duplicate", known_urls[url]
+            continue
+        resource = Resource(topic_id=topic_id, type=ResourceType.URL, path_or_url=url, summary_status=SummaryStatus.PENDING)
+        known_urls[url] = item.resource_id = resource.id
+        queued.append(resource)
+
+    session.add_all(queued)
+    job = None
+    if queued:
+        job = job_queue.enqueue(
+            session, BULK_INGEST_JOB,
+            payload={"resource_ids": [str(r.id) for r in queued], "model_name": model_name},
+        )
+    embedding = _enqueue_embedding(session, created)
     session.commit()
-    session.refresh(resource)
-    return resource
+    if job or embedding:
+        job_queue.notify()
+    return BulkIngestAccepted(job_id=job.id if job else None, items=items)
+
+@router.post("/{resource_id}/reingest", response_model=IngestAccepted, status_code=202)
+async def reingest_resource(
+    resource_id: uuid.UUID,
+    model_name: str | None = None,
+    session: Session = Depends(get_session)
+):
+    """
+    Re-extracts a resource (a conditional GET for URLs) and updates its chunks
+    incrementally; the summary is only regenerated when the text changed. While an
+    ingestion job for the resource is queued or running, that job is returned instead.
+    """
+    resource = session.get(Resource, resource_id)
+    if not resource:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    if resource.type == ResourceType.TEXT:
+        raise HTTPException(status_code=400, detail="Text resources have no source to re-ingest")
+    active = session.exec(
+        select(Job.id).where(
+            Job.resource_id == resource.id,
+            Job.kind == INGEST_JOB,
+            Job.status.in_((JobStatus.QUEUED, JobStatus.RUNNING)),
+        )
+    ).first()
+    if active:
+        return IngestAccepted(job_id=active, resource=resource)
+    return _accept(session, resource, model_name, refresh=True)
+
+# Listings select only these columns, so raw_content is never read from disk
+LIST_COLUMNS = [getattr(Resource, name) for name in ResourceListItem.model_fields]
+# Unique sort key for listings; ix_resource_topic_id_created_at covers it
+RESOURCE_ORDER = (Resource.created_at, Resource.id)
 
-@router.get("/topic/{topic_id}", response_model=List[Resource])
-def get_resources_by_topic(topic_id: uuid.UUID, session: Session = Depends(get_session)):
-    resources = session.exec(select(Resource).where(Resource.topic_id == topic_id)).all()
-    return resources
+def topic_resources(topic_id: uuid.UUID):
+    return select(*LIST_COLUMNS).where(Resource.topic_id == topic_id)
+
+@router.get("/topic/{topic_id}", response_model=List[ResourceListItem])
+def get_resources_by_topic(
+    topic_id: uuid.UUID,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: Session = Depends(get_session)
+):
+    """
+    A topic's resources, oldest first, without their extracted text. Paginated by
+    (created_at, id); the next page's cursor is in the X-Next-Cursor header.
+    """
+    rows = paginate(session, topic_resources(topic_id), RESOURCE_ORDER, response, cursor, limit)
+    return [ResourceListItem.model_validate(row._mapping) for row in rows]
+
+@router.get("/{resource_id}", response_model=Resource)
+def get_resource(resource_id: uuid.UUID, session: Session = Depends(get_session)):
+    resource = session.get(Resource, resource_id)
+    if not resource:
+        raise HTTPException(status_code=404, detail="Resource not found")
+    return resource
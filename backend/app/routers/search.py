@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+from typing import List, Optional
+from app.database import get_session
+from app.models import Resource, ResourceChunk, SearchHit, SemanticHit, Topic
+from app.services import search as search_service
+from app.services.vector_index import vector_index
+import uuid
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+@router.get("", response_model=List[SearchHit])
+def search(
+    q: str = Query(..., min_length=1),
+    topic_id: Optional[uuid.UUID] = None,
+    kinds: List[str] = Query(list(search_service.SEARCH_KINDS)),
+    prefix: bool = False,
+    limit: int = Query(20, ge=1, le=200),
+    session: Session = Depends(get_session)
+):
+    """
+    Keyword search over resource text, notes, topics and concepts, best BM25 match first.
+    topic_id limits results to that topic and its subtopics; prefix=true treats the last
+    word as a prefix (search-as-you-type), as does a trailing * on any word.
+    """
+    unknown = set(kinds) - set(search_service.SEARCH_KINDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search kinds: {', '.join(sorted(unknown))}")
+    if topic_id and not session.get(Topic, topic_id):
+        raise HTTPException(status_code=404, detail="Topic not found")
+    try:
+        return search_service.search(session, q, topic_id=topic_id, kinds=kinds, limit=limit, prefix=prefix)
+    except OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e.orig}")
+
+@router.get("/semantic", response_model=List[SemanticHit])
+def semantic_search(
+    q: str = Query(..., min_length=1),
+    topic_id: Optional[uuid.UUID] = None,
+    k: int = Query(10, ge=1, le=100),
+    exact: bool = False,
+    session: Session = Depends(get_session)
+):
+    """
+    The k resource chunks closest to q in embedding space, most similar first.
+    topic_id limits results to that topic and its subtopics; exact=true scores every
+    chunk instead of using the approximate (IVF) index on large collections.
+    """
+    owners = None
+    if topic_id:
+        if not session.get(Topic, topic_id):
+            raise HTTPException(status_code=404, detail="Topic not found")
+        owners = search_service.resources_in_scope(session, topic_id)
+        if not owners:
+            return []
+
+    hits = vector_index.search(q, k=k, owners=owners, exact=exact)
+    rows = session.exec(
+        select(ResourceChunk, Resource.topic_id, Resource.title, Resource.path_or_url)
+        .join(Resource, Resource.id == ResourceChunk.resource_id)
+        .where(ResourceChunk.id.in_([h.chunk_id for h in hits]))
+    ).all()
+    chunks = {chunk.id: (chunk, topic, title or path) for chunk, topic, title, path in rows}
+    results = []
+    for hit in hits:
+        if hit.chunk_id not in chunks:
+            continue  # Deleted since it was indexed
+        chunk, topic, title = chunks[hit.chunk_id]
+        results.append(SemanticHit(
+            chunk_id=hit.chunk_id,
+            resource_id=hit.resource_id,
+            topic_id=topic,
+            title=title,
+            chunk_index=chunk.chunk_index,
+            page=chunk.page_start,
+            content=chunk.content,
+            score=hit.score,
+        ))
+    return results
@@ -1,15 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, literal
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, select
-from typing import List
+from typing import Dict, List, Optional
 from app.database import get_session
-from app.models import Topic, Resource, ResourceType, Concept, Activity, ActivityType
+from app.models import (
+    Topic, TopicTreeNode, Resource, ResourceType, Concept, Activity, ActivityStatus,
+)
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, paginate
 from app.services.llm import LLMService
+from app.services.persistence import activity_type, build_topic_tree, bulk_insert
+from app.services.retrieval import Passage, retrieve_in_thread
+from app.services.resilience import LLMError
+from app.services.singleflight import generation_flights
 import uuid
 import json
 
 router = APIRouter(prefix="/topics", tags=["topics"])
 llm_service = LLMService()
 
+# Hard cap on recursion, so a parent_id cycle cannot make the tree query run away
+MAX_TREE_DEPTH = 64
+# Unique sort key for the topic listing; ix_topic_created_at_id covers it
+TOPIC_ORDER = (Topic.created_at, Topic.id)
+
+def topic_children(topic_id: uuid.UUID):
+    return select(Topic).where(Topic.parent_id == topic_id)
+
 @router.get("/models")
 async def list_available_models():
     """
@@ -27,37 +46,26 @@ async def generate_topic_syllabus(
     Generates a syllabus for the given prompt and saves it to the database.
     Returns the root Topic.
     """
+    key = ("topics/generate", prompt, model_name)
+    root_id = await generation_flights.do(key, lambda: _generate_and_save_syllabus(session.get_bind(), prompt, model_name))
+    return session.get(Topic, root_id)
+
+async def _generate_and_save_syllabus(engine: Engine, prompt: str, model_name: str | None) -> uuid.UUID:
     # 1. Generate JSON from LLM
     try:
         syllabus_data = await llm_service.generate_syllabus(prompt, model_name=model_name)
+    except LLMError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM Generation failed: {str(e)}")
 
-    # 2. Parse and Save to DB (Recursive function)
-    
-    # 2. Parse and Save to DB (Recursive function)
-    root_topic = create_topic_recursive(session, syllabus_data)
-    return root_topic
-
-def create_topic_recursive(session: Session, data: dict, parent_id: uuid.UUID | None = None, order: int = 0) -> Topic:
-    # Create the current topic
-    topic = Topic(
-        title=data["title"],
-        description=data.get("description", ""),
-        parent_id=parent_id,
-        order_index=order
-    )
-    session.add(topic)
-    session.commit() # Commit to get the ID
-    session.refresh(topic)
-
-    # Handle "subtopics"
-    children = data.get("subtopics", [])
-    
-    for i, child in enumerate(children):
-        create_topic_recursive(session, child, parent_id=topic.id, order=i)
-        
-    return topic
+    # 2. Build the whole tree in memory and insert it in one transaction
+    topics = build_topic_tree(syllabus_data)
+    # Runs as a shared flight that can outlive the request, so it has a session of its own
+    with Session(engine) as session:
+        bulk_insert(session, topics)
+        session.commit()
+    return topics[0].id
 
 @router.post("/{topic_id}/elaborate", response_model=Topic)
 async def elaborate_topic(
@@ -73,75 +81,83 @@ async def elaborate_topic(
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
 
-    try:
-        data = await llm_service.elaborate_topic(
-            topic_title=topic.title, 
-            current_description=topic.description or "", 
-            instruction=instruction,
-            model_name=model_name
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM Elaboration failed: {str(e)}")
+    # Duplicate clicks share one elaboration instead of each appending their own subtopics/concepts
+    key = ("topics/elaborate", topic_id, model_name, instruction)
+    await generation_flights.do(key, lambda: _elaborate_and_save(session.get_bind(), topic_id, instruction, model_name))
+    session.refresh(topic)
+    return topic
 
-    # 1. Update Description
-    if data.get("description"):
-        topic.description = data["description"]
-        session.add(topic)
-    
-    # 2. Add Subtopics (Find next order index)
-    existing_children = session.exec(select(Topic).where(Topic.parent_id == topic.id)).all()
-    next_order = len(existing_children)
-
-    for sub in data.get("subtopics", []):
-        create_topic_recursive(session, sub, parent_id=topic.id, order=next_order)
-        next_order += 1
-
-    # 3. Add Resources
-    for res in data.get("resources", []):
-        new_res = Resource(
-            topic_id=topic.id,
-            type=ResourceType.URL,
-            path_or_url=res["url"],
-            content_summary=f"Recommended: {res['title']}"
-        )
-        session.add(new_res)
+async def _elaborate_and_save(engine: Engine, topic_id: uuid.UUID, instruction: str, model_name: str | None) -> None:
+    # Runs as a shared flight that can outlive the request, so it has a session of its own
+    with Session(engine) as session:
+        topic = session.get(Topic, topic_id)
+        context = await retrieve_in_thread(engine, topic.id, f"{topic.title} {instruction}", purpose="elaborate")
+        try:
+            data = await llm_service.elaborate_topic(
+                topic_title=topic.title, 
+                current_description=topic.description or "", 
+                instruction=instruction,
+                model_name=model_name,
+                sources=context.render()
+            )
+        except LLMError:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"LLM Elaboration failed: {str(e)}")
 
-    # 4. Add Concepts and Activities
-    concepts_data = data.get("concepts", [])
-    
-    # Check existing concepts to append correctly (or we can just append)
-    existing_concepts = session.exec(select(Concept).where(Concept.topic_id == topic.id)).all()
-    concept_order = len(existing_concepts)
-
-    for concept_data in concepts_data:
-        new_concept = Concept(
-            title=concept_data["title"],
-            description=concept_data.get("description", ""),
-            topic_id=topic.id,
-            order_index=concept_order
-        )
-        session.add(new_concept)
-        session.commit() # Commit to get concept ID
-        session.refresh(new_concept)
-        concept_order += 1
-
-        # Add activities for this concept
-        for activity_data in concept_data.get("activities", []):
-            # Validate activity type (simple fallback)
-            act_type = activity_data.get("type", "read")
-            # Map string to Enum if needed, but Pydantic/SQLModel usually handles strings if they match values
-            
-            new_activity = Activity(
-                concept_id=new_concept.id,
-                type=act_type,
-                instructions=activity_data.get("instructions", ""),
-                content=json.dumps(activity_data.get("content", "")) if isinstance(activity_data.get("content"), (dict, list)) else activity_data.get("content", "")
+        # 1. Update Description
+        if data.get("description"):
+            topic.description = data["description"]
+            session.add(topic)
+
+        # 2. Add Subtopics (Find next order index)
+        existing_children = session.exec(topic_children(topic.id)).all()
+        next_order = len(existing_children)
+
+        new_rows = []
+        for sub in data.get("subtopics", []):
+            new_rows.extend(build_topic_tree(sub, parent_id=topic.id, order=next_order))
+            next_order += 1
+
+        # 3. Add Resources
+        for res in data.get("resources", []):
+            new_rows.append(Resource(
+                topic_id=topic.id,
+                type=ResourceType.URL,
+                path_or_url=res["url"],
+                content_summary=f"Recommended: {res['title']}"
+            ))
+
+        # 4. Add Concepts and Activities
+        concepts_data = data.get("concepts", [])
+
+        # Check existing concepts to append correctly (or we can just append)
+        existing_concepts = session.exec(select(Concept).where(Concept.topic_id == topic.id)).all()
+        concept_order = len(existing_concepts)
+
+        new_activities = []
+        for concept_data in concepts_data:
+            new_concept = Concept(
+                title=concept_data["title"],
+                description=concept_data.get("description", ""),
+                topic_id=topic.id,
+                order_index=concept_order
             )
-            session.add(new_activity)
+            new_rows.append(new_concept)
+            concept_order += 1
 
-    session.commit()
-    session.refresh(topic)
-    return topic
+            # Add activities for this concept
+            for activity_data in concept_data.get("activities", []):
+                new_activities.append(Activity(
+                    concept_id=new_concept.id,
+                    type=activity_type(activity_data.get("type")),
+                    instructions=activity_data.get("instructions", ""),
+                    content=json.dumps(activity_data.get("content", "")) if isinstance(activity_data.get("content"), (dict, list)) else activity_data.get("content", "")
+                ))
+
+        # Concept ids are generated client-side, so everything goes in with one insert per table
+        bulk_insert(session, new_rows + new_activities)
+        session.commit()
 
 @router.post("/{topic_id}/ask")
 async def ask_topic(
@@ -151,19 +167,89 @@ async def ask_topic(
     session: Session = Depends(get_session)
 ):
     """
-    Ask a question about the topic. Returns a plain text answer.
+    Ask a question about the topic. Returns a plain text answer, and the passages from
+    the topic's (and its ancestors') resources and notes it was given, numbered as cited.
     """
     topic = session.get(Topic, topic_id)
     if not topic:
         raise HTTPException(status_code=404, detail="Topic not found")
-        
+
+    context = await retrieve_in_thread(session.get_bind(), topic.id, question, purpose="ask")
     answer = await llm_service.chat_with_topic(
         topic_title=topic.title,
         context=topic.description or "",
         question=question,
-        model_name=model_name
+        model_name=model_name,
+        sources=context.render()
+    )
+    return {"answer": answer, "sources": [_source(p) for p in context.passages]}
+
+def _source(passage: Passage) -> dict:
+    return {
+        "kind": passage.kind, "id": passage.id, "resource_id": str(passage.resource_id) if passage.resource_id else None,
+        "title": passage.title, "page": passage.page,
+    }
+
+def sse_event(data: dict, event: str | None = None) -> str:
+    """
+    Formats one Server-Sent Event. Payloads are JSON so tokens containing
+    newlines survive the line-oriented framing.
+    """
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@router.post("/{topic_id}/ask/stream")
+async def ask_topic_stream(
+    topic_id: uuid.UUID,
+    question: str = Body(..., embed=True),
+    model_name: str = Body(None, embed=True),
+    session: Session = Depends(get_session)
+):
+    """
+    Ask a question about the topic. Streams the answer as Server-Sent Events: an
+    `event: sources` frame listing the retrieved passages (when there are any), one
+    `data: {"token": ...}` frame per chunk, then an `event: done` frame (or
+    `event: error` if generation fails mid-stream).
+    """
+    topic = session.get(Topic, topic_id)
+    if not topic:
+        raise HTTPException(status_code=404, detail="Topic not found")
+
+    context = await retrieve_in_thread(session.get_bind(), topic.id, question, purpose="ask")
+    tokens = llm_service.stream_chat_with_topic(
+        topic_title=topic.title,
+        context=topic.description or "",
+        question=question,
+        model_name=model_name,
+        sources=context.render()
+    )
+    # Wait for the first chunk before committing to a 200 so rate-limit/outage errors
+    # still reach the client as a regular 429/503 response.
+    try:
+        first = await anext(tokens, None)
+    except LLMError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error answering question: {e}")
+
+    async def event_stream():
+        if context.passages:
+            yield sse_event({"sources": [_source(p) for p in context.passages]}, event="sources")
+        try:
+            if first is not None:
+                yield sse_event({"token": first})
+            async for token in tokens:
+                yield sse_event({"token": token})
+        except Exception as e:
+            yield sse_event({"detail": f"Error answering question: {e}"}, event="error")
+            return
+        yield sse_event({}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return {"answer": answer}
 
 @router.patch("/{topic_id}/status", response_model=Topic)
 def update_topic_status(
@@ -189,9 +275,78 @@ def update_topic_status(
     return topic
 
 @router.get("/", response_model=List[Topic])
-def read_topics(session: Session = Depends(get_session)):
-    topics = session.exec(select(Topic)).all()
-    return topics
+def read_topics(
+    response: Response,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: Session = Depends(get_session)
+):
+    """
+    All topics, oldest first, paginated by (created_at, id); the next page's cursor is
+    in the X-Next-Cursor header. GET /topics/tree serves the nested view.
+    """
+    return paginate(session, select(Topic), TOPIC_ORDER, response, cursor, limit)
+
+@router.get("/tree", response_model=List[TopicTreeNode])
+def read_topic_tree(
+    root_id: Optional[uuid.UUID] = None,
+    max_depth: Optional[int] = Query(None, ge=0, le=MAX_TREE_DEPTH),
+    session: Session = Depends(get_session)
+):
+    """
+    Returns topics as nested trees: the subtree under root_id, or every root topic's tree.
+    max_depth limits how many levels below the root are included (0 = the root alone).
+    """
+    if root_id is not None and not session.get(Topic, root_id):
+        raise HTTPException(status_code=404, detail="Topic not found")
+
+    nodes: Dict[uuid.UUID, TopicTreeNode] = {}
+    roots: List[TopicTreeNode] = []
+    for topic, depth, child_count, concept_count, activity_count, completed in session.exec(
+        _topic_tree_query(root_id, MAX_TREE_DEPTH if max_depth is None else max_depth)
+    ):
+        node = TopicTreeNode(
+            **topic.model_dump(),
+            depth=depth,
+            child_count=child_count,
+            concept_count=concept_count,
+            activity_count=activity_count,
+            completed_activity_count=completed,
+        )
+        nodes[node.id] = node
+        # Rows come ordered by depth, so a node's parent has always been seen already
+        parent = nodes.get(node.parent_id) if depth else None
+        (parent.children if parent else roots).append(node)
+    return roots
+
+def _topic_tree_query(root_id: Optional[uuid.UUID], max_depth: int):
+    """
+    One statement: a recursive CTE walks parent_id down from the root(s), and correlated
+    counts (served by the parent_id/topic_id/concept_id indexes) are computed per node.
+    Rows are ordered by depth, then syllabus order.
+    """
+    start = Topic.id == root_id if root_id is not None else Topic.parent_id.is_(None)
+    tree = select(Topic.id, literal(0).label("depth")).where(start).cte("tree", recursive=True)
+    tree = tree.union_all(
+        select(Topic.id, tree.c.depth + 1)
+        .join(tree, Topic.parent_id == tree.c.id)
+        .where(tree.c.depth < max_depth)
+    )
+
+    child = aliased(Topic)
+    child_count = select(func.count()).where(child.parent_id == Topic.id).scalar_subquery()
+    concept_count = select(func.count()).where(Concept.topic_id == Topic.id).scalar_subquery()
+    activities = select(func.count()).select_from(Activity).join(Concept, Activity.concept_id == Concept.id)
+    activity_count = activities.where(Concept.topic_id == Topic.id).scalar_subquery()
+    completed_count = activities.where(
+        Concept.topic_id == Topic.id, Activity.status == ActivityStatus.COMPLETED
+    ).scalar_subquery()
+
+    return (
+        select(Topic, tree.c.depth, child_count, concept_count, activity_count, completed_count)
+        .join(tree, Topic.id == tree.c.id)
+        .order_by(tree.c.depth, Topic.order_index, Topic.created_at)
+    )
 
 @router.get("/{topic_id}", response_model=Topic)
 def read_topic(topic_id: uuid.UUID, session: Session = Depends(get_session)):
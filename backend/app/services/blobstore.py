@@ -0,0 +1,79 @@
+import os
+import asyncio
+import hashlib
+import tempfile
+from dataclasses import dataclass
+
+from fastapi import UploadFile
+
+
+class BlobTooLargeError(Exception):
+    pass
+
+
+@dataclass
+class StoredBlob:
+    sha256: str
+    path: str
+    size: int
+    created: bool  # False when identical content was already stored
+
+
+class BlobStore:
+    """
+    Content-addressed file store for uploads. Files are streamed to disk in chunks
+    while being hashed, then moved to <root>/<aa>/<sha256><ext>, so identical
+    uploads share one file.
+    """
+    def __init__(self, root: str = "uploads", chunk_bytes: int = 1024 * 1024, max_bytes: int = 200 * 1024 * 1024):
+        self.root = root
+        self.chunk_bytes = chunk_bytes
+        self.max_bytes = max_bytes
+
+    def path_for(self, digest: str, extension: str = "") -> str:
+        return os.path.join(self.root, digest[:2], digest + extension)
+
+    async def save_upload(self, upload: UploadFile, extension: str = "") -> StoredBlob:
+        """
+        Only the reads run on the event loop; the file work (hashing, writing, moving
+        into place) runs in a worker thread, one call per chunk.
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = await asyncio.to_thread(self._create_temp)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while chunk := await upload.read(self.chunk_bytes):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise BlobTooLargeError(f"Upload is larger than {self.max_bytes} bytes")
+                    await asyncio.to_thread(_append, out, hasher, chunk)
+            return await asyncio.to_thread(self._store, tmp_path, hasher.hexdigest(), extension, size)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _create_temp(self) -> tuple[int, str]:
+        os.makedirs(self.root, exist_ok=True)
+        return tempfile.mkstemp(dir=self.root, suffix=".part")
+
+    def _store(self, tmp_path: str, digest: str, extension: str, size: int) -> StoredBlob:
+        path = self.path_for(digest, extension)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            return StoredBlob(sha256=digest, path=path, size=size, created=False)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return StoredBlob(sha256=digest, path=path, size=size, created=True)
+
+
+def _append(out, hasher, chunk: bytes):
+    hasher.update(chunk)
+    out.write(chunk)
+
+blob_store = BlobStore(
+    root=os.environ.get("UPLOAD_DIR", "uploads"),
+    chunk_bytes=int(os.environ.get("UPLOAD_CHUNK_BYTES", str(1024 * 1024))),
+    max_bytes=int(os.environ.get("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024))),
+)
@@ -0,0 +1,82 @@
+import zlib
+from typing import List, Tuple
+
+# Rough average for English prose with Gemini/SentencePiece-style tokenizers.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (no network round trip to count_tokens).
+    """
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _units(text: str, max_tokens: int) -> List[str]:
+    """
+    Splits text into lines, hard-wrapping any single line longer than max_tokens.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    units = []
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            units.append(line[:max_chars])
+            line = line[max_chars:]
+        if line:
+            units.append(line)
+    return units
+
+
+def split_spans(text: str, max_tokens: int = 4000, min_tokens: int | None = None, divisor: int = 8) -> List[Tuple[int, int]]:
+    """
+    Splits text into (start, end) spans of at most max_tokens (estimated), cutting on line boundaries.
+
+    Boundaries are content-defined: once a span holds min_tokens, it is cut after any
+    line whose checksum is divisible by `divisor`. An edit therefore only moves the
+    boundaries around the edited region and later spans come out identical, which is
+    what lets per-chunk results (summaries, embeddings) be reused after a change.
+    """
+    if min_tokens is None:
+        min_tokens = max_tokens // 2
+
+    spans = []
+    start = end = 0
+    current_tokens = 0
+    for unit in _units(text, max_tokens):
+        unit_tokens = estimate_tokens(unit)
+        if end > start and current_tokens + unit_tokens > max_tokens:
+            spans.append((start, end))
+            start, current_tokens = end, 0
+
+        end += len(unit)
+        current_tokens += unit_tokens
+        if current_tokens >= min_tokens and zlib.crc32(unit.encode("utf-8")) % divisor == 0:
+            spans.append((start, end))
+            start, current_tokens = end, 0
+
+    if end > start:
+        spans.append((start, end))
+    return [(a, b) for a, b in spans if text[a:b].strip()]
+
+
+def split_text(text: str, max_tokens: int = 4000, min_tokens: int | None = None, divisor: int = 8) -> List[str]:
+    """
+    Content-defined chunks of at most max_tokens; see split_spans.
+    """
+    return [text[a:b] for a, b in split_spans(text, max_tokens, min_tokens, divisor)]
+
+
+def overlapping_spans(text: str, max_tokens: int, overlap_tokens: int) -> List[Tuple[int, int]]:
+    """
+    Content-defined spans of at most max_tokens where each one also repeats up to
+    overlap_tokens of the text before it, starting on a word boundary.
+    """
+    overlap_chars = overlap_tokens * CHARS_PER_TOKEN
+    spans = []
+    for start, end in split_spans(text, max(1, max_tokens - overlap_tokens)):
+        if start and overlap_chars:
+            lead = max(0, start - overlap_chars)
+            space = text.find(" ", lead, start)
+            start = space + 1 if lead and space != -1 else lead
+        spans.append((start, end))
+    return spans
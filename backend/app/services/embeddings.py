@@ -0,0 +1,90 @@
+"""
+Local text embedders for semantic search. Nothing here calls a remote service.
+
+"hashing" (the default) needs no model at all: word unigrams and bigrams are hashed
+into a fixed number of signed buckets. It captures vocabulary overlap, not meaning,
+but works offline from the first run. "sentence-transformers" runs a real embedding
+model locally when that package (and the model, SENTENCE_TRANSFORMER_MODEL) is
+installed. Choose with EMBEDDER; vectors from different embedders are not comparable,
+so the vector index is rebuilt when it changes.
+"""
+import os
+import re
+import zlib
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+EMBEDDER = os.environ.get("EMBEDDER", "hashing")
+EMBEDDING_DIM = int(os.environ.get("EMBEDDING_DIM", "512"))
+SENTENCE_TRANSFORMER_MODEL = os.environ.get("SENTENCE_TRANSFORMER_MODEL", "all-MiniLM-L6-v2")
+
+_TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i if in into is it its of on or "
+    "our she so than that the their them then there these they this to was we were what when "
+    "which who will with you your".split()
+)
+BIGRAM_WEIGHT = 0.5
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+class HashingEmbedder:
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = [w for w in _TOKEN.findall(text.lower()) if w not in STOPWORDS]
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            if not features:
+                continue
+            # crc32 rather than hash(): stable across processes, which stored vectors rely on
+            hashes = np.fromiter((zlib.crc32(f.encode()) for f in features), dtype=np.uint32, count=len(features))
+            weights = np.ones(len(features), dtype=np.float32)
+            weights[len(words):] = BIGRAM_WEIGHT
+            # Top bit picks the sign, so colliding features tend to cancel rather than pile up
+            signs = np.where(hashes >> 31, -1.0, 1.0).astype(np.float32)
+            np.add.at(out[row], hashes % self.dim, signs * weights)
+        # Dampen repeated terms so one frequent word does not dominate a chunk
+        np.copyto(out, np.sign(out) * np.log1p(np.abs(out)))
+        return _normalize(out)
+
+
+class SentenceTransformerEmbedder:
+    def __init__(self, model_name: str = SENTENCE_TRANSFORMER_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self._model = SentenceTransformer(model_name)
+        self.dim = self._model.get_sentence_embedding_dimension()
+        self.name = f"sentence-transformers-{model_name}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+EMBEDDERS = {"hashing": HashingEmbedder, "sentence-transformers": SentenceTransformerEmbedder}
+_embedders: Dict[str, Any] = {}
+
+
+def get_embedder(name: str | None = None):
+    """
+    Returns the named embedder (default: EMBEDDER). Every embedder returns L2-normalized
+    float32 rows, so a dot product is the cosine similarity.
+    """
+    name = name or EMBEDDER
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder '{name}'")
+    if name not in _embedders:
+        try:
+            _embedders[name] = EMBEDDERS[name]()
+        except ImportError:
+            raise ValueError(f"Embedder '{name}' is not available")
+    return _embedders[name]
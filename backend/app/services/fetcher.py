@@ -0,0 +1,176 @@
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app import metrics
+from app.database import DB_PROFILE, DB_PROFILES, apply_sqlite_pragmas
+
+
+class FetchError(Exception):
+    pass
+
+
+@dataclass
+class CachedPage:
+    url: str
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    extractor_version: str = "" # Version of the extractor that produced text
+
+
+class FetchCache:
+    """
+    Remembers validators (ETag / Last-Modified) and the extracted text per URL,
+    so a re-fetch can be a conditional GET that skips download and parsing on 304.
+    Text from another extractor version is treated as a miss.
+    """
+    def __init__(self, path: str = "fetch_cache.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            apply_sqlite_pragmas(self._conn, DB_PROFILES[DB_PROFILE])
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fetch_cache ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, text TEXT NOT NULL, fetched_at REAL NOT NULL, "
+                "extractor_version TEXT)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, url: str, extractor_version: str = "") -> Optional[CachedPage]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT etag, last_modified, text, extractor_version FROM fetch_cache WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or (row[3] or "") != extractor_version:
+            return None
+        return CachedPage(url=url, etag=row[0], last_modified=row[1], text=row[2], extractor_version=extractor_version)
+
+    def set(self, page: CachedPage):
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO fetch_cache (url, etag, last_modified, text, fetched_at, extractor_version) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (page.url, page.etag, page.last_modified, page.text, time.time(), page.extractor_version),
+            )
+            db.commit()
+
+
+class URLFetcher:
+    """
+    Async page fetcher with a shared connection pool, per-host concurrency limits,
+    connect/read timeouts, a streamed body with a size cap, and a conditional-GET cache.
+    """
+    def __init__(
+        self,
+        cache: FetchCache,
+        max_bytes: int = 10 * 1024 * 1024,
+        connect_timeout: float = 5,
+        read_timeout: float = 20,
+        max_connections: int = 20,
+        per_host: int = 4,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.per_host = per_host
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+
+    def client(self) -> httpx.AsyncClient:
+        # The pool and the host semaphores belong to one event loop.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                follow_redirects=True,
+                headers={"User-Agent": "Autodidact/1.0 (+resource ingestion)"},
+                transport=self.transport,
+            )
+            self._loop = loop
+            self._hosts = {}
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    async def fetch_text(self, url: str, extract: Callable[[str], str], extractor_version: str = "") -> str:
+        """
+        Returns extract(html) for the page. When the server confirms the cached copy is
+        still current (304), the cached extraction is returned without downloading or parsing,
+        provided it was made by the same extractor_version.
+        """
+        cached = self.cache.get(url, extractor_version)
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        client = self.client()
+        async with self._host_limit(url):
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and cached:
+                    metrics.CACHE_LOOKUPS.inc(cache="fetch", tier="disk", result="hit")
+                    return cached.text
+                response.raise_for_status()
+                metrics.CACHE_LOOKUPS.inc(cache="fetch", tier="disk", result="miss")
+                html = await self._read_body(response)
+
+        # HTML parsing is CPU-bound; keep it off the event loop.
+        text = await asyncio.to_thread(extract, html)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self.cache.set(CachedPage(
+                url=url, text=text, etag=etag, last_modified=last_modified, extractor_version=extractor_version
+            ))
+        return text
+
+    async def _read_body(self, response: httpx.Response) -> str:
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise FetchError(f"Page is larger than {self.max_bytes} bytes")
+
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) > self.max_bytes:
+                raise FetchError(f"Page is larger than {self.max_bytes} bytes")
+        return body.decode(response.encoding or "utf-8", errors="replace")
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+fetcher = URLFetcher(
+    cache=FetchCache(os.environ.get("FETCH_CACHE_PATH", "fetch_cache.db")),
+    max_bytes=int(os.environ.get("FETCH_MAX_BYTES", str(10 * 1024 * 1024))),
+    connect_timeout=float(os.environ.get("FETCH_CONNECT_TIMEOUT", "5")),
+    read_timeout=float(os.environ.get("FETCH_READ_TIMEOUT", "20")),
+    max_connections=int(os.environ.get("FETCH_MAX_CONNECTIONS", "20")),
+    per_host=int(os.environ.get("FETCH_PER_HOST_CONCURRENCY", "4")),
+)
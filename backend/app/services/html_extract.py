@@ -0,0 +1,313 @@
+"""
+Main-content text extraction from HTML.
+
+Pages are parsed with the fastest engine available (selectolax, then lxml, then
+BeautifulSoup's html.parser), boilerplate is dropped (scripts, navigation, headers,
+footers, sidebars, cookie banners...), and, readability-style, the container holding
+the densest paragraph text is kept. Force an engine with HTML_EXTRACT_ENGINE.
+"""
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+REMOVE_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object",
+    "form", "button", "input", "select", "textarea", "nav", "header", "footer", "aside", "menu", "dialog",
+}
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "main", "ol", "p", "pre", "section",
+    "table", "td", "th", "tr", "ul",
+}
+PARAGRAPH_TAGS = {"p", "pre", "blockquote", "td"}
+KEEP_TAGS = {"html", "body", "article", "main"}
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog", "alert"}
+BOILERPLATE_PATTERN = re.compile(
+    r"(?:^|[\s_-])(?:nav|navbar|menu|footer|header|masthead|sidebar|breadcrumbs?|cookies?|consent|"
+    r"banner|share|social|related|comments?|promo|ads?|advert\w*|sponsor\w*|newsletter|subscribe|popup|modal)(?:$|[\s_-])",
+    re.IGNORECASE,
+)
+CONTENT_PATTERN = re.compile(r"article|body|content|main|post|entry|story", re.IGNORECASE)
+
+# Only these elements can be boilerplate; engines with native selectors use it to skip the rest
+BOILERPLATE_ATTRS = ("class", "id", "role", "hidden", "aria-hidden")
+
+# Bump whenever extraction output changes: cached extractions of other versions are discarded
+EXTRACTOR_VERSION = "2"
+
+MIN_PARAGRAPH_CHARS = 25
+MIN_MAIN_CHARS = 200
+_WHITESPACE = re.compile(r"\s+")
+
+
+class SelectolaxEngine:
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def parse(self, html: str):
+        tree = self._parser(html)
+        return tree.body or tree.root
+
+    def elements(self, root) -> Iterator[Any]:
+        return (node for node in root.traverse() if not node.tag.startswith("-"))
+
+    def boilerplate_candidates(self, root) -> List[Any]:
+        return root.css(", ".join(sorted(REMOVE_TAGS) + [f"[{a}]" for a in BOILERPLATE_ATTRS]))
+
+    def key(self, el):
+        # Nodes are fresh wrappers on every access; identify them by the underlying pointer
+        return el.mem_id
+
+    def tag(self, el) -> str:
+        return el.tag
+
+    def attr(self, el, name: str) -> str:
+        return el.attributes.get(name) or ""
+
+    def parent(self, el):
+        return el.parent
+
+    def remove(self, el):
+        el.decompose()
+
+    def text(self, el) -> str:
+        return el.text()
+
+    def children(self, el) -> List[Any]:
+        return list(el.iter(include_text=True))
+
+    def node_text(self, node) -> Optional[str]:
+        if node.tag == "-text":
+            return node.text_content or ""
+        return "" if node.tag.startswith("-") else None
+
+
+class LxmlEngine:
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        self._html = lxml.html
+        self._parser = lxml.html.HTMLParser(encoding="utf-8")
+        tests = [f"self::{t}" for t in sorted(REMOVE_TAGS)] + [f"@{a}" for a in BOILERPLATE_ATTRS]
+        self._candidates = f".//*[{' or '.join(tests)}]"
+
+    def parse(self, html: str):
+        # Parse bytes: lxml rejects str input that carries an XML encoding declaration
+        root = self._html.document_fromstring(html.encode("utf-8"), parser=self._parser)
+        body = root.find("body")
+        return body if body is not None else root
+
+    def elements(self, root) -> Iterator[Any]:
+        return (el for el in root.iter() if isinstance(el.tag, str))
+
+    def boilerplate_candidates(self, root) -> List[Any]:
+        return root.xpath(self._candidates)
+
+    def key(self, el):
+        # lxml reuses a live proxy per element, and callers keep the proxies they key on alive
+        return el
+
+    def tag(self, el) -> str:
+        return el.tag
+
+    def attr(self, el, name: str) -> str:
+        return el.get(name) or ""
+
+    def parent(self, el):
+        return el.getparent()
+
+    def remove(self, el):
+        el.drop_tree()  # keeps the element's tail text
+
+    def text(self, el) -> str:
+        return el.text_content()
+
+    def children(self, el) -> List[Any]:
+        # lxml keeps text on .text/.tail rather than in nodes; interleave it as strings
+        items: List[Any] = [el.text] if el.text else []
+        for child in el:
+            if isinstance(child.tag, str):
+                items.append(child)
+            if child.tail:
+                items.append(child.tail)
+        return items
+
+    def node_text(self, node) -> Optional[str]:
+        return node if isinstance(node, str) else None
+
+
+class SoupEngine:
+    name = "bs4"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup, NavigableString, Tag
+        self._soup = BeautifulSoup
+        self._string = NavigableString
+        self._tag = Tag
+
+    def parse(self, html: str):
+        soup = self._soup(html, "html.parser")
+        return soup.body or soup
+
+    def elements(self, root) -> Iterator[Any]:
+        return iter(root.find_all(True))
+
+    def boilerplate_candidates(self, root) -> List[Any]:
+        return root.find_all(True)
+
+    def key(self, el):
+        return id(el)
+
+    def tag(self, el) -> str:
+        return el.name
+
+    def attr(self, el, name: str) -> str:
+        value = el.get(name) or ""
+        return " ".join(value) if isinstance(value, list) else value
+
+    def parent(self, el):
+        return el.parent
+
+    def remove(self, el):
+        el.decompose()
+
+    def text(self, el) -> str:
+        return el.get_text()
+
+    def children(self, el) -> List[Any]:
+        return list(el.contents)
+
+    def node_text(self, node) -> Optional[str]:
+        if isinstance(node, self._tag):
+            return None
+        # Comments, doctypes and CDATA are NavigableString subclasses
+        return str(node) if type(node) is self._string else ""
+
+
+ENGINES = {"selectolax": SelectolaxEngine, "lxml": LxmlEngine, "bs4": SoupEngine}
+_engines: Dict[str, Any] = {}
+
+
+def get_engine(name: str | None = None):
+    """
+    Returns the named engine, or the fastest installed one for "auto"/None.
+    """
+    name = name or os.environ.get("HTML_EXTRACT_ENGINE", "auto")
+    candidates = list(ENGINES) if name == "auto" else [name]
+    if not set(candidates) <= set(ENGINES):
+        raise ValueError(f"Unknown HTML extraction engine '{name}'")
+    for candidate in candidates:
+        if candidate in _engines:
+            return _engines[candidate]
+        try:
+            engine = ENGINES[candidate]()
+        except ImportError:
+            continue
+        _engines[candidate] = engine
+        return engine
+    raise ValueError(f"HTML extraction engine '{name}' is not available")
+
+
+def _is_boilerplate(engine, el) -> bool:
+    tag = engine.tag(el)
+    if tag in REMOVE_TAGS:
+        return True
+    if tag in KEEP_TAGS:
+        return False
+    if engine.attr(el, "role").lower() in BOILERPLATE_ROLES:
+        return True
+    if engine.attr(el, "aria-hidden") == "true" or engine.attr(el, "hidden"):
+        return True
+    names = f"{engine.attr(el, 'class')} {engine.attr(el, 'id')}"
+    return bool(BOILERPLATE_PATTERN.search(names)) and not CONTENT_PATTERN.search(names)
+
+
+def _strip_boilerplate(engine, root):
+    doomed = [el for el in engine.boilerplate_candidates(root) if _is_boilerplate(engine, el)]
+    doomed_keys = {engine.key(el) for el in doomed}
+
+    def inside_doomed(el) -> bool:
+        node = engine.parent(el)
+        while node is not None:
+            if engine.key(node) in doomed_keys:
+                return True
+            node = engine.parent(node)
+        return False
+
+    # Only remove outermost matches; their descendants go with them
+    for el in [el for el in doomed if not inside_doomed(el)]:
+        engine.remove(el)
+
+
+def _link_density(engine, el, text_length: int) -> float:
+    if not text_length:
+        return 1.0
+    link_chars = sum(len(engine.text(a)) for a in engine.elements(el) if engine.tag(a) == "a")
+    return min(1.0, link_chars / text_length)
+
+
+def _main_content(engine, root):
+    """
+    Prefers an explicit <article>/<main>; otherwise scores containers by the paragraph
+    text they hold (parents fully, grandparents half) and keeps the best, penalized by link density.
+    """
+    for el in engine.elements(root):
+        if engine.tag(el) in ("article", "main") or engine.attr(el, "role") == "main":
+            if len(engine.text(el).strip()) >= MIN_MAIN_CHARS:
+                return el
+            break
+
+    scores: Dict[Any, list] = {}
+    for el in engine.elements(root):
+        if engine.tag(el) not in PARAGRAPH_TAGS:
+            continue
+        text = engine.text(el).strip()
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+        score = 1 + text.count(",") + min(len(text) // 100, 3)
+        parent = engine.parent(el)
+        for ancestor, weight in ((parent, 1.0), (engine.parent(parent) if parent is not None else None, 0.5)):
+            if ancestor is not None:
+                scores.setdefault(engine.key(ancestor), [ancestor, 0.0])[1] += score * weight
+
+    best, best_score = None, 0.0
+    for el, score in scores.values():
+        adjusted = score * (1 - _link_density(engine, el, len(engine.text(el))))
+        if adjusted > best_score:
+            best, best_score = el, adjusted
+    if best is None or len(engine.text(best).strip()) < MIN_MAIN_CHARS:
+        return root
+    return best
+
+
+def _text_chunks(engine, el) -> Iterator[str]:
+    # Iterative walk (pages nest deeply), with line breaks around block elements
+    stack = [(el, False)]
+    while stack:
+        node, closing = stack.pop()
+        if closing:
+            yield "\n"
+            continue
+        text = engine.node_text(node)
+        if text is not None:
+            yield text
+            continue
+        if engine.tag(node) in BLOCK_TAGS:
+            yield "\n"
+            stack.append((node, True))
+        stack.extend((child, False) for child in reversed(engine.children(node)))
+
+
+def extract_main_text(html: str, engine_name: str | None = None) -> str:
+    if not html or not html.strip():
+        return ""
+    engine = get_engine(engine_name)
+    root = engine.parse(html)
+    _strip_boilerplate(engine, root)
+    content = _main_content(engine, root)
+    lines = (_WHITESPACE.sub(" ", line).strip() for line in "".join(_text_chunks(engine, content)).split("\n"))
+    return "\n".join(line for line in lines if line)
@@ -1,32 +1,131 @@
-import io
-import requests
-from bs4 import BeautifulSoup
-from pypdf import PdfReader
-
-def extract_text_from_pdf(file_content: bytes) -> str:
-    reader = PdfReader(io.BytesIO(file_content))
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text.strip()
-
-def extract_text_from_url(url: str) -> str:
-    response = requests.get(url)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Remove script and style elements
-    for script in soup(["script", "style"]):
-        script.extract()
-        
-    # Get text
-    text = soup.get_text()
-    
-    # Break into lines and remove leading and trailing space on each
-    lines = (line.strip() for line in text.splitlines())
-    # Break multi-headlines into a line each
-    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-    # Drop blank lines
-    text = '\n'.join(chunk for chunk in chunks if chunk)
-    
-    return text
+import os
+import re
+import bisect
+import asyncio
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+from sqlmodel import Session, select
+from app.models import Resource, ResourceChunk, ResourceType
+from app.services import html_extract, pdf_extract
+from app.services.chunking import estimate_tokens, overlapping_spans
+from app.services.fetcher import fetcher
+
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", "50"))
+CHUNK_TOKENS = int(os.environ.get("CHUNK_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.environ.get("CHUNK_OVERLAP_TOKENS", "50"))
+
+# Separates pages in extracted PDF text, so page numbers can be recovered from offsets
+PAGE_BREAK = "\f"
+
+_pdf_pool: ProcessPoolExecutor | None = None
+
+def _pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        # Spawned, not forked: a fork of the server would copy its threads' locks and
+        # sqlite connections mid-use. Workers only import pdf_extract.
+        _pdf_pool = ProcessPoolExecutor(max_workers=max(1, PDF_WORKERS), mp_context=multiprocessing.get_context("spawn"))
+    return _pdf_pool
+
+def shutdown_pdf_pool():
+    global _pdf_pool
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False, cancel_futures=True)
+        _pdf_pool = None
+
+async def extract_pdf_pages(source: pdf_extract.PDFSource) -> List[str]:
+    """
+    Extracts text per page in a process pool, so parsing never blocks the event loop.
+    Large documents are split into page ranges that are parsed in parallel.
+    Pass a file path rather than bytes for big files, so workers map it instead of copying.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pool()
+    page_count = await loop.run_in_executor(pool, pdf_extract.count_pages, source)
+    ranges = pdf_extract.page_ranges(page_count, PDF_PAGES_PER_TASK)
+    parts = await asyncio.gather(*(
+        loop.run_in_executor(pool, pdf_extract.extract_page_range, source, start, stop)
+        for start, stop in ranges
+    ))
+    return [page for part in parts for page in part]
+
+async def extract_text_from_pdf(source: pdf_extract.PDFSource) -> str:
+    pages = await extract_pdf_pages(source)
+    # Strip each page rather than the whole text: a blank first page must keep its separator
+    return PAGE_BREAK.join(page.strip() for page in pages)
+
+async def extract_text_from_url(url: str) -> str:
+    return await fetcher.fetch_text(url, extract_text_from_html, extractor_version=html_extract.EXTRACTOR_VERSION)
+
+def extract_text_from_html(html: str) -> str:
+    return html_extract.extract_main_text(html)
+
+@dataclass
+class TextChunk:
+    index: int
+    content: str
+    start: int
+    end: int
+    page_start: Optional[int]
+    page_end: Optional[int]
+    token_count: int
+    content_hash: str
+
+def chunk_text(text: str, paged: bool = False, max_tokens: int | None = None, overlap_tokens: int | None = None) -> List[TextChunk]:
+    """
+    Splits text into overlapping, token-bounded chunks with character offsets and, for
+    paged text, 1-based page numbers. Boundaries are content-defined, so an edit only
+    changes the chunks around it.
+    """
+    max_tokens = max_tokens or CHUNK_TOKENS
+    overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+    page_breaks = [m.start() for m in re.finditer(PAGE_BREAK, text)] if paged else []
+
+    chunks = []
+    for index, (start, end) in enumerate(overlapping_spans(text, max_tokens, overlap_tokens)):
+        content = text[start:end]
+        chunks.append(TextChunk(
+            index=index,
+            content=content,
+            start=start,
+            end=end,
+            page_start=bisect.bisect_right(page_breaks, start) + 1 if paged else None,
+            page_end=bisect.bisect_right(page_breaks, end - 1) + 1 if paged else None,
+            token_count=estimate_tokens(content),
+            content_hash=hashlib.sha256(content.encode("utf-8")).hexdigest(),
+        ))
+    return chunks
+
+def sync_chunks(session: Session, resource: Resource) -> int:
+    """
+    Brings the resource's chunk rows in line with its raw_content, without committing.
+    Rows whose text is unchanged are kept (and only renumbered), so anything derived
+    from them survives re-ingestion. Returns the number of chunks written or rewritten.
+    """
+    existing = session.exec(select(ResourceChunk).where(ResourceChunk.resource_id == resource.id)).all()
+    reusable = {}
+    for row in existing:
+        reusable.setdefault(row.content_hash, []).append(row)
+
+    written = 0
+    for chunk in chunk_text(resource.raw_content or "", paged=resource.type == ResourceType.PDF):
+        rows = reusable.get(chunk.content_hash)
+        row = rows.pop() if rows else None
+        if row is None:
+            row = ResourceChunk(resource_id=resource.id, content=chunk.content, content_hash=chunk.content_hash,
+                                chunk_index=chunk.index, start_offset=chunk.start, end_offset=chunk.end,
+                                token_count=chunk.token_count)
+            written += 1
+        row.chunk_index = chunk.index
+        row.start_offset, row.end_offset = chunk.start, chunk.end
+        row.page_start, row.page_end = chunk.page_start, chunk.page_end
+        session.add(row)
+
+    for rows in reusable.values():
+        for row in rows:
+            session.delete(row)
+    return written
@@ -0,0 +1,187 @@
+import os
+import json
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.models import Job, JobStatus
+
+# A handler gets its own session and the claimed job; it may commit progress as it goes.
+JobHandler = Callable[[Session, Job], Awaitable[None]]
+FailureHandler = Callable[[Session, Job], None]
+
+
+def due_jobs(now: datetime, limit: int = 5):
+    """
+    Queued jobs whose run_after has passed, longest due first (served by ix_job_status_run_after).
+    """
+    return (
+        select(Job.id)
+        .where(Job.status == JobStatus.QUEUED, Job.run_after <= now)
+        .order_by(Job.run_after)
+        .limit(limit)
+    )
+
+
+class JobQueue:
+    """
+    Durable job queue stored in the application database, drained by a small pool of
+    in-process workers. Jobs left running by a previous process are requeued at start,
+    and failed jobs are retried with exponential backoff up to max_attempts.
+    """
+    def __init__(self, workers: int = 2, poll_interval: float = 1.0, retry_base_delay: float = 5.0):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retry_base_delay = retry_base_delay
+        self.engine: Engine | None = None
+        self._handlers: Dict[str, JobHandler] = {}
+        self._on_failure: Dict[str, FailureHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wake: asyncio.Event | None = None
+
+    def handler(self, kind: str, on_failure: Optional[FailureHandler] = None):
+        def register(fn: JobHandler) -> JobHandler:
+            self._handlers[kind] = fn
+            if on_failure is not None:
+                self._on_failure[kind] = on_failure
+            return fn
+        return register
+
+    def enqueue(
+        self,
+        session: Session,
+        kind: str,
+        resource_id: uuid.UUID | None = None,
+        payload: Dict[str, Any] | None = None,
+        max_attempts: int = 3,
+    ) -> Job:
+        """
+        Adds a job to the caller's session; it becomes visible to workers when the caller commits.
+        """
+        job = Job(
+            kind=kind,
+            resource_id=resource_id,
+            payload=json.dumps(payload or {}),
+            max_attempts=max_attempts,
+            stage="queued",
+        )
+        session.add(job)
+        return job
+
+    def notify(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def _engine(self) -> Engine:
+        if self.engine is None:
+            from app.database import engine
+            self.engine = engine
+        return self.engine
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        self.recover()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def recover(self) -> int:
+        """
+        Requeues jobs that were running when the previous process stopped.
+        """
+        with Session(self._engine()) as session:
+            result = session.execute(
+                update(Job)
+                .where(Job.status == JobStatus.RUNNING)
+                .values(status=JobStatus.QUEUED, updated_at=datetime.utcnow())
+            )
+            session.commit()
+            return result.rowcount
+
+    def claim(self) -> Optional[uuid.UUID]:
+        now = datetime.utcnow()
+        with Session(self._engine()) as session:
+            candidates = session.exec(due_jobs(now)).all()
+            for job_id in candidates:
+                # Conditional update, so two workers never run the same job
+                result = session.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+                    .values(status=JobStatus.RUNNING, attempts=Job.attempts + 1, updated_at=now)
+                )
+                session.commit()
+                if result.rowcount:
+                    return job_id
+        return None
+
+    async def run_job(self, job_id: uuid.UUID):
+        with Session(self._engine()) as session:
+            job = session.get(Job, job_id)
+            try:
+                handler = self._handlers.get(job.kind)
+                if handler is None:
+                    raise ValueError(f"No handler for job kind '{job.kind}'")
+                await handler(session, job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}: {e}")
+                session.rollback()
+                job = session.get(Job, job_id)
+                job.error = str(e)
+                if job.attempts < job.max_attempts:
+                    job.status = JobStatus.QUEUED
+                    job.run_after = datetime.utcnow() + timedelta(
+                        seconds=self.retry_base_delay * 2 ** (job.attempts - 1)
+                    )
+                else:
+                    job.status = JobStatus.FAILED
+                    on_failure = self._on_failure.get(job.kind)
+                    if on_failure is not None:
+                        on_failure(session, job)
+            else:
+                job.status = JobStatus.SUCCEEDED
+                job.stage = "done"
+                job.error = None
+            job.updated_at = datetime.utcnow()
+            session.add(job)
+            session.commit()
+
+    async def run_until_idle(self):
+        """
+        Runs every job that is currently due, in this task. Used by tests and scripts.
+        """
+        while (job_id := self.claim()) is not None:
+            await self.run_job(job_id)
+
+    async def _worker(self):
+        while True:
+            try:
+                job_id = self.claim()
+            except Exception as e:
+                print(f"Job queue poll failed: {e}")
+                job_id = None
+            if job_id is not None:
+                await self.run_job(job_id)
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+job_queue = JobQueue(
+    workers=int(os.environ.get("JOB_WORKERS", "2")),
+    poll_interval=float(os.environ.get("JOB_POLL_SECONDS", "1")),
+    retry_base_delay=float(os.environ.get("JOB_RETRY_BASE_SECONDS", "5")),
+)
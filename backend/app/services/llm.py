@@ -1,186 +1,281 @@
 import os
 import json
-import google.generativeai as genai
-from typing import List, Dict, Any
-from app.prompts import syllabus_prompt, summary_prompt, elaboration_prompt, chat_prompt, concepts_prompt, activities_prompt
+import time
+import asyncio
+from contextlib import AsyncExitStack, aclosing
+from typing import List, Dict, Any, Callable, AsyncIterator
+from app import metrics
+from app.prompts import syllabus_prompt, summary_prompt, elaboration_prompt, chat_prompt, concepts_prompt, activities_prompt, chunk_summary_prompt, combine_summaries_prompt
+from app.services.scheduler import scheduler
+from app.services.llm_cache import llm_cache, LLM_CACHE_ENABLED
+from app.services.model_catalog import ModelCatalog
+from app.services.chunking import split_text, estimate_tokens
+from app.services.resilience import resilience, LLMError
+from app.services.providers import LLMProvider, GenerationRequest, GenerationResult, get_provider
 
-# Configure the API key
-API_KEY = os.environ.get("GEMINI_API_KEY")
-if API_KEY:
-    genai.configure(api_key=API_KEY)
+JSON_CONFIG = {"response_mime_type": "application/json"}
+
+# Map-reduce summarization: max estimated tokens per chunk, and chunk summaries in flight per document
+SUMMARY_CHUNK_TOKENS = int(os.environ.get("SUMMARY_CHUNK_TOKENS", "4000"))
+SUMMARY_PARALLELISM = int(os.environ.get("SUMMARY_PARALLELISM", "4"))
+
+model_catalog = ModelCatalog(
+    ttl_seconds=float(os.environ.get("MODEL_CATALOG_TTL_SECONDS", "600")),
+    failure_backoff_seconds=float(os.environ.get("MODEL_CATALOG_RETRY_SECONDS", "30")),
+)
+
+# One provider per process, selected by LLM_PROVIDER (see app.services.providers).
+default_provider = get_provider()
 
 class LLMService:
-    def __init__(self):
-        self.default_model = 'gemini-1.5-flash'
+    def __init__(self, provider: LLMProvider | None = None):
+        self.provider = provider or default_provider
+        self.default_model = self.provider.default_model
+
+    async def _call_provider(self, name: str, fn: Callable[[], Any]) -> Any:
+        """
+        Remote providers go through the resilience layer (rate limit, retries,
+        circuit breaker); local ones are called directly.
+        """
+        if self.provider.remote:
+            return await resilience.call(name, fn)
+        return await fn()
+
+    def _use_cache(self) -> bool:
+        return LLM_CACHE_ENABLED and self.provider.cacheable
 
-    def get_model(self, model_name: str | None = None):
+    def _cache_key(self, name: str, prompt: str, generation_config: Dict[str, Any] | None) -> str:
+        # The provider is part of the key so mock/stand-in output never answers for a real model.
+        return llm_cache.make_key(f"{self.provider.name}:{name}", prompt, generation_config)
+
+    async def _generate(self, prompt: str, model_name: str | None = None, generation_config: Dict[str, Any] | None = None, parse: Callable[[str], Any] | None = None, use_cache: bool = True, prompt_type: str = "generic", params: Dict[str, Any] | None = None) -> Any:
+        """
+        Runs a single generation through the configured provider and returns the text
+        (or parse(text) when a parser is given).
+        Responses are cached by (provider, model, prompt, generation config); use_cache=False
+        skips the lookup and forces a fresh call, whose result then replaces the cached one.
+        The call waits for a scheduler slot so in-flight requests stay bounded, and goes
+        through the resilience layer (rate limit, retries, circuit breaker), which raises
+        LLMRateLimitedError / LLMUnavailableError when the provider can't serve it.
+        """
         name = model_name or self.default_model
-        return genai.GenerativeModel(name)
+        labels = {"model": name, "prompt_type": prompt_type}
+        key = self._cache_key(name, prompt, generation_config)
+        if use_cache and self._use_cache():
+            cached = await llm_cache.aget(key)
+            if cached is not None:
+                metrics.LLM_REQUESTS.inc(status="cache_hit", **labels)
+                return parse(cached) if parse else cached
+
+        request = GenerationRequest(model=name, prompt=prompt, prompt_type=prompt_type, generation_config=generation_config, params=params or {})
+
+        async def call() -> GenerationResult:
+            async with scheduler.slot(name):
+                return await self.provider.generate(request)
+
+        start = time.perf_counter()
+        try:
+            result = await self._call_provider(name, call)
+        except Exception:
+            metrics.LLM_REQUESTS.inc(status="error", **labels)
+            raise
+        metrics.LLM_REQUEST_DURATION.observe(time.perf_counter() - start, **labels)
+        metrics.LLM_REQUESTS.inc(status="ok", **labels)
+        self._record_usage(result.prompt_tokens, result.completion_tokens, labels)
+        # Parse before storing so malformed output is never served from the cache.
+        parsed = parse(result.text) if parse else result.text
+        if self._use_cache():
+            await llm_cache.aset(key, result.text, model_name=name)
+        return parsed
+
+    async def _stream(self, prompt: str, model_name: str | None = None, use_cache: bool = True, prompt_type: str = "generic", params: Dict[str, Any] | None = None) -> AsyncIterator[str]:
+        """
+        Streams a generation chunk by chunk. The scheduler slot is taken once the
+        resilience layer lets the call through and held until the stream is exhausted;
+        the assembled text is cached like a regular call, and a cache hit is replayed
+        as a single chunk.
+        """
+        name = model_name or self.default_model
+        labels = {"model": name, "prompt_type": prompt_type}
+        key = self._cache_key(name, prompt, None)
+        if use_cache and self._use_cache():
+            cached = await llm_cache.aget(key)
+            if cached is not None:
+                metrics.LLM_REQUESTS.inc(status="cache_hit", **labels)
+                yield cached
+                return
+
+        request = GenerationRequest(model=name, prompt=prompt, prompt_type=prompt_type, params=params or {})
+
+        async def open_stream():
+            # Opening the stream means getting its first chunk; only this part is retried,
+            # a failure mid-answer surfaces to the caller. The slot is taken per attempt,
+            # like _generate's, so rate-limit waits and backoff don't hold one; it stays
+            # held once the stream is open. Leaving `held` also closes the provider's
+            # stream, so a caller that stops early (a disconnected client) releases it.
+            held = AsyncExitStack()
+            await held.enter_async_context(scheduler.slot(name))
+            try:
+                stream = await held.enter_async_context(aclosing(self.provider.stream(request)))
+                return held, stream, await anext(stream, None)
+            except BaseException:
+                await held.aclose()
+                raise
+
+        parts = []
+        start = time.perf_counter()
+        try:
+            held, stream, first = await self._call_provider(name, open_stream)
+            async with held:
+                if first is not None:
+                    parts.append(first)
+                    yield first
+                    async for chunk in stream:
+                        parts.append(chunk)
+                        yield chunk
+        except Exception:
+            metrics.LLM_REQUESTS.inc(status="error", **labels)
+            raise
+        text = "".join(parts)
+        metrics.LLM_REQUEST_DURATION.observe(time.perf_counter() - start, **labels)
+        metrics.LLM_REQUESTS.inc(status="ok", **labels)
+        self._record_usage(estimate_tokens(prompt), estimate_tokens(text), labels)
+        if self._use_cache():
+            await llm_cache.aset(key, text, model_name=name)
+
+    def _record_usage(self, prompt_tokens: int, completion_tokens: int, labels: Dict[str, str]):
+        metrics.LLM_TOKENS.inc(prompt_tokens, direction="prompt", **labels)
+        metrics.LLM_TOKENS.inc(completion_tokens, direction="completion", **labels)
 
     async def list_models(self) -> List[Dict[str, str]]:
         """
         Lists available models that support content generation.
+        Served from the model catalog cache; a stale list is refreshed in the background.
         """
-        if not API_KEY:
-            return [{"name": "mock-model", "display_name": "Mock Model (No API Key)"}]
-        
-        try:
-            models = []
-            for m in genai.list_models():
-                if 'generateContent' in m.supported_generation_methods:
-                    models.append({
-                        "name": m.name,
-                        "display_name": m.display_name
-                    })
-            return models
-        except Exception as e:
-            print(f"Error listing models: {e}")
-            return []
+        return await model_catalog.get(self._load_models)
 
-    async def generate_syllabus(self, topic: str, model_name: str | None = None) -> Dict[str, Any]:
+    def warm_models(self) -> asyncio.Task:
         """
-        Generates a hierarchical syllabus for a given topic using Gemini.
-        Returns a JSON dictionary representing the tree.
+        Starts loading the model catalog in the background (called at startup).
         """
-        if not API_KEY:
-             # Fallback mock for when no key is present (useful for testing/dev without credentials)
-            return self._mock_syllabus(topic)
+        return model_catalog.schedule_refresh(self._load_models)
+
+    async def _load_models(self) -> List[Dict[str, str]]:
+        # Retried and circuit-broken like generation calls, so an unreachable server fails the same way
+        return await self._call_provider("list_models", self.provider.list_models)
 
+    async def generate_syllabus(self, topic: str, model_name: str | None = None, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Generates a hierarchical syllabus for a given topic using the configured provider.
+        Returns a JSON dictionary representing the tree.
+        """
         prompt = syllabus_prompt(topic)
 
         try:
-            model = self.get_model(model_name)
-            response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-            return json.loads(response.text)
+            return await self._generate(prompt, model_name, generation_config=JSON_CONFIG, parse=json.loads, use_cache=use_cache, prompt_type="syllabus", params={"topic": topic})
         except Exception as e:
             print(f"Error generating syllabus with {model_name or self.default_model}: {e}")
             raise e
 
-    def _mock_syllabus(self, topic: str) -> Dict[str, Any]:
-        # ... (keep existing mock code)
-        return {
-            "title": topic,
-            "description": f"Mock syllabus for {topic} (No API Key found)",
-            "subtopics": [
-                {
-                    "title": "Fundamentals",
-                    "description": "Basic concepts.",
-                    "subtopics": [
-                        {"title": "History", "description": "Origins."},
-                        {"title": "Core Theory", "description": "How it works."}
-                    ]
-                },
-                {
-                    "title": "Advanced Application",
-                    "description": "Moving forward.",
-                    "subtopics": [
-                        {"title": "Case Studies", "description": "Real world examples."}
-                    ]
-                }
-            ]
-        }
-
-    async def summarize_text(self, text: str, model_name: str | None = None) -> str:
+    async def summarize_text(self, text: str, model_name: str | None = None, use_cache: bool = True) -> str:
         """
         Summarizes the provided text into key concepts.
+        Text larger than one chunk is summarized map-reduce style: chunk notes are
+        generated concurrently, then combined. Chunk notes go through the LLM cache,
+        so re-summarizing an edited document only regenerates the chunks that changed.
         """
-        if not API_KEY:
-            return "Mock summary: Key concepts include X, Y, and Z. (No API Key)"
-            
-        prompt = summary_prompt(text)
-        
         try:
-            model = self.get_model(model_name)
-            response = model.generate_content(prompt)
-            return response.text
+            chunks = split_text(text, max_tokens=SUMMARY_CHUNK_TOKENS)
+            if len(chunks) <= 1:
+                return await self._generate(summary_prompt(text), model_name, use_cache=use_cache, prompt_type="summary")
+
+            notes = await self._map_summaries(chunks, model_name, use_cache)
+            # Reduce: keep folding groups of notes until they fit in one combine prompt.
+            while estimate_tokens("".join(notes)) > SUMMARY_CHUNK_TOKENS and len(notes) > 1:
+                notes = await self._map_summaries(self._group_notes(notes), model_name, use_cache)
+            return await self._generate(combine_summaries_prompt(notes), model_name, use_cache=use_cache, prompt_type="summary_combine")
         except Exception as e:
             print(f"Error summarizing text: {e}")
-            return "Error generating summary."
+            raise e
+
+    async def _map_summaries(self, chunks: List[str], model_name: str | None, use_cache: bool) -> List[str]:
+        """
+        Summarizes chunks concurrently, at most SUMMARY_PARALLELISM at a time per document.
+        """
+        limit = asyncio.Semaphore(SUMMARY_PARALLELISM)
 
-    async def elaborate_topic(self, topic_title: str, current_description: str, instruction: str = "", model_name: str | None = None) -> Dict[str, Any]:
+        async def summarize_chunk(chunk: str) -> str:
+            async with limit:
+                return await self._generate(chunk_summary_prompt(chunk), model_name, use_cache=use_cache, prompt_type="summary_chunk")
+
+        return await asyncio.gather(*[summarize_chunk(c) for c in chunks])
+
+    def _group_notes(self, notes: List[str]) -> List[str]:
+        groups, current = [], []
+        for note in notes:
+            if current and estimate_tokens("".join(current) + note) > SUMMARY_CHUNK_TOKENS:
+                groups.append("\n\n".join(current))
+                current = []
+            current.append(note)
+        if current:
+            groups.append("\n\n".join(current))
+        # Always make progress, even if every note is individually large.
+        if len(groups) == len(notes):
+            groups = ["\n\n".join(notes[i:i + 2]) for i in range(0, len(notes), 2)]
+        return groups
+
+    async def elaborate_topic(self, topic_title: str, current_description: str, instruction: str = "", model_name: str | None = None, use_cache: bool = True, sources: str = "") -> Dict[str, Any]:
         """
         Generates a detailed expansion of a topic, including better description, 
-        sub-topics, and external resources.
-        """
-        if not API_KEY:
-            return {
-                "description": f"Mock elaborated description for {topic_title}.",
-                "concepts": [
-                    {
-                        "title": "Mock Concept 1",
-                        "description": "A fundamental mock concept.",
-                        "activities": [
-                            {"type": "read", "instructions": "Read this mock text.", "content": "Mock reading content."},
-                            {"type": "quiz", "instructions": "Take this mock quiz.", "content": {"question": "Is this a mock?", "options": ["Yes", "No"], "correct": "Yes"}}
-                        ]
-                    }
-                ],
-                "subtopics": [{"title": "Mock Subtopic", "description": "Mock desc"}],
-                "resources": [{"title": "Mock Wiki", "url": "http://example.com", "type": "url"}]
-            }
-
-        prompt = elaboration_prompt(topic_title, current_description, instruction)
+        sub-topics, and external resources. sources are retrieved passages to ground it in.
+        """
+        prompt = elaboration_prompt(topic_title, current_description, instruction, sources)
 
         try:
-            model = self.get_model(model_name)
-            response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-            return json.loads(response.text)
+            return await self._generate(prompt, model_name, generation_config=JSON_CONFIG, parse=json.loads, use_cache=use_cache, prompt_type="elaboration", params={"topic_title": topic_title})
         except Exception as e:
             print(f"Error elaborating topic: {e}")
             raise e
 
-    async def chat_with_topic(self, topic_title: str, context: str, question: str, model_name: str | None = None) -> str:
+    async def chat_with_topic(self, topic_title: str, context: str, question: str, model_name: str | None = None, use_cache: bool = True, sources: str = "") -> str:
         """
-        Answers a user question based on the topic context.
+        Answers a user question based on the topic context and any retrieved sources.
         """
-        if not API_KEY:
-            return f"Mock answer to '{question}' regarding {topic_title}."
-
-        prompt = chat_prompt(topic_title, context, question)
+        prompt = chat_prompt(topic_title, context, question, sources)
         
         try:
-            model = self.get_model(model_name)
-            response = model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"Error answering question: {e}"
+            return await self._generate(prompt, model_name, use_cache=use_cache, prompt_type="chat", params={"topic_title": topic_title, "question": question})
+        except LLMError:
+            raise
         except Exception as e:
             return f"Error answering question: {e}"
 
-    async def generate_concepts(self, topic_title: str, description: str, model_name: str | None = None) -> List[Dict[str, Any]]:
+    async def stream_chat_with_topic(self, topic_title: str, context: str, question: str, model_name: str | None = None, use_cache: bool = True, sources: str = "") -> AsyncIterator[str]:
         """
-        Generates a list of concepts for a topic.
+        Same as chat_with_topic, but yields the answer incrementally as the model produces it.
         """
-        if not API_KEY:
-            return [
-                {"title": "Mock Concept A", "description": "Desc A", "order_index": 1},
-                {"title": "Mock Concept B", "description": "Desc B", "order_index": 2}
-            ]
+        prompt = chat_prompt(topic_title, context, question, sources)
+        async for token in self._stream(prompt, model_name, use_cache=use_cache, prompt_type="chat", params={"topic_title": topic_title, "question": question}):
+            yield token
 
+    async def generate_concepts(self, topic_title: str, description: str, model_name: str | None = None, use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Generates a list of concepts for a topic.
+        """
         prompt = concepts_prompt(topic_title, description)
         try:
-            model = self.get_model(model_name)
-            response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-            return json.loads(response.text)
+            return await self._generate(prompt, model_name, generation_config=JSON_CONFIG, parse=json.loads, use_cache=use_cache, prompt_type="concepts", params={"topic_title": topic_title})
         except Exception as e:
             print(f"Error generating concepts: {e}")
             raise e
 
-    async def generate_activities(self, concept_title: str, context: str, model_name: str | None = None) -> List[Dict[str, Any]]:
+    async def generate_activities(self, concept_title: str, context: str, model_name: str | None = None, use_cache: bool = True) -> List[Dict[str, Any]]:
         """
         Generates a list of activities for a concept.
         """
-        if not API_KEY:
-             return [
-                {"type": "read", "instructions": "Read Mock", "content": "Mock Content", "status": "pending"},
-                {"type": "quiz", "instructions": "Quiz Mock", "content": {"question":"?"}, "status": "pending"}
-            ]
-        
         prompt = activities_prompt(concept_title, context)
         try:
-            model = self.get_model(model_name)
-            response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
-            return json.loads(response.text)
+            return await self._generate(prompt, model_name, generation_config=JSON_CONFIG, parse=json.loads, use_cache=use_cache, prompt_type="activities", params={"concept_title": concept_title})
         except Exception as e:
             print(f"Error generating activities: {e}")
             raise e
@@ -0,0 +1,188 @@
+import os
+import json
+import asyncio
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app import metrics
+from app.database import DB_PROFILE, DB_PROFILES, apply_sqlite_pragmas
+
+
+class LLMCache:
+    """
+    Content-addressed cache for LLM responses.
+    A small in-memory LRU sits in front of a persistent SQLite table, so repeat
+    prompts survive restarts and hot ones never touch the disk.
+    Async callers use aget/aset, which run the SQLite tier in a worker thread so a
+    disk lookup never blocks the event loop. A disk hit only rewrites accessed_at
+    (the LRU order for pruning) when the stored one is older than touch_interval.
+    """
+    def __init__(
+        self,
+        path: str = "llm_cache.db",
+        ttl_seconds: float = 7 * 24 * 3600,
+        memory_entries: int = 256,
+        max_disk_entries: int = 10000,
+        touch_interval: float = 3600,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock() # Memory tier and counters
+        self._db_lock = threading.Lock() # SQLite connection
+        self._conn: sqlite3.Connection | None = None
+        self._writes_since_prune = 0
+
+    @staticmethod
+    def make_key(model_name: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps(
+            {"model": model_name, "prompt": prompt, "config": generation_config or {}},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened lazily so importing the service never creates a file.
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            apply_sqlite_pragmas(self._conn, DB_PROFILES[DB_PROFILE])
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, model TEXT, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _get_memory(self, key: str, now: float) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            self.hits += 1
+            self.memory_hits += 1
+        metrics.CACHE_LOOKUPS.inc(cache="llm", tier="memory", result="hit")
+        return value
+
+    def _get_disk(self, key: str, now: float) -> Optional[str]:
+        with self._db_lock:
+            db = self._db()
+            row = db.execute("SELECT value, expires_at, accessed_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            # Expired rows are left for _prune
+            if row is None or row[1] <= now:
+                with self._lock:
+                    self.misses += 1
+                metrics.CACHE_LOOKUPS.inc(cache="llm", tier="disk", result="miss")
+                return None
+            value, expires_at, accessed_at = row
+            if now - accessed_at >= self.touch_interval:
+                db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                db.commit()
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.hits += 1
+        metrics.CACHE_LOOKUPS.inc(cache="llm", tier="disk", result="hit")
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._get_memory(key, now)
+        return value if value is not None else self._get_disk(key, now)
+
+    async def aget(self, key: str) -> Optional[str]:
+        now = time.time()
+        value = self._get_memory(key, now)
+        return value if value is not None else await asyncio.to_thread(self._get_disk, key, now)
+
+    def _set_disk(self, key: str, value: str, model_name: str | None, expires_at: float, now: float):
+        with self._db_lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model_name, value, expires_at, now),
+            )
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= 100:
+                self._prune(db, now)
+            db.commit()
+
+    def set(self, key: str, value: str, model_name: str | None = None):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+        self._set_disk(key, value, model_name, expires_at, now)
+
+    async def aset(self, key: str, value: str, model_name: str | None = None):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+        await asyncio.to_thread(self._set_disk, key, value, model_name, expires_at, now)
+
+    def _prune(self, db: sqlite3.Connection, now: float):
+        """
+        Drops expired rows, then the least recently used rows beyond max_disk_entries.
+        """
+        self._writes_since_prune = 0
+        db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        db.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def prune(self):
+        with self._db_lock:
+            db = self._db()
+            self._prune(db, time.time())
+            db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        with self._db_lock:
+            db = self._db()
+            db.execute("DELETE FROM llm_cache")
+            db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+
+llm_cache = LLMCache(
+    path=os.environ.get("LLM_CACHE_PATH", "llm_cache.db"),
+    ttl_seconds=float(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    memory_entries=int(os.environ.get("LLM_CACHE_MEMORY_ENTRIES", "256")),
+    max_disk_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "10000")),
+)
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") != "0"
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+Loader = Callable[[], Awaitable[List[Dict[str, Any]]]]
+
+
+class ModelCatalog:
+    """
+    TTL cache for the provider's model list with stale-while-revalidate semantics:
+    a stale list is returned immediately while a single background task refreshes it,
+    and a failed refresh keeps serving the last list that loaded successfully.
+    After a failure no refresh starts for failure_backoff_seconds, so a provider
+    outage costs one upstream call per backoff period, not one per request.
+    """
+    def __init__(self, ttl_seconds: float = 600, failure_backoff_seconds: float = 30):
+        self.ttl_seconds = ttl_seconds
+        self.failure_backoff_seconds = failure_backoff_seconds
+        self._models: Optional[List[Dict[str, Any]]] = None
+        self._fetched_at = 0.0
+        self._failed_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.last_error: Optional[str] = None
+
+    def _backing_off(self) -> bool:
+        return self._failed_at is not None and time.monotonic() - self._failed_at < self.failure_backoff_seconds
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._fetched_at > self.ttl_seconds and not self._backing_off()
+
+    async def get(self, loader: Loader) -> List[Dict[str, Any]]:
+        if self._models is None:
+            # Nothing to serve yet: wait for the (shared) first load, unless it just failed.
+            if not self._backing_off():
+                await asyncio.shield(self.schedule_refresh(loader))
+            return self._models or []
+        if self.is_stale():
+            self.schedule_refresh(loader)
+        return self._models
+
+    def schedule_refresh(self, loader: Loader) -> asyncio.Task:
+        """
+        Starts a background refresh unless one is already running, and returns its task.
+        """
+        task = self._refresh_task
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._refresh(loader))
+            self._refresh_task = task
+        return task
+
+    async def _refresh(self, loader: Loader):
+        try:
+            models = await loader()
+        except Exception as e:
+            self.last_error = str(e)
+            self._failed_at = time.monotonic()
+            print(f"Error refreshing model catalog (serving last known list): {e}")
+            return
+        self._models = models
+        self._fetched_at = time.monotonic()
+        self._failed_at = None
+        self.last_error = None
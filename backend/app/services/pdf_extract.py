@@ -0,0 +1,33 @@
+# Worker-side PDF parsing. Kept free of app imports so process-pool workers start cheaply.
+import io
+import mmap
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple, Union
+
+from pypdf import PdfReader
+
+# Raw bytes, or the path of a stored file (memory-mapped, so workers never copy it)
+PDFSource = Union[bytes, str]
+
+
+@contextmanager
+def open_pdf(source: PDFSource) -> Iterator[PdfReader]:
+    if isinstance(source, bytes):
+        yield PdfReader(io.BytesIO(source))
+        return
+    with open(source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        yield PdfReader(mapped)
+
+
+def page_ranges(page_count: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    return [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+
+def count_pages(source: PDFSource) -> int:
+    with open_pdf(source) as reader:
+        return len(reader.pages)
+
+
+def extract_page_range(source: PDFSource, start: int, stop: int) -> List[str]:
+    with open_pdf(source) as reader:
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
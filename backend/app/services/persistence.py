@@ -0,0 +1,66 @@
+from typing import Dict, Iterable, List, Optional
+import uuid
+
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel, select
+
+from app.models import ActivityType, Topic
+
+
+def bulk_insert(session: Session, objects: Iterable[SQLModel]) -> int:
+    """
+    Inserts freshly built model objects with one executemany per table, in the order
+    their types first appear (so parents go before children). Ids and timestamps are
+    generated client-side, so the objects are already complete: nothing is refreshed
+    and they stay detached from the session. The caller commits.
+    """
+    by_model: Dict[type, List[SQLModel]] = {}
+    for obj in objects:
+        by_model.setdefault(type(obj), []).append(obj)
+
+    for model, rows in by_model.items():
+        table = model.__table__
+        columns = [c.key for c in table.columns]
+        # Core insert on the session's connection: one executemany, no ORM per-row grouping
+        session.connection().execute(insert(table), [{c: getattr(row, c) for c in columns} for row in rows])
+    return sum(len(rows) for rows in by_model.values())
+
+
+def load_in_order(session: Session, model: type, ids: List[uuid.UUID]) -> list:
+    """
+    Reads rows by id through session, in the order of ids. Attributes are refreshed
+    from the database even for instances the session already holds.
+    """
+    statement = select(model).where(model.id.in_(ids)).execution_options(populate_existing=True)
+    by_id = {row.id: row for row in session.exec(statement)}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def activity_type(value) -> ActivityType:
+    """
+    The ActivityType for an LLM-supplied type name. Models sometimes invent types
+    ("exercise", "Quiz "); unknown ones become READ instead of failing the generation.
+    """
+    name = str(value or "").strip().lower()
+    return ActivityType._value2member_map_.get(name, ActivityType.READ)
+
+
+def build_topic_tree(data: dict, parent_id: Optional[uuid.UUID] = None, order: int = 0) -> List[Topic]:
+    """
+    Builds the Topic rows for a generated syllabus ({"title", "description", "subtopics": [...]})
+    in memory, parents before children. The first element is the root.
+    """
+    topics: List[Topic] = []
+    stack = [(data, parent_id, order)]
+    while stack:
+        node, parent, index = stack.pop()
+        topic = Topic(
+            title=node["title"],
+            description=node.get("description", ""),
+            parent_id=parent,
+            order_index=index,
+        )
+        topics.append(topic)
+        children = node.get("subtopics", [])
+        stack.extend((child, topic.id, i) for i, child in reversed(list(enumerate(children))))
+    return topics
@@ -0,0 +1,28 @@
+import os
+
+from app.services.providers.base import LLMProvider, GenerationRequest, GenerationResult, ProviderError
+from app.services.providers.mock import MockProvider
+
+
+def get_provider(name: str | None = None) -> LLMProvider:
+    """
+    Builds the provider selected by LLM_PROVIDER ("gemini", "mock" or "http").
+    Defaults to Gemini when GEMINI_API_KEY is set and to the mock otherwise.
+    """
+    api_key = os.environ.get("GEMINI_API_KEY")
+    name = name or os.environ.get("LLM_PROVIDER") or ("gemini" if api_key else "mock")
+
+    if name == "gemini":
+        from app.services.providers.gemini import GeminiProvider
+        return GeminiProvider(api_key=api_key)
+    if name == "http":
+        from app.services.providers.http import HTTPProvider
+        return HTTPProvider(
+            base_url=os.environ.get("LLM_STANDIN_URL", "http://127.0.0.1:8001"),
+            default_model=os.environ.get("LLM_STANDIN_MODEL", "standin-model"),
+            timeout=float(os.environ.get("LLM_HTTP_TIMEOUT", "120")),
+            cacheable=os.environ.get("LLM_HTTP_CACHE", "0") == "1",
+        )
+    if name == "mock":
+        return MockProvider()
+    raise ValueError(f"Unknown LLM_PROVIDER: {name}")
@@ -0,0 +1,63 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List
+
+
+@dataclass
+class GenerationRequest:
+    model: str
+    prompt: str
+    prompt_type: str = "generic"
+    generation_config: Dict[str, Any] | None = None
+    # The structured inputs the prompt was rendered from (topic title, question, ...).
+    # Real providers ignore them; the mock and stand-in use them to shape their output.
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class GenerationResult:
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class ProviderError(Exception):
+    """
+    A provider call failed with an HTTP-style status code. The resilience layer
+    reads `.code` to decide whether to retry (same convention as google.api_core errors).
+    """
+    def __init__(self, message: str, code: int | None = None):
+        super().__init__(message)
+        self.code = code
+
+
+class LLMProvider(ABC):
+    """
+    Interface every LLM backend implements. `remote` providers go through the
+    rate limiter/circuit breaker; `cacheable` ones have their responses cached.
+    Transport failures should surface as ConnectionError or ProviderError, which
+    the resilience layer knows how to retry.
+    """
+    name = "base"
+    default_model = ""
+    remote = True
+    cacheable = True
+
+    @abstractmethod
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        ...
+
+    async def stream(self, request: GenerationRequest) -> AsyncIterator[str]:
+        """
+        Yields text chunks. The default falls back to one non-streaming call.
+        """
+        result = await self.generate(request)
+        yield result.text
+
+    async def list_models(self) -> List[Dict[str, str]]:
+        return [{"name": self.default_model, "display_name": self.default_model}]
+
+    async def aclose(self):
+        """
+        Releases connections at shutdown. Providers that hold none need not override it.
+        """
@@ -0,0 +1,50 @@
+import asyncio
+from typing import AsyncIterator, Dict, List
+
+import google.generativeai as genai
+
+from app.services.providers.base import LLMProvider, GenerationRequest, GenerationResult
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+    default_model = "gemini-1.5-flash"
+
+    def __init__(self, api_key: str):
+        genai.configure(api_key=api_key)
+
+    def get_model(self, model_name: str):
+        return genai.GenerativeModel(model_name)
+
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        model = self.get_model(request.model)
+        response = await model.generate_content_async(request.prompt, generation_config=request.generation_config)
+        usage = getattr(response, "usage_metadata", None)
+        return GenerationResult(
+            text=response.text,
+            prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+            completion_tokens=getattr(usage, "candidates_token_count", 0) or 0,
+        )
+
+    async def stream(self, request: GenerationRequest) -> AsyncIterator[str]:
+        model = self.get_model(request.model)
+        response = await model.generate_content_async(
+            request.prompt, generation_config=request.generation_config, stream=True
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    async def list_models(self) -> List[Dict[str, str]]:
+        # genai.list_models() is a blocking, paginated iterator; keep it off the event loop.
+        return await asyncio.to_thread(self._list_models_sync)
+
+    def _list_models_sync(self) -> List[Dict[str, str]]:
+        models = []
+        for m in genai.list_models():
+            if 'generateContent' in m.supported_generation_methods:
+                models.append({
+                    "name": m.name,
+                    "display_name": m.display_name
+                })
+        return models
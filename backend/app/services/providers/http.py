@@ -0,0 +1,93 @@
+import json
+import asyncio
+from typing import AsyncIterator, Dict, List
+
+import httpx
+
+from app.services.providers.base import LLMProvider, GenerationRequest, GenerationResult, ProviderError
+
+
+class HTTPProvider(LLMProvider):
+    """
+    Talks to an LLM over a small JSON/SSE protocol, e.g. the local stand-in server
+    (app.services.providers.standin_server) used for offline load testing.
+    Responses are not cached unless cacheable=True (LLM_HTTP_CACHE=1): a load test
+    repeats prompts, and cache hits would hide the stand-in's latency and failures.
+    """
+    name = "http"
+
+    def __init__(self, base_url: str, default_model: str = "standin-model", timeout: float = 120, cacheable: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.cacheable = cacheable
+        self.default_model = default_model
+        self.timeout = timeout
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def client(self) -> httpx.AsyncClient:
+        # A client's connection pool belongs to one event loop.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+            self._loop = loop
+        return self._client
+
+    def _body(self, request: GenerationRequest) -> Dict:
+        return {
+            "model": request.model,
+            "prompt": request.prompt,
+            "prompt_type": request.prompt_type,
+            "generation_config": request.generation_config,
+            "params": request.params,
+        }
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response):
+        if response.status_code >= 400:
+            raise ProviderError(f"LLM server returned {response.status_code}", code=response.status_code)
+
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        try:
+            response = await self.client().post("/v1/generate", json=self._body(request))
+        except httpx.TransportError as e:
+            raise ConnectionError(f"LLM server unreachable: {e}") from e
+        self._raise_for_status(response)
+        data = response.json()
+        return GenerationResult(
+            text=data["text"],
+            prompt_tokens=data.get("prompt_tokens", 0),
+            completion_tokens=data.get("completion_tokens", 0),
+        )
+
+    async def stream(self, request: GenerationRequest) -> AsyncIterator[str]:
+        try:
+            async with self.client().stream("POST", "/v1/stream", json=self._body(request)) as response:
+                self._raise_for_status(response)
+                event = "message"
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    elif line.startswith("data: "):
+                        payload = json.loads(line[len("data: "):])
+                        if event == "error":
+                            raise ProviderError(payload.get("detail", "stream failed"), code=payload.get("status", 503))
+                        if event == "done":
+                            return
+                        yield payload["token"]
+                    elif not line:
+                        event = "message"
+        except httpx.TransportError as e:
+            raise ConnectionError(f"LLM server unreachable: {e}") from e
+
+    async def list_models(self) -> List[Dict[str, str]]:
+        try:
+            response = await self.client().get("/v1/models")
+        except httpx.TransportError as e:
+            raise ConnectionError(f"LLM server unreachable: {e}") from e
+        self._raise_for_status(response)
+        return response.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,148 @@
+import json
+import random
+from typing import Any, AsyncIterator, Dict, List
+
+from app.services.providers.base import LLMProvider, GenerationRequest, GenerationResult
+from app.services.chunking import estimate_tokens
+
+JSON_PROMPT_TYPES = {"syllabus", "elaboration", "concepts", "activities"}
+
+WORDS = [
+    "foundations", "principles", "patterns", "models", "practice", "theory", "systems",
+    "methods", "analysis", "design", "history", "applications", "limits", "tools",
+]
+
+
+def _phrase(rng: random.Random | None, default: str) -> str:
+    if rng is None:
+        return default
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))).capitalize()
+
+
+def _count(rng: random.Random | None, default: int, low: int, high: int) -> int:
+    return default if rng is None else rng.randint(low, high)
+
+
+def mock_payload(prompt_type: str, params: Dict[str, Any], rng: random.Random | None = None) -> Any:
+    """
+    Builds a response of the right shape for each prompt type. Without `rng` the output
+    is a fixed canned answer; with a seeded `rng` it varies deterministically.
+    """
+    if prompt_type == "syllabus":
+        topic = params.get("topic", "Topic")
+        if rng is None:
+            return {
+                "title": topic,
+                "description": f"Mock syllabus for {topic} (Mock provider)",
+                "subtopics": [
+                    {
+                        "title": "Fundamentals",
+                        "description": "Basic concepts.",
+                        "subtopics": [
+                            {"title": "History", "description": "Origins."},
+                            {"title": "Core Theory", "description": "How it works."}
+                        ]
+                    },
+                    {
+                        "title": "Advanced Application",
+                        "description": "Moving forward.",
+                        "subtopics": [
+                            {"title": "Case Studies", "description": "Real world examples."}
+                        ]
+                    }
+                ]
+            }
+        return {
+            "title": topic,
+            "description": f"A high-leverage guide to {topic} built on first principles.",
+            "subtopics": [
+                {
+                    "title": _phrase(rng, ""),
+                    "description": _phrase(rng, ""),
+                    "subtopics": [
+                        {"title": _phrase(rng, ""), "description": _phrase(rng, ""), "subtopics": []}
+                        for _ in range(rng.randint(1, 4))
+                    ]
+                }
+                for _ in range(rng.randint(2, 6))
+            ]
+        }
+
+    if prompt_type == "elaboration":
+        topic_title = params.get("topic_title", "Topic")
+        return {
+            "description": f"Mock elaborated description for {topic_title}.",
+            "concepts": [
+                {
+                    "title": _phrase(rng, f"Mock Concept {i + 1}"),
+                    "description": "A fundamental mock concept.",
+                    "activities": [
+                        {"type": "read", "instructions": "Read this mock text.", "content": "Mock reading content."},
+                        {"type": "quiz", "instructions": "Take this mock quiz.", "content": {"question": "Is this a mock?", "options": ["Yes", "No"], "correct": "Yes"}}
+                    ]
+                }
+                for i in range(_count(rng, 1, 3, 5))
+            ],
+            "subtopics": [
+                {"title": _phrase(rng, "Mock Subtopic"), "description": "Mock desc"}
+                for _ in range(_count(rng, 1, 3, 5))
+            ],
+            "resources": [{"title": "Mock Wiki", "url": "http://example.com", "type": "url"}]
+        }
+
+    if prompt_type == "concepts":
+        return [
+            {"title": _phrase(rng, f"Mock Concept {chr(ord('A') + i)}"), "description": f"Desc {chr(ord('A') + i)}", "order_index": i + 1}
+            for i in range(_count(rng, 2, 3, 7))
+        ]
+
+    if prompt_type == "activities":
+        activities = [
+            {"type": "read", "instructions": "Read Mock", "content": "Mock Content", "status": "pending"},
+            {"type": "quiz", "instructions": "Quiz Mock", "content": {"question": "?"}, "status": "pending"}
+        ]
+        if rng is not None:
+            activities.append({"type": "project", "instructions": _phrase(rng, ""), "content": _phrase(rng, ""), "status": "pending"})
+        return activities
+
+    if prompt_type == "chat":
+        return f"Mock answer to '{params.get('question', '')}' regarding {params.get('topic_title', 'this topic')}."
+
+    if prompt_type.startswith("summary"):
+        if rng is None:
+            return "Mock summary: Key concepts include X, Y, and Z. (Mock provider)"
+        return "Mock summary: " + ". ".join(_phrase(rng, "") for _ in range(rng.randint(3, 8))) + "."
+
+    return "Mock response."
+
+
+def mock_text(prompt_type: str, params: Dict[str, Any], rng: random.Random | None = None) -> str:
+    payload = mock_payload(prompt_type, params, rng)
+    return json.dumps(payload) if prompt_type in JSON_PROMPT_TYPES else payload
+
+
+def split_tokens(text: str) -> List[str]:
+    words = text.split(" ")
+    return [w if i == 0 else f" {w}" for i, w in enumerate(words)]
+
+
+class MockProvider(LLMProvider):
+    """
+    Instant canned responses, used when no API key is configured (and in tests).
+    Responses are neither cached nor rate limited.
+    """
+    name = "mock"
+    default_model = "mock-model"
+    remote = False
+    cacheable = False
+
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        text = mock_text(request.prompt_type, request.params)
+        return GenerationResult(text=text, prompt_tokens=estimate_tokens(request.prompt), completion_tokens=estimate_tokens(text))
+
+    async def stream(self, request: GenerationRequest) -> AsyncIterator[str]:
+        for token in split_tokens(mock_text(request.prompt_type, request.params)):
+            yield token
+
+    async def list_models(self) -> List[Dict[str, str]]:
+        return [{"name": "mock-model", "display_name": "Mock Model (No API Key)"}]
@@ -0,0 +1,176 @@
+"""
+Local stand-in for the LLM provider, for load-testing the full stack offline.
+
+Serves the HTTPProvider protocol with deterministic, seeded outputs of the right
+shape for each prompt type, and realistic timing: a sampled time-to-first-token,
+per-token generation time, and configurable failure/rate-limit rates.
+
+    python -m app.services.providers.standin_server --port 8001 \\
+        --latency lognormal:0.8,0.5 --token-latency fixed:0.01 --failure-rate 0.02 --seed 7
+
+then run the API with LLM_PROVIDER=http LLM_STANDIN_URL=http://127.0.0.1:8001.
+"""
+import os
+import json
+import math
+import random
+import asyncio
+import argparse
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app.services.chunking import estimate_tokens
+from app.services.providers.mock import mock_text, split_tokens
+
+
+class LatencyDistribution:
+    """
+    Parses specs like "fixed:0.5", "uniform:0.2,1.5", "normal:1.0,0.3",
+    "lognormal:1.0,0.5" (median, sigma) or "exponential:1.0" (mean), in seconds.
+    """
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, spec: str):
+        kind, _, args = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        values = [float(v) for v in args.split(",") if v] if args else []
+        if len(values) != self.KINDS[kind]:
+            raise ValueError(f"{kind} latency takes {self.KINDS[kind]} parameter(s)")
+        self.kind = kind
+        self.values = values
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            value = self.values[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(*self.values)
+        elif self.kind == "normal":
+            value = rng.gauss(*self.values)
+        elif self.kind == "lognormal":
+            median, sigma = self.values
+            value = rng.lognormvariate(math.log(median), sigma)
+        else:
+            value = rng.expovariate(1 / self.values[0])
+        return max(0.0, value)
+
+
+@dataclass
+class StandinConfig:
+    seed: int = 0
+    latency: str = "lognormal:0.8,0.5"
+    token_latency: str = "fixed:0.005"
+    failure_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    models: tuple = ("standin-model",)
+
+    @classmethod
+    def from_env(cls) -> "StandinConfig":
+        return cls(
+            seed=int(os.environ.get("STANDIN_SEED", "0")),
+            latency=os.environ.get("STANDIN_LATENCY", "lognormal:0.8,0.5"),
+            token_latency=os.environ.get("STANDIN_TOKEN_LATENCY", "fixed:0.005"),
+            failure_rate=float(os.environ.get("STANDIN_FAILURE_RATE", "0")),
+            rate_limit_rate=float(os.environ.get("STANDIN_RATE_LIMIT_RATE", "0")),
+            models=tuple(os.environ.get("STANDIN_MODELS", "standin-model").split(",")),
+        )
+
+
+class StandinRequest(BaseModel):
+    model: str
+    prompt: str
+    prompt_type: str = "generic"
+    generation_config: Optional[Dict[str, Any]] = None
+    params: Dict[str, Any] = {}
+
+
+def create_app(config: StandinConfig | None = None) -> FastAPI:
+    config = config or StandinConfig.from_env()
+    latency = LatencyDistribution(config.latency)
+    token_latency = LatencyDistribution(config.token_latency)
+    # Timing and failures draw from one seeded stream, so a replayed load test
+    # sees the same sequence; content is seeded per prompt, so it never varies.
+    timing_rng = random.Random(config.seed)
+
+    app = FastAPI(title="Autodidact LLM stand-in")
+
+    def render(request: StandinRequest) -> str:
+        rng = random.Random(f"{config.seed}|{request.model}|{request.prompt_type}|{request.prompt}")
+        return mock_text(request.prompt_type, request.params, rng)
+
+    def injected_failure() -> JSONResponse | None:
+        roll = timing_rng.random()
+        if roll < config.rate_limit_rate:
+            return JSONResponse(status_code=429, content={"detail": "Stand-in quota exhausted"})
+        if roll < config.rate_limit_rate + config.failure_rate:
+            return JSONResponse(status_code=503, content={"detail": "Stand-in provider unavailable"})
+        return None
+
+    @app.get("/v1/models")
+    def list_models():
+        return [{"name": m, "display_name": f"Stand-in ({m})"} for m in config.models]
+
+    @app.post("/v1/generate")
+    async def generate(request: StandinRequest):
+        failure = injected_failure()
+        text = render(request)
+        completion_tokens = estimate_tokens(text)
+        delay = latency.sample(timing_rng) + sum(token_latency.sample(timing_rng) for _ in range(completion_tokens))
+        await asyncio.sleep(delay)
+        if failure is not None:
+            return failure
+        return {"text": text, "prompt_tokens": estimate_tokens(request.prompt), "completion_tokens": completion_tokens}
+
+    @app.post("/v1/stream")
+    async def stream(request: StandinRequest):
+        failure = injected_failure()
+        first_token_delay = latency.sample(timing_rng)
+        if failure is not None:
+            await asyncio.sleep(first_token_delay)
+            return failure
+        tokens = split_tokens(render(request))
+        delays = [token_latency.sample(timing_rng) for _ in tokens]
+
+        async def events():
+            await asyncio.sleep(first_token_delay)
+            for token, delay in zip(tokens, delays):
+                yield f"data: {json.dumps({'token': token})}\n\n"
+                await asyncio.sleep(delay)
+            yield "event: done\ndata: {}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local LLM stand-in server")
+    defaults = StandinConfig.from_env()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--latency", default=defaults.latency, help="time to first token, e.g. lognormal:0.8,0.5")
+    parser.add_argument("--token-latency", default=defaults.token_latency, help="time per generated token")
+    parser.add_argument("--failure-rate", type=float, default=defaults.failure_rate, help="share of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate, help="share of requests answered with 429")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = StandinConfig(
+        seed=args.seed,
+        latency=args.latency,
+        token_latency=args.token_latency,
+        failure_rate=args.failure_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        models=defaults.models,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import os
+import time
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from app import metrics
+from app.services.scheduler import parse_model_limits
+
+
+class LLMError(Exception):
+    """
+    Base class for provider failures that should reach the client as a structured
+    error instead of a generic 500. Carries the HTTP status and a retry hint.
+    """
+    status_code = 503
+
+    def __init__(self, detail: str, retry_after: float | None = None):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class LLMRateLimitedError(LLMError):
+    status_code = 429
+
+
+class LLMUnavailableError(LLMError):
+    status_code = 503
+
+
+# HTTP-style status codes (google.api_core errors expose them as `.code`) worth retrying.
+RATE_LIMIT_CODES = {429}
+TRANSIENT_CODES = {500, 502, 503, 504}
+
+
+def error_code(error: Exception) -> int | None:
+    code = getattr(error, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_rate_limit(error: Exception) -> bool:
+    return error_code(error) in RATE_LIMIT_CODES
+
+
+def is_retryable(error: Exception) -> bool:
+    return (
+        error_code(error) in RATE_LIMIT_CODES | TRANSIENT_CODES
+        or isinstance(error, (asyncio.TimeoutError, ConnectionError))
+    )
+
+
+class TokenBucket:
+    """
+    Client-side rate limiter. Tokens refill continuously at `rate_per_minute`, up to
+    `burst`. Callers that would have to wait longer than `max_wait` seconds are
+    rejected with LLMRateLimitedError rather than left hanging.
+    """
+    def __init__(self, rate_per_minute: float, burst: float, max_wait: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self.max_wait = max_wait
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return
+        wait = (1 - self.tokens) / self.rate
+        if wait > self.max_wait:
+            raise LLMRateLimitedError("LLM rate limit reached, try again later", retry_after=wait)
+        # Reserve the token now (the balance goes negative) so later callers queue behind us.
+        self.tokens -= 1
+        await asyncio.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Per-model breaker. After `failure_threshold` consecutive provider failures it opens
+    and fails fast for `reset_timeout` seconds, then lets one trial call through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def check(self):
+        if self.state == "open":
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                raise LLMUnavailableError("LLM provider unavailable (circuit open)", retry_after=remaining)
+            self.state = "half_open"
+            self._trial_in_flight = False
+        if self.state == "half_open":
+            if self._trial_in_flight:
+                raise LLMUnavailableError("LLM provider unavailable (circuit half-open)", retry_after=1)
+            self._trial_in_flight = True
+
+    def release_trial(self):
+        """
+        Frees the half-open trial slot once a call is over, whatever its outcome.
+        """
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class LLMResilience:
+    """
+    Wraps provider calls with a per-model token bucket, retries with exponential
+    backoff and full jitter, and a per-model circuit breaker.
+    """
+    def __init__(
+        self,
+        rate_per_minute: float = 60,
+        burst: float = 10,
+        max_wait: float = 10,
+        model_rates: Dict[str, int] | None = None,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+    ):
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.max_wait = max_wait
+        self.model_rates = model_rates or {}
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def bucket(self, model_name: str) -> TokenBucket:
+        if model_name not in self.buckets:
+            rate = self.model_rates.get(model_name, self.rate_per_minute)
+            self.buckets[model_name] = TokenBucket(rate, self.burst, self.max_wait)
+        return self.buckets[model_name]
+
+    def breaker(self, model_name: str) -> CircuitBreaker:
+        if model_name not in self.breakers:
+            self.breakers[model_name] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[model_name]
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def call(self, model_name: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        breaker = self.breaker(model_name)
+        bucket = self.bucket(model_name)
+        breaker.check()
+        try:
+            return await self._call_with_retries(model_name, breaker, bucket, fn)
+        finally:
+            # Cancellation or a local rate-limit rejection gives no verdict on the provider;
+            # don't leave a half-open breaker waiting forever for its trial call.
+            breaker.release_trial()
+
+    async def _call_with_retries(self, model_name: str, breaker: CircuitBreaker, bucket: TokenBucket, fn: Callable[[], Awaitable[Any]]) -> Any:
+        for attempt in range(self.attempts):
+            await bucket.acquire()
+            try:
+                result = await fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    # The provider answered (e.g. a bad request), so it is not down.
+                    breaker.record_success()
+                    raise
+                last_error = e
+                retried = attempt + 1 < self.attempts
+                metrics.LLM_FAILED_ATTEMPTS.inc(
+                    model=model_name, reason="rate_limited" if is_rate_limit(e) else "unavailable", retried=str(retried).lower()
+                )
+                if retried:
+                    await asyncio.sleep(self.backoff(attempt))
+                continue
+            breaker.record_success()
+            return result
+
+        if is_rate_limit(last_error):
+            breaker.record_success()
+            raise LLMRateLimitedError(f"LLM quota exhausted: {last_error}", retry_after=self.max_delay) from last_error
+        breaker.record_failure()
+        raise LLMUnavailableError(f"LLM provider unavailable: {last_error}", retry_after=self.reset_timeout) from last_error
+
+resilience = LLMResilience(
+    rate_per_minute=float(os.environ.get("LLM_RATE_LIMIT_RPM", "60")),
+    burst=float(os.environ.get("LLM_RATE_LIMIT_BURST", "10")),
+    max_wait=float(os.environ.get("LLM_RATE_LIMIT_MAX_WAIT", "10")),
+    model_rates=parse_model_limits(os.environ.get("LLM_MODEL_RATE_LIMITS", "")),
+    attempts=int(os.environ.get("LLM_RETRY_ATTEMPTS", "3")),
+    base_delay=float(os.environ.get("LLM_RETRY_BASE_DELAY", "0.5")),
+    max_delay=float(os.environ.get("LLM_RETRY_MAX_DELAY", "8")),
+    failure_threshold=int(os.environ.get("LLM_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.environ.get("LLM_BREAKER_RESET_SECONDS", "30")),
+)
@@ -0,0 +1,178 @@
+"""
+Retrieval stage for prompts that should draw on the learner's own library.
+
+For a topic, candidates come from the resources and notes of the topic and its
+ancestors: resource chunks by embedding similarity (vector index) and chunks and notes
+by keyword (FTS5, any query term). The two rankings are fused with reciprocal rank
+fusion, and passages are taken best first until RETRIEVAL_TOP_K passages or
+RETRIEVAL_TOKEN_BUDGET estimated tokens, whichever comes first. Each selection is
+logged with its size and latency, and recorded in the retrieval_* metrics.
+
+Request handlers call retrieve_in_thread: embedding the query, the vector scan and the
+occasional IVF retraining are CPU-bound and must not block the event loop.
+"""
+import asyncio
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app import metrics
+from app.models import Note, Resource, ResourceChunk
+from app.services import search
+from app.services.chunking import estimate_tokens
+from app.services.embeddings import STOPWORDS
+from app.services.vector_index import vector_index
+
+RETRIEVAL_TOKEN_BUDGET = int(os.environ.get("RETRIEVAL_TOKEN_BUDGET", "2000")) # 0 disables retrieval
+RETRIEVAL_TOP_K = int(os.environ.get("RETRIEVAL_TOP_K", "8"))
+RETRIEVAL_CANDIDATES = int(os.environ.get("RETRIEVAL_CANDIDATES", "30")) # Per ranking, before fusion
+RRF_K = 60 # Reciprocal rank fusion constant; dampens the weight of top ranks
+_WORD = re.compile(r"\w+")
+# Not in the embedder's list: changing that would change stored vectors
+QUERY_STOPWORDS = STOPWORDS | {"how", "why", "do", "does", "did", "can", "could", "should", "explain", "mean", "means"}
+
+
+@dataclass
+class Passage:
+    kind: str # resource (a chunk of its text) or note
+    id: str
+    resource_id: Optional[uuid.UUID]
+    title: Optional[str]
+    page: Optional[int]
+    content: str
+    tokens: int
+    score: float # Fused RRF score, higher is better
+
+    def label(self) -> str:
+        if self.kind == "note":
+            return "Note"
+        return f"{self.title}, p. {self.page}" if self.page else self.title or "Resource"
+
+
+@dataclass
+class RetrievedContext:
+    passages: List[Passage] = field(default_factory=list)
+    tokens: int = 0
+    budget: int = 0
+    candidates: int = 0
+    seconds: float = 0.0
+
+    def render(self) -> str:
+        """
+        Numbered passages for a prompt, so answers can cite them as [n]. Empty when
+        nothing was retrieved, which leaves prompts exactly as they were without sources.
+        """
+        return "\n\n".join(f"[{n}] {p.label()}\n{p.content}" for n, p in enumerate(self.passages, 1))
+
+
+def _keyword_query(text: str) -> str:
+    # Questions are mostly function words; ORing those would match every passage
+    return " ".join(w for w in _WORD.findall(text.lower()) if w not in QUERY_STOPWORDS)
+
+
+def _rankings(
+    session: Session, query: str, topic_ids: List[uuid.UUID], resource_ids: List[uuid.UUID], candidates: int
+) -> List[List[Tuple[str, str]]]:
+    rankings = []
+    if resource_ids:
+        hits = vector_index.search(query, k=candidates, owners=resource_ids)
+        rankings.append([("resource", str(h.chunk_id)) for h in hits])
+    keywords = _keyword_query(query)
+    if keywords:
+        hits = search.search(
+            session, keywords, kinds=("resource", "note"), limit=candidates, any_term=True, topic_ids=topic_ids
+        )
+        rankings.append([(h.kind, h.id) for h in hits])
+    return rankings
+
+
+def _load(session: Session, fused: List[Tuple[Tuple[str, str], float]]) -> List[Passage]:
+    chunk_ids = [int(i) for (kind, i), _ in fused if kind == "resource"]
+    note_ids = [uuid.UUID(i) for (kind, i), _ in fused if kind == "note"]
+    found: Dict[Tuple[str, str], Passage] = {}
+    if chunk_ids:
+        for chunk, title, path in session.exec(
+            select(ResourceChunk, Resource.title, Resource.path_or_url)
+            .join(Resource, Resource.id == ResourceChunk.resource_id)
+            .where(ResourceChunk.id.in_(chunk_ids))
+        ):
+            found[("resource", str(chunk.id))] = Passage(
+                kind="resource", id=str(chunk.id), resource_id=chunk.resource_id, title=title or path,
+                page=chunk.page_start, content=chunk.content, tokens=chunk.token_count, score=0.0,
+            )
+    if note_ids:
+        for note in session.exec(select(Note).where(Note.id.in_(note_ids))):
+            found[("note", str(note.id))] = Passage(
+                kind="note", id=str(note.id), resource_id=note.resource_id, title=None, page=None,
+                content=note.content, tokens=estimate_tokens(note.content), score=0.0,
+            )
+    passages = []
+    for key, score in fused:
+        if key in found:  # Rows deleted since they were indexed are skipped
+            found[key].score = score
+            passages.append(found[key])
+    return passages
+
+
+def retrieve(
+    session: Session,
+    topic_id: uuid.UUID,
+    query: str,
+    purpose: str,
+    budget: int = RETRIEVAL_TOKEN_BUDGET,
+    top_k: int = RETRIEVAL_TOP_K,
+    candidates: int = RETRIEVAL_CANDIDATES,
+) -> RetrievedContext:
+    """
+    Selects passages relevant to query from the topic's and its ancestors' resources
+    and notes, within budget tokens. purpose labels the log line and metrics.
+    """
+    context = RetrievedContext(budget=budget)
+    if budget <= 0 or top_k <= 0 or not query.strip():
+        return context
+    start = time.perf_counter()
+
+    topic_ids = search.topic_lineage(session, topic_id)
+    resource_ids = list(session.exec(select(Resource.id).where(Resource.topic_id.in_(topic_ids))).all())
+    scores: Dict[Tuple[str, str], float] = {}
+    for ranking in _rankings(session, query, topic_ids, resource_ids, candidates):
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    context.candidates = len(fused)
+
+    # Best first; a passage that does not fit is skipped so a smaller one can still use the room
+    for passage in _load(session, fused):
+        if len(context.passages) >= top_k:
+            break
+        if context.tokens + passage.tokens > budget:
+            continue
+        context.passages.append(passage)
+        context.tokens += passage.tokens
+
+    context.seconds = time.perf_counter() - start
+    metrics.RETRIEVAL_DURATION.observe(context.seconds, purpose=purpose)
+    metrics.RETRIEVAL_CONTEXT_TOKENS.observe(context.tokens, purpose=purpose)
+    print(
+        f"Retrieval for {purpose} on topic {topic_id}: {len(context.passages)} passages, "
+        f"{context.tokens}/{budget} tokens from {context.candidates} candidates "
+        f"over {len(topic_ids)} topics in {1000 * context.seconds:.1f} ms "
+        f"[{', '.join(f'{p.kind}:{p.id}={p.score:.4f}' for p in context.passages)}]"
+    )
+    return context
+
+
+async def retrieve_in_thread(engine: Engine, topic_id: uuid.UUID, query: str, purpose: str, **options) -> RetrievedContext:
+    """
+    retrieve() in a worker thread, with a session of its own (sessions are not thread-safe).
+    """
+    def run() -> RetrievedContext:
+        with Session(engine) as session:
+            return retrieve(session, topic_id, query, purpose, **options)
+    return await asyncio.to_thread(run)
@@ -0,0 +1,91 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Dict
+
+
+def parse_model_limits(raw: str) -> Dict[str, int]:
+    """
+    Parses "model-a=2,model-b=6" into {"model-a": 2, "model-b": 6}.
+    """
+    limits = {}
+    for item in raw.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        limits[name.strip()] = int(value)
+    return limits
+
+
+class LLMScheduler:
+    """
+    Bounds the number of in-flight LLM calls, both globally and per model.
+    Callers over the limit queue on the semaphores (FIFO) until a slot frees up.
+    """
+    def __init__(self, max_concurrency: int = 8, max_per_model: int = 4, model_limits: Dict[str, int] | None = None):
+        self.max_concurrency = max_concurrency
+        self.max_per_model = max_per_model
+        self.model_limits = model_limits or {}
+        self.in_flight = 0
+        self.waiting = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._global: asyncio.Semaphore | None = None
+        self._per_model: Dict[str, asyncio.Semaphore] = {}
+
+    def _bind(self):
+        # Semaphores belong to one event loop; rebuild them if the loop changed
+        # (e.g. the app was restarted inside the same process, as tests do).
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._global = asyncio.Semaphore(self.max_concurrency)
+            self._per_model = {}
+
+    def _model_semaphore(self, model_name: str) -> asyncio.Semaphore:
+        if model_name not in self._per_model:
+            limit = self.model_limits.get(model_name, self.max_per_model)
+            self._per_model[model_name] = asyncio.Semaphore(limit)
+        return self._per_model[model_name]
+
+    @asynccontextmanager
+    async def slot(self, model_name: str):
+        """
+        Holds one global and one per-model slot for the duration of the block.
+        The model slot is taken first so a caller waiting on a busy model does not
+        tie up a global slot that another model could use.
+        """
+        self._bind()
+        model_sem = self._model_semaphore(model_name)
+        self.waiting += 1
+        try:
+            await model_sem.acquire()
+            try:
+                await self._global.acquire()
+            except BaseException:
+                model_sem.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._global.release()
+            model_sem.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_per_model": self.max_per_model,
+        }
+
+
+scheduler = LLMScheduler(
+    max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "8")),
+    max_per_model=int(os.environ.get("LLM_MAX_CONCURRENCY_PER_MODEL", "4")),
+    model_limits=parse_model_limits(os.environ.get("LLM_MODEL_CONCURRENCY", "")),
+)
@@ -0,0 +1,200 @@
+"""
+Keyword search over the FTS5 indexes declared in app.models (FTS_INDEXES).
+
+Resource text is searched chunk by chunk (ResourceChunk), so hits point at a passage
+and snippets are cut from a few hundred tokens rather than a whole book. Each index
+is ranked with BM25 and cut to the limit on its own, then the results are merged.
+
+Rebuild the indexes from their source tables (after a bulk import, or to compact them):
+
+    python -m app.services.search rebuild [--optimize]
+"""
+import argparse
+import re
+import uuid
+from typing import Collection, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.models import FTS_INDEXES, SearchHit
+
+SEARCH_KINDS = ("resource", "note", "topic", "concept")
+SNIPPET_TOKENS = 16
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+# One branch per kind; rank is each index's BM25 with its column weights (see FTS_INDEXES)
+_BRANCHES: Dict[str, str] = {
+    "resource": """
+        SELECT 'resource' AS kind, c.id AS id, r.topic_id AS topic_id, r.id AS resource_id,
+               COALESCE(r.title, r.path_or_url) AS title,
+               snippet(resourcechunk_fts, 0, '<mark>', '</mark>', '…', :tokens) AS snippet,
+               resourcechunk_fts.rank AS score, c.chunk_index AS chunk_index, c.page_start AS page
+        FROM resourcechunk_fts
+        JOIN resourcechunk c ON c.id = resourcechunk_fts.rowid
+        JOIN resource r ON r.id = c.resource_id
+        WHERE resourcechunk_fts MATCH :query {scope}
+    """,
+    "note": """
+        SELECT 'note' AS kind, n.id AS id, n.topic_id AS topic_id, n.resource_id AS resource_id, NULL AS title,
+               snippet(note_fts, 0, '<mark>', '</mark>', '…', :tokens) AS snippet,
+               note_fts.rank AS score, NULL AS chunk_index, NULL AS page
+        FROM note_fts JOIN note n ON n.rowid = note_fts.rowid
+        WHERE note_fts MATCH :query {scope}
+    """,
+    "topic": """
+        SELECT 'topic' AS kind, t.id AS id, t.id AS topic_id, NULL AS resource_id, t.title AS title,
+               snippet(topic_fts, -1, '<mark>', '</mark>', '…', :tokens) AS snippet,
+               topic_fts.rank AS score, NULL AS chunk_index, NULL AS page
+        FROM topic_fts JOIN topic t ON t.rowid = topic_fts.rowid
+        WHERE topic_fts MATCH :query {scope}
+    """,
+    "concept": """
+        SELECT 'concept' AS kind, k.id AS id, k.topic_id AS topic_id, NULL AS resource_id, k.title AS title,
+               snippet(concept_fts, -1, '<mark>', '</mark>', '…', :tokens) AS snippet,
+               concept_fts.rank AS score, NULL AS chunk_index, NULL AS page
+        FROM concept_fts JOIN concept k ON k.rowid = concept_fts.rowid
+        WHERE concept_fts MATCH :query {scope}
+    """,
+}
+_SCOPE_COLUMNS = {"resource": "r.topic_id", "note": "n.topic_id", "topic": "t.id", "concept": "k.topic_id"}
+
+# The scoped topic and everything under it
+_SCOPE_CTE = """
+    WITH RECURSIVE scope(id) AS (
+        SELECT :topic_id
+        UNION ALL
+        SELECT topic.id FROM topic JOIN scope ON topic.parent_id = scope.id
+    )
+"""
+
+
+def build_match_query(q: str, prefix: bool = False, any_term: bool = False) -> str:
+    """
+    Turns user input into an FTS5 query: words are ANDed (ORed with any_term, for matching
+    natural-language questions), "quoted phrases" stay phrases, and a trailing * makes a
+    word a prefix (as does prefix=True for the last word, for search-as-you-type).
+    Everything is quoted, so FTS5 operators in the input are inert.
+    """
+    terms = []
+    for match in _TERM.finditer(q):
+        phrase, word = match.groups()
+        if phrase is not None:
+            words = _WORD.findall(phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+            continue
+        star = word.endswith("*")
+        terms.extend(f'"{w}"' for w in _WORD.findall(word))
+        if star and terms and not terms[-1].endswith("*"):
+            terms[-1] += "*"
+    if prefix and terms and not terms[-1].endswith("*"):
+        terms[-1] += "*"
+    return (" OR " if any_term else " ").join(terms)
+
+
+def search(
+    session: Session,
+    q: str,
+    topic_id: Optional[uuid.UUID] = None,
+    kinds: Iterable[str] = SEARCH_KINDS,
+    limit: int = 20,
+    prefix: bool = False,
+    any_term: bool = False,
+    topic_ids: Optional[Collection[uuid.UUID]] = None,
+) -> List[SearchHit]:
+    """
+    Best BM25 matches for q across the given kinds, optionally within a topic's subtree,
+    or within exactly the given topic_ids.
+    """
+    query = build_match_query(q, prefix, any_term)
+    if not query:
+        return []
+    # uuids are stored as 32-char hex
+    params = {"query": query, "tokens": SNIPPET_TOKENS, "limit": limit}
+    cte = ""
+    if topic_ids is not None:
+        if not topic_ids:
+            return []
+        params.update((f"scope_{i}", t.hex) for i, t in enumerate(topic_ids))
+        cte = "WITH scope(id) AS (VALUES " + ", ".join(f"(:scope_{i})" for i in range(len(topic_ids))) + ") "
+    elif topic_id:
+        params["topic_id"] = topic_id.hex
+        cte = _SCOPE_CTE
+    branches = []
+    for kind in kinds:
+        scope = f"AND {_SCOPE_COLUMNS[kind]} IN (SELECT id FROM scope)" if cte else ""
+        # Cut each index to its own best matches before merging
+        branches.append(f"SELECT * FROM ({_BRANCHES[kind].format(scope=scope)} ORDER BY score LIMIT :limit)")
+    sql = cte + " UNION ALL ".join(branches) + " ORDER BY score LIMIT :limit"
+
+    rows = session.connection().execute(text(sql), params).mappings()
+    return [_hit(row) for row in rows]
+
+
+def resources_in_scope(session: Session, topic_id: uuid.UUID) -> List[uuid.UUID]:
+    """
+    Ids of the resources attached to the topic or any of its subtopics.
+    """
+    sql = _SCOPE_CTE + "SELECT resource.id FROM resource WHERE resource.topic_id IN (SELECT id FROM scope)"
+    return [uuid.UUID(i) for i, in session.connection().execute(text(sql), {"topic_id": topic_id.hex})]
+
+
+def topic_lineage(session: Session, topic_id: uuid.UUID) -> List[uuid.UUID]:
+    """
+    The topic followed by its ancestors, nearest first.
+    """
+    sql = """
+        WITH RECURSIVE lineage(id, parent_id, depth) AS (
+            SELECT id, parent_id, 0 FROM topic WHERE id = :topic_id
+            UNION ALL
+            SELECT topic.id, topic.parent_id, lineage.depth + 1
+            FROM topic JOIN lineage ON topic.id = lineage.parent_id
+            WHERE lineage.depth < 64
+        )
+        SELECT id FROM lineage ORDER BY depth
+    """
+    return [uuid.UUID(i) for i, in session.connection().execute(text(sql), {"topic_id": topic_id.hex})]
+
+
+def _hit(row) -> SearchHit:
+    # Raw SQL returns uuids as stored (hex); chunk ids are integers
+    hit = dict(row)
+    for key in ("topic_id", "resource_id"):
+        hit[key] = uuid.UUID(hit[key]) if hit[key] else None
+    hit["id"] = str(hit["id"]) if hit["kind"] == "resource" else str(uuid.UUID(hit["id"]))
+    return SearchHit(**hit)
+
+
+def rebuild(session: Session, optimize: bool = False) -> Dict[str, int]:
+    """
+    Re-indexes every FTS table from its source table. Returns the rows indexed per table.
+    """
+    counts = {}
+    connection = session.connection()
+    for name, (table, *_) in FTS_INDEXES.items():
+        connection.exec_driver_sql(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+        if optimize:
+            connection.exec_driver_sql(f"INSERT INTO {name}({name}) VALUES ('optimize')")
+        counts[name] = connection.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar()
+    session.commit()
+    return counts
+
+
+def main():
+    from app.database import create_db_and_tables, engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--optimize", action="store_true", help="merge index segments after rebuilding")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        for name, count in rebuild(session, optimize=args.optimize).items():
+            print(f"{name}: {count} rows indexed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+On-disk vector index for resource chunks.
+
+Vectors live in a memory-mapped float32 matrix (vectors.<generation>.f32, one row per
+chunk) next to two parallel arrays: the chunk id of each row (ids.<generation>.i64) and
+the owning resource (owners.<generation>.bin, 16-byte uuids). meta.json records the
+embedder, the file generation and the committed row count, and is written last, so a
+crash mid-update leaves a consistent index: appends only write past the committed
+count, removed chunks are tombstoned in place (id -1, a single write per row), and
+compaction, once half the rows are dead, writes the next generation's files instead of
+moving rows in place.
+
+Search is a brute-force matrix-vector product over all rows. From IVF_MIN_VECTORS rows
+on, an IVF index (spherical k-means over the vectors) narrows each query to the rows
+of the IVF_PROBES nearest clusters, plus the rows added since it was trained. The IVF
+index is kept in memory and retrained as the collection grows.
+
+Rebuild the index from every stored chunk (after changing EMBEDDER, or to backfill):
+
+    python -m app.services.vector_index rebuild
+"""
+import argparse
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.embeddings import get_embedder
+
+VECTOR_INDEX_DIR = os.environ.get("VECTOR_INDEX_DIR", "vector_index")
+IVF_MIN_VECTORS = int(os.environ.get("IVF_MIN_VECTORS", "20000"))
+IVF_PROBES = int(os.environ.get("IVF_PROBES", "8"))
+IVF_ITERATIONS = 8
+IVF_RETRAIN_GROWTH = 0.2 # Retrain once this fraction of rows was added after training
+EMBED_BATCH = 64
+OWNER_DTYPE = np.dtype("S16")
+# state key, file name, row dtype
+ARRAYS = (("vectors", "vectors.f32", np.float32), ("ids", "ids.i64", np.int64), ("owners", "owners.bin", OWNER_DTYPE))
+
+
+@dataclass
+class VectorHit:
+    chunk_id: int
+    resource_id: uuid.UUID
+    score: float # Cosine similarity
+
+
+@dataclass
+class _IVF:
+    centroids: np.ndarray
+    rows: np.ndarray # Row numbers grouped by cluster
+    offsets: np.ndarray # Cluster c owns rows[offsets[c]:offsets[c + 1]]
+    trained_rows: int # Rows at or past this one are scored exhaustively
+
+
+class VectorIndex:
+    def __init__(
+        self,
+        root: str,
+        embedder_name: Optional[str] = None,
+        ivf_min_vectors: int = IVF_MIN_VECTORS,
+        ivf_probes: int = IVF_PROBES,
+    ):
+        self.root = root
+        self.embedder_name = embedder_name
+        self.ivf_min_vectors = ivf_min_vectors
+        self.ivf_probes = ivf_probes
+        self._lock = threading.RLock()
+        self._state: Optional[dict] = None # Loaded on first use
+
+    # --- storage ---
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _file(self, name: str, generation: int) -> str:
+        stem, ext = name.split(".")
+        return self._path(f"{stem}.{generation}.{ext}")
+
+    def _load(self) -> dict:
+        state = self._state
+        if state is not None:
+            return state
+        with self._lock:
+            # Another thread may have loaded it while this one waited
+            if self._state is None:
+                self._state = self._open()
+            return self._state
+
+    def _open(self) -> dict:
+        embedder = get_embedder(self.embedder_name)
+        os.makedirs(self.root, exist_ok=True)
+        meta = {"embedder": embedder.name, "dim": embedder.dim, "generation": 0, "count": 0}
+        try:
+            with open(self._path("meta.json")) as f:
+                stored = json.load(f)
+            if (stored["embedder"], stored["dim"]) == (meta["embedder"], meta["dim"]):
+                meta = stored
+            else:
+                print(f"Vector index was built with {stored['embedder']}, not {embedder.name}; starting empty")
+        except FileNotFoundError:
+            pass
+
+        state = {
+            "embedder": embedder, "dim": meta["dim"], "generation": meta["generation"],
+            "count": meta["count"], "capacity": 0, "ivf": None,
+        }
+        self._remove_files(keep=state["generation"])
+        self._grow(state, meta["count"])
+        ids = state["ids"][: state["count"]]
+        state["rows"] = {int(chunk_id): row for row, chunk_id in enumerate(ids) if chunk_id >= 0}
+        state["dead"] = state["count"] - len(state["rows"])
+        return state
+
+    def _grow(self, state: dict, needed: int):
+        if needed <= state["capacity"] and state["capacity"]:
+            return
+        capacity = max(1024, state["capacity"] * 2, needed)
+        dim = state["dim"]
+        for key, name, dtype in ARRAYS:
+            path = self._file(name, state["generation"])
+            shape = (capacity, dim) if key == "vectors" else (capacity,)
+            with open(path, "ab") as f:
+                size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+                if f.tell() < size:
+                    f.truncate(size)
+            state[key] = np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+        state["capacity"] = capacity
+
+    def _commit(self, state: dict):
+        for key, _, _ in ARRAYS:
+            state[key].flush()
+        meta = {
+            "embedder": state["embedder"].name, "dim": state["dim"],
+            "generation": state["generation"], "count": state["count"],
+        }
+        tmp = self._path("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path("meta.json"))
+        if state.pop("retired", None) is not None:
+            self._remove_files(keep=state["generation"])
+
+    def _remove_files(self, keep: int):
+        # Files of other generations: superseded by a compaction, or left by one that crashed
+        names = {name.split(".")[0] for _, name, _ in ARRAYS}
+        for entry in os.listdir(self.root):
+            parts = entry.split(".")
+            if len(parts) == 3 and parts[0] in names and parts[1] != str(keep):
+                os.remove(self._path(entry))
+
+    # --- updates ---
+
+    def __len__(self) -> int:
+        state = self._load()
+        return state["count"] - state["dead"]
+
+    def chunk_ids(self, owner: uuid.UUID) -> List[int]:
+        with self._lock:
+            state = self._load()
+            n = state["count"]
+            rows = np.flatnonzero(state["owners"][:n] == np.array(owner.bytes, dtype=OWNER_DTYPE))
+            return [int(i) for i in state["ids"][rows] if i >= 0]
+
+    def sync_resource(self, owner: uuid.UUID, chunks: Sequence[Tuple[int, str]]) -> Tuple[int, int]:
+        """
+        Makes the index hold exactly these (chunk id, text) pairs for the resource: new
+        chunks are embedded and appended, chunks no longer present are dropped. Chunks
+        already indexed are not re-embedded. Returns (added, removed).
+        """
+        state = self._load()
+        current = {chunk_id for chunk_id, _ in chunks}
+        stale = [i for i in self.chunk_ids(owner) if i not in current]
+        missing = [(i, text) for i, text in chunks if i not in state["rows"]]
+
+        # Embed outside the lock: it is the slow part
+        vectors = [
+            state["embedder"].embed([text for _, text in missing[start:start + EMBED_BATCH]])
+            for start in range(0, len(missing), EMBED_BATCH)
+        ]
+        with self._lock:
+            # A concurrent sync of the same resource may have added some meanwhile
+            fresh = [n for n, (i, _) in enumerate(missing) if i not in state["rows"]]
+            missing = [missing[n] for n in fresh]
+            if missing:
+                start = state["count"]
+                self._grow(state, start + len(missing))
+                end = start + len(missing)
+                state["vectors"][start:end] = np.concatenate(vectors)[fresh]
+                state["ids"][start:end] = [i for i, _ in missing]
+                state["owners"][start:end] = owner.bytes
+                state["rows"].update((i, start + n) for n, (i, _) in enumerate(missing))
+                state["count"] = end
+            self._remove(state, stale)
+            self._commit(state)
+        return len(missing), len(stale)
+
+    def _remove(self, state: dict, chunk_ids: Collection[int]):
+        for chunk_id in chunk_ids:
+            row = state["rows"].pop(chunk_id, None)
+            if row is not None:
+                state["ids"][row] = -1
+                state["dead"] += 1
+        if state["dead"] and state["dead"] * 2 >= state["count"]:
+            self._compact(state)
+
+    def _compact(self, state: dict):
+        # The live rows go to the next generation's files; meta.json still names the
+        # current ones until _commit, which then deletes them
+        n = state["count"]
+        keep = np.flatnonzero(state["ids"][:n] >= 0)
+        generation = state["generation"] + 1
+        for key, name, _ in ARRAYS:
+            with open(self._file(name, generation), "wb") as f:
+                np.asarray(state[key][keep]).tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+        state["retired"] = state["generation"]
+        state.update(generation=generation, capacity=0)
+        self._grow(state, len(keep))
+        state["count"] = len(keep)
+        state["dead"] = 0
+        state["rows"] = {int(chunk_id): row for row, chunk_id in enumerate(state["ids"][: len(keep)])}
+        state["ivf"] = None
+
+    def clear(self):
+        with self._lock:
+            state = self._load()
+            state.update(count=0, dead=0, rows={}, ivf=None)
+            self._commit(state)
+
+    # --- search ---
+
+    def _train_ivf(self, state: dict) -> _IVF:
+        n = state["count"]
+        vectors = state["vectors"]
+        live = np.flatnonzero(state["ids"][:n] >= 0)
+        clusters = int(np.clip(np.sqrt(len(live)), 16, 4096))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(vectors[np.sort(rng.choice(live, min(len(live), clusters * 40), replace=False))])
+        centroids = sample[rng.choice(len(sample), clusters, replace=False)].copy()
+        for _ in range(IVF_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # Reseed empty clusters from random points instead of letting them die
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            norms[empty] = 1.0
+            centroids = sums / norms
+
+        assign = np.concatenate([
+            np.argmax(np.asarray(vectors[live[i:i + 65536]]) @ centroids.T, axis=1)
+            for i in range(0, len(live), 65536)
+        ])
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(clusters + 1))
+        return _IVF(centroids=centroids, rows=live[order], offsets=offsets, trained_rows=n)
+
+    def _candidates(self, state: dict, query: np.ndarray) -> Optional[np.ndarray]:
+        # None means score every row
+        live = state["count"] - state["dead"]
+        if live < self.ivf_min_vectors:
+            return None
+        ivf = state["ivf"]
+        if ivf is None or state["count"] - ivf.trained_rows > IVF_RETRAIN_GROWTH * ivf.trained_rows:
+            ivf = state["ivf"] = self._train_ivf(state)
+        probes = np.argsort(-(ivf.centroids @ query))[: self.ivf_probes]
+        groups = [ivf.rows[ivf.offsets[c]:ivf.offsets[c + 1]] for c in probes]
+        groups.append(np.arange(ivf.trained_rows, state["count"]))
+        return np.concatenate(groups)
+
+    def search(
+        self, query: str, k: int = 10, owners: Optional[Collection[uuid.UUID]] = None, exact: bool = False
+    ) -> List[VectorHit]:
+        """
+        The k chunks most similar to query, optionally only those of the given resources.
+        Chunks with no similarity at all are left out. exact=True skips the IVF index and
+        scores every row.
+        """
+        state = self._load()
+        q = state["embedder"].embed([query])[0]
+        if not q.any():
+            return []
+        with self._lock:
+            n = state["count"]
+            rows = None if exact else self._candidates(state, q)
+            if rows is None:
+                rows = np.arange(n)
+                scores = state["vectors"][:n] @ q
+            else:
+                scores = np.asarray(state["vectors"][rows]) @ q
+            mask = state["ids"][rows] >= 0
+            if owners is not None:
+                wanted = np.array([o.bytes for o in owners], dtype=OWNER_DTYPE)
+                mask &= np.isin(state["owners"][rows], wanted)
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, len(scores))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                VectorHit(
+                    chunk_id=int(state["ids"][rows[i]]),
+                    resource_id=uuid.UUID(bytes=bytes(state["owners"][rows[i]]).ljust(16, b"\0")),
+                    score=float(scores[i]),
+                )
+                for i in top
+                if scores[i] > 0
+            ]
+
+
+vector_index = VectorIndex(VECTOR_INDEX_DIR)
+
+
+def rebuild(index: VectorIndex, session) -> Dict[str, int]:
+    """
+    Re-embeds every stored chunk. Returns how many resources and chunks were indexed.
+    """
+    from sqlmodel import select
+    from app.models import ResourceChunk
+
+    index.clear()
+    counts = {"resources": 0, "chunks": 0}
+    by_resource: Dict[uuid.UUID, List[Tuple[int, str]]] = {}
+    for chunk_id, resource_id, content in session.exec(
+        select(ResourceChunk.id, ResourceChunk.resource_id, ResourceChunk.content).order_by(ResourceChunk.id)
+    ):
+        by_resource.setdefault(resource_id, []).append((chunk_id, content))
+    for resource_id, chunks in by_resource.items():
+        added, _ = index.sync_resource(resource_id, chunks)
+        counts["resources"] += 1
+        counts["chunks"] += added
+    return counts
+
+
+def main():
+    from sqlmodel import Session
+    from app.database import create_db_and_tables, engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        counts = rebuild(vector_index, session)
+    print(f"{counts['chunks']} chunks from {counts['resources']} resources indexed in {vector_index.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Compares SQLite connection profiles (see DB_PROFILES in app/database.py) under a
+mixed concurrent workload: writer threads committing small transactions while
+reader threads run list queries, as the API does under load.
+
+    python -m benchmarks.db_profile_bench --writers 8 --readers 8 --seconds 5
+
+Reports committed writes per second, commit latency percentiles, reads per second
+and how many operations failed with "database is locked".
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.database import DB_PROFILES, configure_sqlite
+from app.models import Topic
+
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float, seed_rows: int) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False},
+            pool_size=writers + readers,
+        )
+        configure_sqlite(engine, profile)
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add_all(Topic(title=f"Seed {i}") for i in range(seed_rows))
+            session.commit()
+
+        stop = time.perf_counter() + seconds
+        commit_latencies: List[float] = []
+        counts = {"reads": 0, "locked": 0}
+        lock = threading.Lock()
+
+        def writer(n: int):
+            i = 0
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                try:
+                    with Session(engine) as session:
+                        session.add(Topic(title=f"Writer {n} topic {i}", order_index=i))
+                        session.commit()
+                except OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    with lock:
+                        counts["locked"] += 1
+                    continue
+                with lock:
+                    commit_latencies.append(time.perf_counter() - start)
+                i += 1
+
+        def reader():
+            while time.perf_counter() < stop:
+                try:
+                    with Session(engine) as session:
+                        session.exec(select(Topic).order_by(Topic.created_at.desc()).limit(50)).all()
+                except OperationalError as e:
+                    if "locked" not in str(e):
+                        raise
+                    with lock:
+                        counts["locked"] += 1
+                    continue
+                with lock:
+                    counts["reads"] += 1
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        engine.dispose()
+
+    latencies = sorted(commit_latencies) or [0.0]
+    return {
+        "profile": profile,
+        "writes_per_s": len(commit_latencies) / seconds,
+        "p50_ms": 1000 * statistics.median(latencies),
+        "p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+        "reads_per_s": counts["reads"] / seconds,
+        "locked": counts["locked"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--seed-rows", type=int, default=10000)
+    parser.add_argument("--profiles", nargs="+", default=list(DB_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':<14}{'writes/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'reads/s':>10}{'locked':>8}")
+    for profile in args.profiles:
+        r = run_profile(profile, args.writers, args.readers, args.seconds, args.seed_rows)
+        print(
+            f"{r['profile']:<14}{r['writes_per_s']:>10.0f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+            f"{r['reads_per_s']:>10.0f}{r['locked']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
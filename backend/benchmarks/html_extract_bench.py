@@ -0,0 +1,117 @@
+"""
+Compares HTML extraction engines against the original BeautifulSoup path.
+
+    python -m benchmarks.html_extract_bench --corpus saved_pages/ --repeat 3
+
+Every *.html / *.htm file under --corpus is a page; without a corpus a synthetic one
+(article text wrapped in navigation, sidebars, footers and inline scripts) is generated.
+Reports time per page and the size of the extracted text in estimated tokens, which is
+what summary prompts are billed on.
+"""
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from bs4 import BeautifulSoup
+
+from app.services import html_extract
+from app.services.chunking import estimate_tokens
+
+
+def legacy_extract(html: str) -> str:
+    # The extraction path before html_extract, kept verbatim as the baseline
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.extract()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+
+WORDS = (
+    "entropy system energy state measure theory information particle model process "
+    "value function random average order heat work temperature signal channel source"
+).split()
+
+
+def synthetic_page(rng: random.Random, paragraphs: int) -> str:
+    def sentence() -> str:
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+        return " ".join(words).capitalize() + ", " + " ".join(rng.choice(WORDS) for _ in range(5)) + "."
+
+    nav = "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(60))
+    sidebar = "".join(f'<p><a href="/post/{i}">Related post {i}: {sentence()}</a></p>' for i in range(20))
+    body = "".join(f"<h2>Part {i}</h2><p>{sentence()} {sentence()} {sentence()}</p>" for i in range(paragraphs))
+    script = "<script>" + "var x = 1;" * 500 + "</script>"
+    return (
+        "<!DOCTYPE html><html><head><title>Page</title><style>body{margin:0}</style></head><body>"
+        f'<header class="site-header"><nav><ul>{nav}</ul></nav></header>'
+        f'<div id="cookie-consent">We use cookies. {sentence()}</div>'
+        f'<div class="layout"><div class="post-content">{body}</div>'
+        f'<div class="sidebar">{sidebar}</div></div>'
+        f"<footer><ul>{nav}</ul><p>Copyright</p></footer>{script}</body></html>"
+    )
+
+
+def load_corpus(path: str | None, pages: int, seed: int) -> List[str]:
+    if path:
+        files = sorted(p for p in Path(path).rglob("*") if p.suffix.lower() in (".html", ".htm"))
+        return [f.read_text(encoding="utf-8", errors="replace") for f in files]
+    rng = random.Random(seed)
+    return [synthetic_page(rng, rng.choice((5, 20, 60, 200))) for _ in range(pages)]
+
+
+def bench(name: str, extract: Callable[[str], str], corpus: List[str], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [extract(page) for page in corpus]
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        "engine": name,
+        "ms_per_page": 1000 * best / len(corpus),
+        "median_s": statistics.median(timings),
+        "tokens": sum(estimate_tokens(o) for o in outputs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of saved pages (default: synthetic corpus)")
+    parser.add_argument("--pages", type=int, default=40, help="synthetic pages to generate")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, args.pages, args.seed)
+    if not corpus:
+        parser.error("no pages found")
+    size_mb = sum(len(p) for p in corpus) / 1e6
+    print(f"{len(corpus)} pages, {size_mb:.1f} MB of HTML\n")
+
+    candidates = [("legacy (bs4, full page)", legacy_extract)]
+    for name in html_extract.ENGINES:
+        try:
+            html_extract.get_engine(name)
+        except ValueError:
+            print(f"skipping {name}: not installed")
+            continue
+        candidates.append((name, lambda html, name=name: html_extract.extract_main_text(html, name)))
+
+    results = [bench(name, fn, corpus, args.repeat) for name, fn in candidates]
+    baseline = results[0]
+    print(f"{'engine':<26}{'ms/page':>10}{'speedup':>10}{'tokens':>12}{'vs legacy':>11}")
+    for r in results:
+        print(
+            f"{r['engine']:<26}{r['ms_per_page']:>10.2f}{baseline['ms_per_page'] / r['ms_per_page']:>9.1f}x"
+            f"{r['tokens']:>12}{r['tokens'] / max(1, baseline['tokens']):>10.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures semantic search latency and IVF recall on the chunk vector index.
+
+    python -m benchmarks.vector_index_bench --vectors 200000 --queries 200
+
+Builds an index of synthetic clustered unit vectors (topics of related chunks, as a
+library of books produces) and compares brute force against IVF at several probe
+counts: milliseconds per query, and recall@k of IVF against the exact result.
+"""
+import argparse
+import tempfile
+import time
+import uuid
+from unittest.mock import patch
+
+import numpy as np
+
+from app.services.vector_index import VectorIndex
+
+
+class RandomVectors:
+    # Stands in for an embedder: texts are row numbers into a prepared matrix
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+        self.dim = vectors.shape[1]
+        self.name = f"bench-{self.dim}"
+
+    def embed(self, texts):
+        return self.vectors[[int(t) for t in texts]]
+
+
+def clustered(rng, n: int, dim: int, clusters: int, spread: float) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(clusters, size=n)] + spread * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--spread", type=float, default=2.0, help="noise around cluster centers")
+    parser.add_argument("--probes", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = clustered(rng, args.vectors + args.queries, args.dim, clusters=max(16, args.vectors // 500), spread=args.spread)
+
+    with tempfile.TemporaryDirectory() as root, \
+            patch("app.services.vector_index.get_embedder", return_value=RandomVectors(data)):
+        index = VectorIndex(root, ivf_min_vectors=0)
+        start = time.perf_counter()
+        batch = 10000
+        for i in range(0, args.vectors, batch):
+            index.sync_resource(uuid.uuid4(), [(j, str(j)) for j in range(i, min(i + batch, args.vectors))])
+        print(f"{args.vectors} x {args.dim} vectors indexed in {time.perf_counter() - start:.1f}s")
+
+        queries = [str(args.vectors + q) for q in range(args.queries)]
+
+        def run(exact: bool):
+            start = time.perf_counter()
+            results = [{h.chunk_id for h in index.search(q, args.k, exact=exact)} for q in queries]
+            return results, 1000 * (time.perf_counter() - start) / len(queries)
+
+        start = time.perf_counter()
+        index.search(queries[0], args.k)  # trains the IVF index
+        print(f"IVF trained in {time.perf_counter() - start:.1f}s\n")
+
+        truth, exact_ms = run(exact=True)
+        print(f"{'method':<16}{'ms/query':>10}{'recall@' + str(args.k):>12}")
+        print(f"{'brute force':<16}{exact_ms:>10.2f}{1:>12.3f}")
+        for probes in args.probes:
+            index.ivf_probes = probes
+            found, ms = run(exact=False)
+            recall = np.mean([len(f & t) / max(1, len(t)) for f, t in zip(found, truth)])
+            print(f"{'IVF ' + str(probes) + ' probes':<16}{ms:>10.2f}{recall:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
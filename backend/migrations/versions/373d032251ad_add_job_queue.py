@@ -0,0 +1,48 @@
+"""Add job queue and resource summary status
+
+Revision ID: 373d032251ad
+Revises: 9f5a74e4f532
+Create Date: 2026-10-17 11:02:19.604771
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '373d032251ad'
+down_revision: Union[str, Sequence[str], None] = '9f5a74e4f532'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('resource', sa.Column('summary_status', sa.Enum('PENDING', 'COMPLETED', 'FAILED', name='summarystatus'), nullable=False, server_default='COMPLETED'))
+    op.create_table('job',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('kind', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus'), nullable=False),
+        sa.Column('stage', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('resource_id', sa.Uuid(), nullable=True),
+        sa.Column('payload', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['resource_id'], ['resource.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_job_status'), 'job', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_job_status'), table_name='job')
+    op.drop_table('job')
+    op.drop_column('resource', 'summary_status')
@@ -0,0 +1,40 @@
+"""Extend listing indexes with id
+
+Revision ID: 5b2e91d7c4a3
+Revises: c0afa483dcf0
+Create Date: 2026-10-17 18:12:40.531902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e91d7c4a3'
+down_revision: Union[str, Sequence[str], None] = 'c0afa483dcf0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_concept_topic_id_order_index', table_name='concept')
+    op.create_index('ix_concept_topic_id_order_index', 'concept', ['topic_id', 'order_index', 'id'], unique=False)
+    op.drop_index('ix_activity_concept_id_created_at', table_name='activity')
+    op.create_index('ix_activity_concept_id_created_at', 'activity', ['concept_id', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_resource_topic_id_created_at', table_name='resource')
+    op.create_index('ix_resource_topic_id_created_at', 'resource', ['topic_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_topic_created_at_id', 'topic', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_topic_created_at_id', table_name='topic')
+    op.drop_index('ix_resource_topic_id_created_at', table_name='resource')
+    op.create_index('ix_resource_topic_id_created_at', 'resource', ['topic_id', 'created_at'], unique=False)
+    op.drop_index('ix_activity_concept_id_created_at', table_name='activity')
+    op.create_index('ix_activity_concept_id_created_at', 'activity', ['concept_id', 'created_at'], unique=False)
+    op.drop_index('ix_concept_topic_id_order_index', table_name='concept')
+    op.create_index('ix_concept_topic_id_order_index', 'concept', ['topic_id', 'order_index'], unique=False)
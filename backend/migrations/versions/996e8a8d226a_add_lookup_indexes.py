@@ -0,0 +1,46 @@
+"""Add foreign-key and lookup indexes
+
+Revision ID: 996e8a8d226a
+Revises: 9ac4106a8fd5
+Create Date: 2026-10-17 13:41:05.227913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '996e8a8d226a'
+down_revision: Union[str, Sequence[str], None] = '9ac4106a8fd5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_topic_parent_id_order_index', 'topic', ['parent_id', 'order_index'], unique=False)
+    op.create_index('ix_concept_topic_id_order_index', 'concept', ['topic_id', 'order_index'], unique=False)
+    op.create_index('ix_activity_concept_id_created_at', 'activity', ['concept_id', 'created_at'], unique=False)
+    op.create_index('ix_resource_topic_id_created_at', 'resource', ['topic_id', 'created_at'], unique=False)
+    op.create_index('ix_note_topic_id', 'note', ['topic_id'], unique=False)
+    op.create_index('ix_note_resource_id', 'note', ['resource_id'], unique=False)
+    op.create_index('ix_link_source_id', 'link', ['source_id'], unique=False)
+    op.create_index('ix_link_target_id', 'link', ['target_id'], unique=False)
+    op.drop_index('ix_job_status', table_name='job')
+    op.create_index('ix_job_status_run_after', 'job', ['status', 'run_after'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_status_run_after', table_name='job')
+    op.create_index('ix_job_status', 'job', ['status'], unique=False)
+    op.drop_index('ix_link_target_id', table_name='link')
+    op.drop_index('ix_link_source_id', table_name='link')
+    op.drop_index('ix_note_resource_id', table_name='note')
+    op.drop_index('ix_note_topic_id', table_name='note')
+    op.drop_index('ix_resource_topic_id_created_at', table_name='resource')
+    op.drop_index('ix_activity_concept_id_created_at', table_name='activity')
+    op.drop_index('ix_concept_topic_id_order_index', table_name='concept')
+    op.drop_index('ix_topic_parent_id_order_index', table_name='topic')
@@ -0,0 +1,44 @@
+"""Add resource chunks
+
+Revision ID: 9ac4106a8fd5
+Revises: 373d032251ad
+Create Date: 2026-10-17 12:26:51.880342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9ac4106a8fd5'
+down_revision: Union[str, Sequence[str], None] = '373d032251ad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('resourcechunk',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('resource_id', sa.Uuid(), nullable=False),
+        sa.Column('chunk_index', sa.Integer(), nullable=False),
+        sa.Column('content', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('start_offset', sa.Integer(), nullable=False),
+        sa.Column('end_offset', sa.Integer(), nullable=False),
+        sa.Column('page_start', sa.Integer(), nullable=True),
+        sa.Column('page_end', sa.Integer(), nullable=True),
+        sa.Column('token_count', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.ForeignKeyConstraint(['resource_id'], ['resource.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_resourcechunk_resource_id'), 'resourcechunk', ['resource_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_resourcechunk_resource_id'), table_name='resourcechunk')
+    op.drop_table('resourcechunk')
@@ -0,0 +1,32 @@
+"""Add content hash and title to Resource
+
+Revision ID: 9f5a74e4f532
+Revises: 4e738eacb825
+Create Date: 2026-10-17 10:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f5a74e4f532'
+down_revision: Union[str, Sequence[str], None] = '4e738eacb825'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('resource', sa.Column('title', sa.String(), nullable=True))
+    op.add_column('resource', sa.Column('content_hash', sa.String(), nullable=True))
+    op.create_index(op.f('ix_resource_content_hash'), 'resource', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_resource_content_hash'), table_name='resource')
+    op.drop_column('resource', 'content_hash')
+    op.drop_column('resource', 'title')
@@ -0,0 +1,54 @@
+"""Add FTS5 search indexes
+
+Revision ID: c0afa483dcf0
+Revises: 996e8a8d226a
+Create Date: 2026-10-17 15:02:11.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c0afa483dcf0'
+down_revision: Union[str, Sequence[str], None] = '996e8a8d226a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of app.models.FTS_INDEXES at this revision
+INDEXES = {
+    'resourcechunk_fts': ('resourcechunk', 'id', ('content',), (1.0,)),
+    'note_fts': ('note', 'rowid', ('content',), (1.0,)),
+    'topic_fts': ('topic', 'rowid', ('title', 'description'), (10.0, 1.0)),
+    'concept_fts': ('concept', 'rowid', ('title', 'description'), (10.0, 1.0)),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, (table, rowid, columns, weights) in INDEXES.items():
+        cols = ', '.join(columns)
+        new = ', '.join(f'new.{c}' for c in columns)
+        old = ', '.join(f'old.{c}' for c in columns)
+        delete = f"INSERT INTO {name}({name}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old});"
+        insert = f'INSERT INTO {name}(rowid, {cols}) VALUES (new.{rowid}, {new});'
+        op.execute(
+            f"CREATE VIRTUAL TABLE {name} USING fts5({cols}, content='{table}', content_rowid='{rowid}', "
+            f"tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(f"INSERT INTO {name}({name}, rank) VALUES ('rank', 'bm25({', '.join(map(str, weights))})')")
+        op.execute(f'CREATE TRIGGER {name}_ai AFTER INSERT ON {table} BEGIN {insert} END')
+        op.execute(f'CREATE TRIGGER {name}_ad AFTER DELETE ON {table} BEGIN {delete} END')
+        op.execute(f'CREATE TRIGGER {name}_au AFTER UPDATE OF {cols} ON {table} BEGIN {delete} {insert} END')
+        # Backfill existing rows
+        op.execute(f"INSERT INTO {name}({name}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in reversed(list(INDEXES)):
+        for suffix in ('au', 'ad', 'ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {name}_{suffix}')
+        op.execute(f'DROP TABLE IF EXISTS {name}')
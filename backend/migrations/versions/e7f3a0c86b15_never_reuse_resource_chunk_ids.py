@@ -0,0 +1,48 @@
+"""Never reuse resource chunk ids
+
+Revision ID: e7f3a0c86b15
+Revises: 5b2e91d7c4a3
+Create Date: 2026-10-17 18:47:21.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7f3a0c86b15'
+down_revision: Union[str, Sequence[str], None] = '5b2e91d7c4a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The table is rebuilt, which drops its FTS triggers (as created in c0afa483dcf0)
+TRIGGERS = {
+    'ai': "AFTER INSERT ON resourcechunk BEGIN "
+          "INSERT INTO resourcechunk_fts(rowid, content) VALUES (new.id, new.content); END",
+    'ad': "AFTER DELETE ON resourcechunk BEGIN "
+          "INSERT INTO resourcechunk_fts(resourcechunk_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    'au': "AFTER UPDATE OF content ON resourcechunk BEGIN "
+          "INSERT INTO resourcechunk_fts(resourcechunk_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+          "INSERT INTO resourcechunk_fts(rowid, content) VALUES (new.id, new.content); END",
+}
+
+
+def _rebuild(autoincrement: bool) -> None:
+    with op.batch_alter_table('resourcechunk', recreate='always', table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    for suffix, body in TRIGGERS.items():
+        op.execute(f'CREATE TRIGGER IF NOT EXISTS resourcechunk_fts_{suffix} {body}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Vector index rows keyed by a reused id may hold another chunk's text:
+    # run `python -m app.services.vector_index rebuild` after upgrading
+    _rebuild(autoincrement=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild(autoincrement=False)
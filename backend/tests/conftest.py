@@ -5,6 +5,8 @@ from sqlmodel.pool import StaticPool
 
 from app.main import app
 from app.database import get_session
+from app.services.jobs import job_queue
+from app.services.vector_index import vector_index
 
 @pytest.fixture(name="session")
 def session_fixture():
@@ -19,11 +21,17 @@ def session_fixture():
         yield session
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session):
+def client_fixture(session: Session, monkeypatch, tmp_path):
     def get_session_override():
         return session
 
     app.dependency_overrides[get_session] = get_session_override
+    # Jobs run against the test database, driven explicitly with job_queue.run_until_idle()
+    monkeypatch.setattr(job_queue, "engine", session.get_bind())
+    monkeypatch.setattr(job_queue, "workers", 0)
+    # A fresh vector index per test, loaded on first use
+    monkeypatch.setattr(vector_index, "root", str(tmp_path / "vectors"))
+    monkeypatch.setattr(vector_index, "_state", None)
     
     with TestClient(app) as client:
         yield client
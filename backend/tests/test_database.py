@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy import text
+from sqlmodel import create_engine
+from app.database import configure_sqlite
+
+def test_performance_profile_pragmas(tmp_path):
+    engine = configure_sqlite(create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}"), "performance")
+    with engine.connect() as conn:
+        pragma = lambda name: conn.execute(text(f"PRAGMA {name}")).scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 5000
+        assert pragma("temp_store") == 2  # MEMORY
+        assert pragma("cache_size") < 0
+    engine.dispose()
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        configure_sqlite(create_engine("sqlite://"), "turbo")
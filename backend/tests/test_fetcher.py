@@ -0,0 +1,67 @@
+import httpx
+import pytest
+from app.services.fetcher import FetchCache, FetchError, URLFetcher
+
+PAGE = "<html><body><p>Hello</p><script>x()</script></body></html>"
+
+def make_fetcher(tmp_path, handler, **kwargs):
+    return URLFetcher(
+        cache=FetchCache(str(tmp_path / "fetch.db")),
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+@pytest.mark.asyncio
+async def test_conditional_get_skips_download_and_parse(tmp_path):
+    requests_seen = []
+
+    def handler(request: httpx.Request):
+        requests_seen.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, html=PAGE, headers={"ETag": '"v1"'})
+
+    parses = []
+    def extract(html):
+        parses.append(html)
+        return "Hello"
+
+    fetcher = make_fetcher(tmp_path, handler)
+    assert await fetcher.fetch_text("http://example.com/a", extract) == "Hello"
+    assert await fetcher.fetch_text("http://example.com/a", extract) == "Hello"
+    await fetcher.aclose()
+
+    assert len(requests_seen) == 2
+    assert "If-None-Match" not in requests_seen[0].headers
+    assert len(parses) == 1
+
+@pytest.mark.asyncio
+async def test_cached_text_from_another_extractor_is_a_miss(tmp_path):
+    def handler(request: httpx.Request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, html=PAGE, headers={"ETag": '"v1"'})
+
+    fetcher = make_fetcher(tmp_path, handler)
+    assert await fetcher.fetch_text("http://example.com/a", lambda html: "old", extractor_version="1") == "old"
+    # An upgraded extractor re-downloads and re-parses instead of trusting the 304
+    assert await fetcher.fetch_text("http://example.com/a", lambda html: "new", extractor_version="2") == "new"
+    assert await fetcher.fetch_text("http://example.com/a", lambda html: "unused", extractor_version="2") == "new"
+    await fetcher.aclose()
+
+@pytest.mark.asyncio
+async def test_size_cap(tmp_path):
+    def handler(request: httpx.Request):
+        return httpx.Response(200, content=b"x" * 2048)
+
+    fetcher = make_fetcher(tmp_path, handler, max_bytes=1024)
+    with pytest.raises(FetchError):
+        await fetcher.fetch_text("http://example.com/big", lambda html: html)
+    await fetcher.aclose()
+
+@pytest.mark.asyncio
+async def test_http_errors_raise(tmp_path):
+    fetcher = make_fetcher(tmp_path, lambda request: httpx.Response(404))
+    with pytest.raises(httpx.HTTPStatusError):
+        await fetcher.fetch_text("http://example.com/missing", lambda html: html)
+    await fetcher.aclose()
@@ -0,0 +1,48 @@
+import pytest
+from app.services import html_extract
+from app.services.html_extract import extract_main_text
+
+PAGE = """<?xml version="1.0" encoding="utf-8"?>
+<html><head><title>T</title><style>.x{}</style></head><body>
+<header class="site-header"><a href="/">Home</a> <a href="/about">About</a></header>
+<nav><ul><li><a href="/a">Navigation link</a></li></ul></nav>
+<div id="cookie-banner">We use cookies, accept them please, thanks, okay, fine.</div>
+<div class="wrapper"><div class="content">
+<h1>Entropy</h1>
+<p>Entropy is a measure of disorder, of uncertainty, and of the number of microstates, roughly speaking.</p>
+<p>In information theory, <b>entropy</b> quantifies the average information, in bits, produced by a source.</p>
+<!-- a comment -->
+<p>It was introduced by Shannon in 1948, building on work by Boltzmann, Gibbs, and others.</p>
+</div>
+<div class="sidebar"><p>Related posts: this, that, and many other links you might like to read.</p></div>
+</div>
+<footer>Copyright 2026</footer><script>alert("script text")</script></body></html>"""
+
+def available_engines():
+    engines = []
+    for name in html_extract.ENGINES:
+        try:
+            html_extract.get_engine(name)
+            engines.append(name)
+        except ValueError:
+            pass
+    return engines
+
+@pytest.mark.parametrize("engine", available_engines())
+def test_extracts_main_content(engine):
+    text = extract_main_text(PAGE, engine)
+    lines = text.splitlines()
+    assert lines[0] == "Entropy"
+    # Inline markup doesn't split a line
+    assert "In information theory, entropy quantifies the average information, in bits, produced by a source." in lines
+    for junk in ("Home", "Navigation link", "cookies", "Related posts", "Copyright", "script text", "a comment"):
+        assert junk not in text
+
+@pytest.mark.parametrize("engine", available_engines())
+def test_falls_back_to_whole_page_without_paragraphs(engine):
+    assert extract_main_text("<html><body><div>Short   note</div><span>two</span></body></html>", engine) == "Short note\ntwo"
+    assert extract_main_text("   ", engine) == ""
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        html_extract.get_engine("nope")
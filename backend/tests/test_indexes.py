@@ -0,0 +1,44 @@
+import uuid
+from datetime import datetime
+import pytest
+from sqlmodel import Session, select
+from app.models import Link, Note
+from app.pagination import encode_cursor, page_query
+from app.routers import pedagogy, resources, topics
+from app.services.jobs import due_jobs
+
+def query_plan(session: Session, statement) -> str:
+    compiled = statement.compile(dialect=session.get_bind().dialect)
+    # Plans don't depend on bound values
+    params = (None,) * len(compiled.positiontup)
+    rows = session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), params).all()
+    return "\n".join(row[-1] for row in rows)
+
+topic_id = uuid.uuid4()
+now = datetime.utcnow()
+
+def pages(statement, columns, sample):
+    # The first page, and a later one with the keyset condition from a cursor
+    return [page_query(statement, columns), page_query(statement, columns, encode_cursor(sample))]
+
+# Built from the same helpers the routers and the job queue run
+QUERIES = {
+    "ix_concept_topic_id_order_index": pages(pedagogy.topic_concepts(topic_id), pedagogy.CONCEPT_ORDER, [3, topic_id])
+        + [pedagogy.topic_concepts(topic_id).order_by(*pedagogy.CONCEPT_ORDER)],
+    "ix_activity_concept_id_created_at": pages(pedagogy.concept_activities(topic_id), pedagogy.ACTIVITY_ORDER, [now, topic_id]),
+    "ix_resource_topic_id_created_at": pages(resources.topic_resources(topic_id), resources.RESOURCE_ORDER, [now, topic_id]),
+    "ix_topic_created_at_id": pages(select(topics.Topic), topics.TOPIC_ORDER, [now, topic_id]),
+    "ix_topic_parent_id_order_index": [topics.topic_children(topic_id)],
+    "ix_note_topic_id": [select(Note).where(Note.topic_id == topic_id)],
+    "ix_link_source_id": [select(Link).where(Link.source_id == topic_id)],
+    "ix_link_target_id": [select(Link).where(Link.target_id == topic_id)],
+    "ix_job_status_run_after": [due_jobs(now)],
+}
+
+@pytest.mark.parametrize("index_name", QUERIES)
+def test_lookups_use_indexes(session: Session, index_name):
+    for statement in QUERIES[index_name]:
+        plan = query_plan(session, statement)
+        assert f"INDEX {index_name}" in plan, plan
+        # Ordered lookups are served by the index order, without a sort step
+        assert "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,116 @@
+import io
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import ContentStream, DictionaryObject, NameObject
+from app.services import ingest, pdf_extract
+
+def make_pdf(page_texts):
+    writer = PdfWriter()
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    })
+    for text in page_texts:
+        page = writer.add_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): writer._add_object(font)}),
+        })
+        stream = ContentStream(None, writer)
+        stream.set_data(f"BT /F1 12 Tf 72 712 Td ({text}) Tj ET".encode())
+        page.replace_contents(stream)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+def test_page_ranges():
+    assert pdf_extract.page_ranges(0, 50) == []
+    assert pdf_extract.page_ranges(120, 50) == [(0, 50), (50, 100), (100, 120)]
+
+@pytest.mark.asyncio
+async def test_extract_pdf_pages_in_parallel_ranges(monkeypatch):
+    monkeypatch.setattr(ingest, "PDF_PAGES_PER_TASK", 2)
+    content = make_pdf([f"Page {i}" for i in range(5)])
+    try:
+        pages = await ingest.extract_pdf_pages(content)
+        text = await ingest.extract_text_from_pdf(content)
+        assert ingest._pool()._mp_context.get_start_method() == "spawn"
+    finally:
+        ingest.shutdown_pdf_pool()
+    assert [p.strip() for p in pages] == [f"Page {i}" for i in range(5)]
+    assert text.splitlines()[0] == "Page 0" and text.endswith("Page 4")
+
+@pytest.mark.asyncio
+async def test_blank_first_page_keeps_page_numbers(monkeypatch):
+    async def pages(source):
+        return ["", "  Intro text here\n", "Chapter two"]
+    monkeypatch.setattr(ingest, "extract_pdf_pages", pages)
+    text = await ingest.extract_text_from_pdf(b"")
+    assert text == "\fIntro text here\fChapter two"
+    chunks = ingest.chunk_text(text, paged=True, max_tokens=4, overlap_tokens=0)
+    intro = next(c for c in chunks if "Intro" in c.content)
+    assert intro.page_start == 2
+    assert chunks[-1].page_end == 3
+
+def paragraphs(n, tag="p"):
+    return "\n".join(f"{tag} {i}: " + "lorem ipsum dolor sit amet " * 8 for i in range(n))
+
+def test_chunk_text_offsets_overlap_and_pages():
+    pages = [paragraphs(10, f"page{n}") for n in range(3)]
+    text = ingest.PAGE_BREAK.join(pages)
+    chunks = ingest.chunk_text(text, paged=True, max_tokens=200, overlap_tokens=40)
+
+    assert len(chunks) > 3
+    assert chunks[0].start == 0 and chunks[-1].end == len(text)
+    for prev, chunk in zip(chunks, chunks[1:]):
+        assert chunk.content == text[chunk.start:chunk.end]
+        assert chunk.token_count <= 200
+        assert chunk.start < prev.end  # overlaps the previous chunk
+        assert chunk.start >= prev.start
+    assert chunks[0].page_start == 1
+    assert chunks[-1].page_end == 3
+    assert all(c.content.count(ingest.PAGE_BREAK) == c.page_end - c.page_start for c in chunks)
+
+def test_sync_chunks_is_incremental(session):
+    from sqlmodel import select
+    from app.models import Resource, ResourceChunk, ResourceType, Topic
+    topic = Topic(title="T")
+    session.add(topic)
+    original = paragraphs(80)
+    resource = Resource(topic_id=topic.id, type=ResourceType.URL, path_or_url="http://x", raw_content=original)
+    session.add(resource)
+
+    first = ingest.sync_chunks(session, resource)
+    session.commit()
+    rows = session.exec(select(ResourceChunk).order_by(ResourceChunk.chunk_index)).all()
+    assert first == len(rows) > 3
+    last_ids = {r.id for r in rows[-2:]}
+
+    # Editing the start only rewrites the chunks around the edit
+    resource.raw_content = "A new opening line.\n" + original
+    rewritten = ingest.sync_chunks(session, resource)
+    session.commit()
+    rows = session.exec(select(ResourceChunk).order_by(ResourceChunk.chunk_index)).all()
+    assert 0 < rewritten < len(rows)
+    assert last_ids <= {r.id for r in rows}
+    assert "".join(r.content for r in rows).startswith("A new opening line.")
+    assert [r.chunk_index for r in rows] == list(range(len(rows)))
+
+def test_chunk_ids_are_never_reused(session):
+    from sqlmodel import select
+    from app.models import Resource, ResourceChunk, ResourceType, Topic
+    topic = Topic(title="T")
+    first = Resource(topic_id=topic.id, type=ResourceType.URL, path_or_url="http://x", raw_content=paragraphs(40))
+    second = Resource(topic_id=topic.id, type=ResourceType.URL, path_or_url="http://y", raw_content="Other text.")
+    session.add_all([topic, first, second])
+    ingest.sync_chunks(session, first)
+    session.commit()
+    rows = session.exec(select(ResourceChunk).order_by(ResourceChunk.id)).all()
+
+    # The last chunk goes away, then another resource is chunked before anything re-indexes
+    session.delete(rows[-1])
+    session.commit()
+    ingest.sync_chunks(session, second)
+    session.commit()
+    new = session.exec(select(ResourceChunk).where(ResourceChunk.resource_id == second.id)).one()
+    assert new.id > rows[-1].id
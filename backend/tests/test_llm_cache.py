@@ -0,0 +1,87 @@
+import json
+import threading
+import pytest
+from app.services import llm as llm_module
+from app.services.llm import LLMService
+from app.services.llm_cache import LLMCache
+from app.services.providers import LLMProvider, GenerationRequest, GenerationResult
+
+def test_cache_memory_and_disk_tiers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = LLMCache(path=path, memory_entries=1)
+    key_a = cache.make_key("m", "prompt a")
+    key_b = cache.make_key("m", "prompt b")
+
+    assert cache.get(key_a) is None
+    cache.set(key_a, "answer a")
+    cache.set(key_b, "answer b")  # evicts a from the memory tier
+
+    assert cache.get(key_b) == "answer b"
+    assert cache.get(key_a) == "answer a"  # served from SQLite
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+    # A fresh instance on the same file still sees the entries
+    assert LLMCache(path=path).get(key_b) == "answer b"
+
+def test_cache_ttl_and_key(tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.db"), ttl_seconds=-1)
+    key = cache.make_key("m", "p", {"response_mime_type": "application/json"})
+    assert key != cache.make_key("m", "p")
+    assert key != cache.make_key("other", "p", {"response_mime_type": "application/json"})
+
+    cache.set(key, "stale")
+    assert cache.get(key) is None
+
+@pytest.mark.asyncio
+async def test_disk_hits_run_off_the_loop_without_rewriting(tmp_path):
+    path = str(tmp_path / "cache.db")
+    key = LLMCache.make_key("m", "prompt")
+    LLMCache(path=path).set(key, "answer")
+
+    cache = LLMCache(path=path, memory_entries=0)  # Every hit goes to disk
+    threads = []
+    get_disk = cache._get_disk
+
+    def spy(*args):
+        threads.append(threading.current_thread())
+        return get_disk(*args)
+
+    cache._get_disk = spy
+    assert await cache.aget(key) == "answer"
+    assert await cache.aget(key) == "answer"
+    assert len(threads) == 2 and threading.main_thread() not in threads
+    # Entries touched within touch_interval are read without a write
+    assert cache._conn.total_changes == 0
+
+    cache.touch_interval = 0
+    assert await cache.aget(key) == "answer"
+    assert cache._conn.total_changes == 1
+
+class CountingProvider(LLMProvider):
+    name = "counting"
+    default_model = "counting-model"
+    remote = False
+
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        self.calls += 1
+        return GenerationResult(text=f'{{"n": {self.calls}}}')
+
+@pytest.mark.asyncio
+async def test_generate_uses_cache_and_bypass(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_module, "llm_cache", LLMCache(path=str(tmp_path / "cache.db")))
+    provider = CountingProvider()
+    service = LLMService(provider=provider)
+
+    first = await service._generate("same prompt", parse=json.loads)
+    second = await service._generate("same prompt", parse=json.loads)
+    assert first == second == {"n": 1}
+    assert provider.calls == 1
+
+    fresh = await service._generate("same prompt", parse=json.loads, use_cache=False)
+    assert fresh == {"n": 2}
+    assert await service._generate("same prompt", parse=json.loads) == {"n": 2}
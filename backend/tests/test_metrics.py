@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from app import metrics
+from app.models import Topic
+
+def test_metrics_endpoint_reports_requests_and_db_queries(client: TestClient, session: Session):
+    topic = Topic(title="Measured", description="Desc")
+    session.add(topic)
+    session.commit()
+
+    client.get("/health")
+    client.get(f"/topics/{topic.id}")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    # Labelled by route template, not the concrete id
+    assert 'route="/topics/{topic_id}"' in body
+    assert str(topic.id) not in body
+    assert metrics.HTTP_REQUEST_DB_QUERIES.count(route="/topics/{topic_id}") >= 1
+    assert 'db_queries_total{operation="SELECT"}' in body
+
+def test_histogram_rendering():
+    histogram = metrics.Histogram("test_latency_seconds", "Test histogram.", buckets=(0.1, 1))
+    histogram.observe(0.05, kind="a")
+    histogram.observe(0.5, kind="a")
+    lines = histogram.render()
+    metrics.registry.remove(histogram)
+
+    assert 'test_latency_seconds_bucket{kind="a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{kind="a",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{kind="a",le="+Inf"} 2' in lines
+    assert 'test_latency_seconds_count{kind="a"} 2' in lines
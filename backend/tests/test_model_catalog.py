@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.services.model_catalog import ModelCatalog
+
+@pytest.mark.asyncio
+async def test_catalog_serves_stale_and_survives_failed_refresh():
+    catalog = ModelCatalog(ttl_seconds=0)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("provider down")
+        return [{"name": "m1", "display_name": "M1"}]
+
+    assert await catalog.get(loader) == [{"name": "m1", "display_name": "M1"}]
+
+    # Stale: returned immediately, refresh happens in the background and fails
+    assert await catalog.get(loader) == [{"name": "m1", "display_name": "M1"}]
+    await catalog.schedule_refresh(loader)
+    assert catalog.last_error == "provider down"
+    assert await catalog.get(loader) == [{"name": "m1", "display_name": "M1"}]
+
+    # While backing off from the failure, page loads don't hit the provider again
+    for _ in range(3):
+        await catalog.get(loader)
+        await asyncio.sleep(0)
+    assert len(calls) == 2
+    catalog.failure_backoff_seconds = 0
+    await catalog.get(loader)
+    await catalog.schedule_refresh(loader)
+    assert len(calls) == 3
+
+@pytest.mark.asyncio
+async def test_catalog_backs_off_after_failed_first_load():
+    catalog = ModelCatalog(ttl_seconds=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        raise RuntimeError("provider down")
+
+    assert await catalog.get(loader) == []
+    assert await catalog.get(loader) == []
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_catalog_shares_first_load():
+    catalog = ModelCatalog(ttl_seconds=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [{"name": "m1", "display_name": "M1"}]
+
+    await asyncio.gather(*[catalog.get(loader) for _ in range(5)])
+    assert len(calls) == 1
+
+def test_models_endpoint(client: TestClient):
+    response = client.get("/topics/models")
+    assert response.status_code == 200
+    assert all("name" in m for m in response.json())
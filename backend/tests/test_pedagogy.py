@@ -0,0 +1,97 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+from app import metrics
+from app.models import Topic, Concept, Activity
+
+def make_topic_with_concepts(session: Session, n: int) -> tuple[Topic, list[Concept]]:
+    topic = Topic(title="Batch Topic", description="Desc")
+    session.add(topic)
+    concepts = [Concept(topic_id=topic.id, title=f"Concept {i}", order_index=i) for i in range(n)]
+    session.add_all(concepts)
+    session.commit()
+    return topic, concepts
+
+def test_generate_activities_batch_for_topic(client: TestClient, session: Session):
+    topic, concepts = make_topic_with_concepts(session, 3)
+
+    response = client.post("/activities/generate/batch", json={"topic_id": str(topic.id)})
+    assert response.status_code == 200
+    data = response.json()
+    assert {a["concept_id"] for a in data["activities"]} == {str(c.id) for c in concepts}
+    assert len(session.exec(select(Activity)).all()) == len(data["activities"])
+    assert [c["concept_id"] for c in data["concepts"]] == [str(c.id) for c in concepts]
+    assert all(c["status"] == "generated" and c["activity_count"] > 0 for c in data["concepts"])
+
+def test_generate_activities_batch_for_selected_concepts(client: TestClient, session: Session):
+    topic, concepts = make_topic_with_concepts(session, 3)
+
+    response = client.post(
+        "/activities/generate/batch",
+        json={"topic_id": str(topic.id), "concept_ids": [str(concepts[1].id)]}
+    )
+    assert response.status_code == 200
+    assert {a["concept_id"] for a in response.json()["activities"]} == {str(concepts[1].id)}
+
+    other_topic, other_concepts = make_topic_with_concepts(session, 1)
+    response = client.post(
+        "/activities/generate/batch",
+        json={"topic_id": str(topic.id), "concept_ids": [str(other_concepts[0].id)]}
+    )
+    assert response.status_code == 404
+
+def test_generate_activities_batch_reports_failed_concepts(client: TestClient, session: Session):
+    from app.routers import pedagogy
+    topic, concepts = make_topic_with_concepts(session, 3)
+
+    async def generate(concept_title, **kwargs):
+        if concept_title == "Concept 0":
+            raise RuntimeError("model timed out")
+        if concept_title == "Concept 1":
+            return [{"type": "read"}]  # No instructions
+        return [{"type": "read", "instructions": "Read it"}]
+
+    failures = {r: metrics.ACTIVITY_GENERATION_FAILURES.value(reason=r) for r in ("llm", "malformed")}
+    with patch.object(pedagogy.llm_service, "generate_activities", side_effect=generate):
+        data = client.post("/activities/generate/batch", json={"topic_id": str(topic.id)}).json()
+    assert {r: metrics.ACTIVITY_GENERATION_FAILURES.value(reason=r) - n for r, n in failures.items()} == {"llm": 1, "malformed": 1}
+    assert [a["concept_id"] for a in data["activities"]] == [str(concepts[2].id)]
+    statuses = [(c["status"], c["activity_count"]) for c in data["concepts"]]
+    assert statuses == [("failed", 0), ("failed", 0), ("generated", 1)]
+    assert "model timed out" in data["concepts"][0]["error"]
+    assert "instructions" in data["concepts"][1]["error"]
+
+def test_coalesced_generation_reads_through_each_callers_session(session: Session):
+    from app.routers import pedagogy
+    topic, _ = make_topic_with_concepts(session, 0)
+
+    async def slow(**kwargs):
+        await asyncio.sleep(0.01)
+        return [{"title": "Shared", "description": "Generated once", "order_index": 1}]
+
+    async def both(first: Session, second: Session):
+        return await asyncio.gather(
+            pedagogy.generate_concepts(topic_id=topic.id, model_name=None, session=first),
+            pedagogy.generate_concepts(topic_id=topic.id, model_name=None, session=second),
+        )
+
+    with patch.object(pedagogy.llm_service, "generate_concepts", side_effect=slow) as mock_generate, \
+         Session(session.get_bind()) as first, Session(session.get_bind()) as second:
+        a, b = asyncio.run(both(first, second))
+        assert mock_generate.call_count == 1
+        assert [c.id for c in a] == [c.id for c in b] and a[0].title == "Shared"
+        # Each caller gets instances of its own session, never the other request's
+        assert all(c in first for c in a) and all(c in second for c in b)
+
+def test_invented_activity_types_fall_back_to_read(client: TestClient, session: Session):
+    from app.routers import pedagogy
+    _, concepts = make_topic_with_concepts(session, 1)
+    generated = [
+        {"type": "exercise", "instructions": "Try it"},
+        {"type": "Quiz ", "instructions": "Answer", "content": {"question": "?"}},
+    ]
+    with patch.object(pedagogy.llm_service, "generate_activities", new_callable=AsyncMock, return_value=generated):
+        response = client.post("/activities/generate", json={"concept_id": str(concepts[0].id)})
+    assert response.status_code == 200
+    assert [a["type"] for a in response.json()] == ["read", "quiz"]
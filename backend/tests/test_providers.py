@@ -0,0 +1,86 @@
+import json
+import random
+import asyncio
+import httpx
+import pytest
+from app.services import llm as llm_module
+from app.services.llm import LLMService
+from app.services.llm_cache import LLMCache
+from app.services.providers import get_provider, MockProvider, GenerationRequest, ProviderError
+from app.services.providers.http import HTTPProvider
+from app.services.providers.standin_server import create_app, StandinConfig, LatencyDistribution
+
+def standin_provider(**config) -> HTTPProvider:
+    options = dict(seed=7, latency="fixed:0", token_latency="fixed:0")
+    options.update(config)
+    provider = HTTPProvider(base_url="http://standin")
+    provider._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_app(StandinConfig(**options))), base_url="http://standin"
+    )
+    provider._loop = asyncio.get_running_loop()
+    return provider
+
+def test_provider_selection(monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    assert isinstance(get_provider(), MockProvider)
+    assert isinstance(get_provider("http"), HTTPProvider)
+    # Load tests against the stand-in must reach it on every call
+    assert not get_provider("http").cacheable
+    monkeypatch.setenv("LLM_HTTP_CACHE", "1")
+    assert get_provider("http").cacheable
+    with pytest.raises(ValueError):
+        get_provider("nope")
+
+def test_provider_interface_is_abstract():
+    from app.services.providers import LLMProvider
+    with pytest.raises(TypeError):
+        LLMProvider()
+
+@pytest.mark.asyncio
+async def test_http_provider_transport_errors_and_close():
+    def refuse(request: httpx.Request):
+        raise httpx.ConnectError("connection refused")
+
+    provider = HTTPProvider(base_url="http://down")
+    provider._client = httpx.AsyncClient(transport=httpx.MockTransport(refuse), base_url="http://down")
+    provider._loop = asyncio.get_running_loop()
+    client = provider._client
+    # Same mapping as generate, so the resilience layer classifies it as retryable
+    with pytest.raises(ConnectionError):
+        await provider.list_models()
+    await provider.aclose()
+    assert client.is_closed and provider._client is None
+
+@pytest.mark.asyncio
+async def test_standin_is_deterministic_and_shaped():
+    request = GenerationRequest(model="standin-model", prompt="syllabus for Rust", prompt_type="syllabus", params={"topic": "Rust"})
+    first = await standin_provider().generate(request)
+    second = await standin_provider().generate(request)
+    assert first.text == second.text
+    assert json.loads(first.text)["title"] == "Rust"
+    assert first.completion_tokens > 0
+
+    other_seed = await standin_provider(seed=8).generate(request)
+    assert other_seed.text != first.text
+
+@pytest.mark.asyncio
+async def test_standin_streaming_and_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_module, "llm_cache", LLMCache(path=str(tmp_path / "cache.db")))
+    service = LLMService(provider=standin_provider())
+    tokens = [t async for t in service.stream_chat_with_topic("Rust", "", "Why?", use_cache=False)]
+    assert len(tokens) > 1
+    assert "".join(tokens) == "Mock answer to 'Why?' regarding Rust."
+
+    failing = standin_provider(failure_rate=1.0)
+    with pytest.raises(ProviderError) as exc:
+        await failing.generate(GenerationRequest(model="standin-model", prompt="p"))
+    assert exc.value.code == 503
+
+def test_latency_distributions():
+    rng = random.Random(0)
+    assert LatencyDistribution("fixed:0.25").sample(rng) == 0.25
+    assert 0.1 <= LatencyDistribution("uniform:0.1,0.2").sample(rng) <= 0.2
+    assert LatencyDistribution("lognormal:1.0,0.5").sample(rng) > 0
+    with pytest.raises(ValueError):
+        LatencyDistribution("normal:1.0")
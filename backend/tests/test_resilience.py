@@ -0,0 +1,157 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+from app import metrics
+from app.services.resilience import (
+    LLMResilience, TokenBucket, LLMRateLimitedError, LLMUnavailableError
+)
+
+class ProviderError(Exception):
+    def __init__(self, code):
+        super().__init__(f"provider returned {code}")
+        self.code = code
+
+def make_resilience(**kwargs) -> LLMResilience:
+    options = dict(rate_per_minute=6000, burst=100, max_wait=1, attempts=3, base_delay=0, max_delay=0,
+                   failure_threshold=2, reset_timeout=60)
+    options.update(kwargs)
+    return LLMResilience(**options)
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors():
+    resilience = make_resilience()
+    calls = []
+    retried = metrics.LLM_FAILED_ATTEMPTS.value(model="flaky-m", reason="unavailable", retried="true")
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ProviderError(503)
+        return "ok"
+
+    assert await resilience.call("flaky-m", flaky) == "ok"
+    assert len(calls) == 3
+    assert metrics.LLM_FAILED_ATTEMPTS.value(model="flaky-m", reason="unavailable", retried="true") == retried + 2
+    assert resilience.breaker("flaky-m").state == "closed"
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_fails_fast():
+    resilience = make_resilience()
+    calls = []
+
+    async def down():
+        calls.append(1)
+        raise ProviderError(503)
+
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            await resilience.call("m", down)
+    assert resilience.breaker("m").state == "open"
+
+    calls.clear()
+    with pytest.raises(LLMUnavailableError):
+        await resilience.call("m", down)
+    assert calls == []
+
+    # Other models are unaffected
+    async def up():
+        return "ok"
+    assert await resilience.call("other", up) == "ok"
+
+@pytest.mark.asyncio
+async def test_quota_errors_and_bad_requests():
+    resilience = make_resilience()
+
+    async def quota():
+        raise ProviderError(429)
+
+    with pytest.raises(LLMRateLimitedError):
+        await resilience.call("m", quota)
+    assert resilience.breaker("m").state == "closed"
+
+    async def bad_request():
+        raise ProviderError(400)
+
+    with pytest.raises(ProviderError):
+        await resilience.call("m", bad_request)
+
+@pytest.mark.asyncio
+async def test_token_bucket_rejects_long_waits():
+    bucket = TokenBucket(rate_per_minute=60, burst=1, max_wait=0.5)
+    await bucket.acquire()
+    with pytest.raises(LLMRateLimitedError) as exc:
+        await bucket.acquire()
+    assert exc.value.retry_after > 0.5
+
+def test_llm_errors_become_structured_responses(client: TestClient):
+    error = LLMRateLimitedError("LLM quota exhausted", retry_after=2.5)
+    with patch("app.routers.topics.llm_service.generate_syllabus", new=AsyncMock(side_effect=error)):
+        response = client.post("/topics/generate?prompt=Busy")
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "3"
+    assert response.json() == {"detail": "LLM quota exhausted", "retry_after": 2.5}
+
+@pytest.mark.asyncio
+async def test_streams_wait_and_back_off_without_a_scheduler_slot():
+    from app.services import llm
+    from app.services.providers import LLMProvider
+
+    class FlakyStream(LLMProvider):
+        name, default_model, cacheable = "flaky", "m", False
+        attempts = 0
+
+        async def generate(self, request):
+            raise NotImplementedError
+
+        async def stream(self, request):
+            FlakyStream.attempts += 1
+            if FlakyStream.attempts < 3:
+                raise ProviderError(503)
+            yield "ok"
+
+    resilience = make_resilience(base_delay=0.01, max_delay=0.01)
+    held_while_waiting = []
+    acquire, sleep = TokenBucket.acquire, llm.asyncio.sleep
+
+    async def spy_acquire(bucket):
+        held_while_waiting.append(llm.scheduler.in_flight)
+        await acquire(bucket)
+
+    async def spy_sleep(delay):
+        held_while_waiting.append(llm.scheduler.in_flight)
+        await sleep(delay)
+
+    with patch.object(llm, "resilience", resilience), \
+         patch.object(TokenBucket, "acquire", spy_acquire), \
+         patch("app.services.resilience.asyncio.sleep", spy_sleep):
+        chunks = [chunk async for chunk in llm.LLMService(provider=FlakyStream())._stream("prompt")]
+    assert chunks == ["ok"]
+    # Three rate-limit checks and two backoffs, none of them holding a slot
+    assert held_while_waiting == [0] * 5
+    assert llm.scheduler.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_abandoned_streams_close_the_provider_stream():
+    from app.services import llm
+    from app.services.providers import LLMProvider
+
+    class Endless(LLMProvider):
+        name, default_model, remote, cacheable = "endless", "m", False, False
+        closed = False
+
+        async def generate(self, request):
+            raise NotImplementedError
+
+        async def stream(self, request):
+            try:
+                while True:
+                    yield "chunk"
+            finally:
+                Endless.closed = True
+
+    # The consumer goes away after the first chunk, like a disconnected SSE client
+    stream = llm.LLMService(provider=Endless())._stream("prompt")
+    assert await anext(stream) == "chunk"
+    await stream.aclose()
+    assert Endless.closed
+    assert llm.scheduler.in_flight == 0
@@ -1,7 +1,11 @@
-from unittest.mock import patch
+import asyncio
+import uuid
+import pytest
+from unittest.mock import AsyncMock, patch
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 from app.models import Topic
+from app.services.jobs import job_queue
 
 def test_add_url_resource(client: TestClient, session: Session):
     topic = Topic(title="Test Topic", description="Desc")
@@ -9,7 +13,7 @@ def test_add_url_resource(client: TestClient, session: Session):
     session.commit()
     session.refresh(topic)
 
-    with patch("app.routers.resources.ingest.extract_text_from_url") as mock_extract:
+    with patch("app.routers.resources.ingest.extract_text_from_url", new_callable=AsyncMock) as mock_extract:
         mock_extract.return_value = "Mock content from URL."
         
         response = client.post(
@@ -17,11 +21,54 @@ def test_add_url_resource(client: TestClient, session: Session):
             params={"topic_id": str(topic.id), "url": "http://example.com"}
         )
         
-        assert response.status_code == 200
+        assert response.status_code == 202
         data = response.json()
-        assert data["type"] == "url"
-        assert data["topic_id"] == str(topic.id)
-        assert "Mock content" in data["raw_content"]
+        assert data["resource"]["type"] == "url"
+        assert data["resource"]["topic_id"] == str(topic.id)
+        assert data["resource"]["summary_status"] == "pending"
+        mock_extract.assert_not_called()
+
+        asyncio.run(job_queue.run_until_idle())
+
+    job = client.get(f"/jobs/{data['job_id']}").json()
+    assert job["status"] == "succeeded"
+    assert job["stage"] == "done"
+
+    resources = client.get(f"/resources/topic/{topic.id}").json()
+    assert resources[0]["summary_status"] == "completed"
+    detail = client.get(f"/resources/{resources[0]['id']}").json()
+    assert "Mock content" in detail["raw_content"]
+
+def test_ingest_job_retries_then_fails(client: TestClient, session: Session, monkeypatch):
+    monkeypatch.setattr(job_queue, "retry_base_delay", 0)
+    topic = Topic(title="Flaky", description="Desc")
+    session.add(topic)
+    session.commit()
+
+    with patch("app.routers.resources.ingest.extract_text_from_url", new_callable=AsyncMock) as mock_extract:
+        mock_extract.side_effect = RuntimeError("connection reset")
+        data = client.post(
+            "/resources/add/url", params={"topic_id": str(topic.id), "url": "http://example.com/down"}
+        ).json()
+        asyncio.run(job_queue.run_until_idle())
+
+    assert mock_extract.call_count == 3
+    job = client.get(f"/jobs/{data['job_id']}").json()
+    assert job["status"] == "failed"
+    assert job["attempts"] == 3
+    assert "connection reset" in job["error"]
+    resources = client.get(f"/resources/topic/{topic.id}").json()
+    assert resources[0]["summary_status"] == "failed"
+
+def test_interrupted_jobs_are_recovered(client: TestClient, session: Session):
+    from app.models import Job, JobStatus
+    job = Job(kind="ingest_resource", status=JobStatus.RUNNING, attempts=1)
+    session.add(job)
+    session.commit()
+
+    assert job_queue.recover() == 1
+    session.refresh(job)
+    assert job.status == JobStatus.QUEUED
 
 def test_get_resources(client: TestClient, session: Session):
     topic = Topic(title="Test Topic 2", description="Desc")
@@ -46,3 +93,202 @@ def test_get_resources(client: TestClient, session: Session):
     data = response.json()
     assert len(data) == 1
     assert data[0]["id"] == str(res.id)
+    assert "raw_content" not in data[0]
+    assert "X-Next-Cursor" not in response.headers
+
+    detail = client.get(f"/resources/{res.id}")
+    assert detail.json()["raw_content"] == "Content"
+    assert client.get(f"/resources/{uuid.uuid4()}").status_code == 404
+
+def test_resource_listing_pages_by_cursor(client: TestClient, session: Session):
+    from datetime import datetime
+    from app.models import Resource, ResourceType
+    topic = Topic(title="Paged")
+    session.add(topic)
+    # Several rows share a timestamp, so the id has to break ties
+    stamps = [datetime(2024, 1, 1 + i // 3) for i in range(7)]
+    session.add_all(
+        Resource(topic_id=topic.id, type=ResourceType.TEXT, path_or_url=f"r{i}", raw_content="x", created_at=at)
+        for i, at in enumerate(stamps)
+    )
+    session.commit()
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get(f"/resources/topic/{topic.id}", params=params)
+        assert response.status_code == 200
+        seen += response.json()
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        # Rows inserted before the cursor mid-iteration must not shift later pages
+        session.add(Resource(topic_id=topic.id, type=ResourceType.TEXT, path_or_url="late", created_at=datetime(2023, 1, 1)))
+        session.commit()
+
+    assert pages == 3
+    assert len(seen) == 7 and len({r["id"] for r in seen}) == 7
+    keys = [(r["created_at"], r["id"]) for r in seen]
+    assert keys == sorted(keys)
+    assert client.get(f"/resources/topic/{topic.id}", params={"cursor": "garbage"}).status_code == 400
+    # Well-formed JSON with the wrong value types is a bad cursor too, not a server error
+    from app.pagination import encode_cursor
+    for values in (["2024-01-01T00:00:00", 123], [None, "x"], [["a"], {"b": 1}]):
+        assert client.get("/topics/", params={"cursor": encode_cursor(values)}).status_code == 400
+
+def test_upload_pdf_dedupes_by_content_hash(client: TestClient, session: Session, tmp_path, monkeypatch):
+    from app.routers import resources
+    from app.services.blobstore import BlobStore
+    monkeypatch.setattr(resources, "blob_store", BlobStore(root=str(tmp_path / "uploads")))
+
+    first = Topic(title="First", description="Desc")
+    second = Topic(title="Second", description="Desc")
+    session.add(first)
+    session.add(second)
+    session.commit()
+
+    def upload(topic_id):
+        return client.post(
+            "/resources/upload/pdf",
+            data={"topic_id": str(topic_id)},
+            files={"file": ("book.pdf", b"%PDF-1.4 fake", "application/pdf")},
+        )
+
+    with patch("app.routers.resources.ingest.extract_text_from_pdf", new_callable=AsyncMock) as mock_extract:
+        mock_extract.return_value = "Extracted book text."
+        a = upload(first.id)
+        asyncio.run(job_queue.run_until_idle())
+        b = upload(second.id)
+        c = upload(second.id)
+
+    assert [r.status_code for r in (a, b, c)] == [202, 200, 200]
+    a, b, c = (r.json()["resource"] for r in (a, b, c))
+    assert mock_extract.call_count == 1
+    assert a["title"] == "book.pdf"
+    assert a["path_or_url"] == b["path_or_url"]
+    assert a["path_or_url"].startswith(str(tmp_path / "uploads"))
+    assert b["raw_content"] == "Extracted book text." and b["topic_id"] == str(second.id)
+    assert b["summary_status"] == "completed"
+    assert c["id"] == b["id"]
+
+def test_save_upload_does_file_work_off_the_event_loop(tmp_path):
+    import hashlib
+    import io
+    import os
+    import threading
+    from fastapi import UploadFile
+    from app.services import blobstore
+    store = blobstore.BlobStore(root=str(tmp_path / "uploads"), chunk_bytes=4, max_bytes=64)
+    threads = []
+    append = blobstore._append
+
+    def spy(*args):
+        threads.append(threading.current_thread())
+        append(*args)
+
+    with patch.object(blobstore, "_append", side_effect=spy):
+        blob = asyncio.run(store.save_upload(UploadFile(io.BytesIO(b"%PDF-1.4 chunked")), extension=".pdf"))
+    assert len(threads) == 4 and threading.main_thread() not in threads
+    assert blob.sha256 == hashlib.sha256(b"%PDF-1.4 chunked").hexdigest() and blob.created
+    assert open(blob.path, "rb").read() == b"%PDF-1.4 chunked"
+
+    with pytest.raises(blobstore.BlobTooLargeError):
+        asyncio.run(store.save_upload(UploadFile(io.BytesIO(b"x" * 65))))
+    # Nothing left behind but the stored blob
+    assert [n for _, _, names in os.walk(store.root) for n in names] == [os.path.basename(blob.path)]
+
+def test_bulk_ingest(client: TestClient, session: Session, tmp_path, monkeypatch):
+    from app.routers import resources
+    from app.services.blobstore import BlobStore
+    monkeypatch.setattr(resources, "blob_store", BlobStore(root=str(tmp_path / "uploads")))
+    monkeypatch.setattr(job_queue, "retry_base_delay", 0)
+    topic = Topic(title="Seeded", description="Desc")
+    session.add(topic)
+    session.commit()
+
+    async def fake_fetch(url):
+        if "broken" in url:
+            raise RuntimeError("404 Not Found")
+        return f"Text of {url}"
+
+    book = ("files", ("book.pdf", b"%PDF-1.4 bulk", "application/pdf"))
+    with patch("app.routers.resources.ingest.extract_text_from_url", side_effect=fake_fetch) as mock_url, \
+         patch("app.routers.resources.ingest.extract_text_from_pdf", new_callable=AsyncMock) as mock_pdf:
+        mock_pdf.return_value = "Book text."
+        response = client.post(
+            "/resources/bulk",
+            data={
+                "topic_id": str(topic.id),
+                "urls": ["http://a.example", "http://b.example/broken", "http://a.example"],
+            },
+            files=[book, ("files", ("copy.pdf", b"%PDF-1.4 bulk", "application/pdf"))],
+        )
+        assert response.status_code == 202
+        data = response.json()
+        # Nothing is fetched or extracted inside the request
+        mock_url.assert_not_called()
+        mock_pdf.assert_not_called()
+        asyncio.run(job_queue.run_until_idle())
+
+    statuses = {(item["source"], item["status"]) for item in data["items"]}
+    assert statuses == {
+        ("book.pdf", "queued"),
+        ("copy.pdf", "duplicate"),
+        ("http://a.example", "queued"),
+        ("http://b.example/broken", "queued"),
+        ("http://a.example", "duplicate"),
+    }
+    ids = {item["source"]: item["resource_id"] for item in data["items"]}
+    # Duplicates point at the resource being ingested, which exists
+    assert ids["copy.pdf"] == ids["book.pdf"]
+    assert client.get(f"/resources/{ids['copy.pdf']}").status_code == 200
+    assert data["items"][-1]["resource_id"] == ids["http://a.example"]
+
+    job = client.get(f"/jobs/{data['job_id']}").json()
+    assert job["status"] == "failed" and "404 Not Found" in job["error"]
+    # Retries only re-fetched the broken URL
+    assert mock_pdf.call_count == 1 and mock_url.call_count == 4
+
+    stored = {r["path_or_url"]: r for r in client.get(f"/resources/topic/{topic.id}").json()}
+    assert len(stored) == 3
+    assert stored["http://b.example/broken"]["summary_status"] == "failed"
+    done = [r for url, r in stored.items() if "broken" not in url]
+    assert all(r["summary_status"] == "completed" and r["content_summary"] for r in done)
+    assert client.get(f"/resources/{ids['book.pdf']}").json()["raw_content"] == "Book text."
+
+def test_reingest_updates_chunks_and_skips_unchanged_summary(client: TestClient, session: Session):
+    from sqlmodel import select
+    from app.models import ResourceChunk
+    from app.routers import resources
+    topic = Topic(title="Refresh", description="Desc")
+    session.add(topic)
+    session.commit()
+
+    with patch("app.routers.resources.ingest.extract_text_from_url", new_callable=AsyncMock) as mock_extract, \
+         patch.object(resources.llm_service, "summarize_text", new_callable=AsyncMock) as mock_summary:
+        mock_extract.return_value = "Some page text.\nSecond line."
+        mock_summary.return_value = "Summary."
+        resource_id = client.post(
+            "/resources/add/url", params={"topic_id": str(topic.id), "url": "http://example.com/r"}
+        ).json()["resource"]["id"]
+        asyncio.run(job_queue.run_until_idle())
+        assert len(session.exec(select(ResourceChunk)).all()) == 1
+
+        first = client.post(f"/resources/{resource_id}/reingest")
+        assert first.status_code == 202
+        assert first.json()["resource"]["summary_status"] == "pending"
+        # A second request while the first is queued joins it rather than racing it
+        assert client.post(f"/resources/{resource_id}/reingest").json()["job_id"] == first.json()["job_id"]
+        asyncio.run(job_queue.run_until_idle())
+        assert client.get(f"/resources/{resource_id}").json()["summary_status"] == "completed"
+        assert mock_extract.call_count == 2
+        assert mock_summary.call_count == 1
+
+        mock_extract.return_value = "Changed page text."
+        client.post(f"/resources/{resource_id}/reingest")
+        asyncio.run(job_queue.run_until_idle())
+        assert mock_summary.call_count == 2
+
+    chunks = session.exec(select(ResourceChunk)).all()
+    assert [c.content for c in chunks] == ["Changed page text."]
@@ -0,0 +1,88 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import Note, Resource, ResourceType, Topic
+from app.routers import topics
+from app.services import retrieval
+from app.services.retrieval import retrieve
+from app.services.vector_index import vector_index
+from tests.test_search import add_chunk
+
+
+def make_library(session: Session):
+    physics = Topic(title="Thermodynamics", description="Heat and work")
+    unit = Topic(title="Entropy", description="Disorder", parent_id=physics.id)
+    cooking = Topic(title="Cooking", description="Food")
+    book = Resource(topic_id=physics.id, type=ResourceType.PDF, path_or_url="/tmp/book.pdf", title="Statistical Physics")
+    recipes = Resource(topic_id=cooking.id, type=ResourceType.PDF, path_or_url="/tmp/recipes.pdf", title="Recipes")
+    session.add_all([physics, unit, cooking, book, recipes])
+    chunks = [
+        add_chunk(session, book, 0, "Entropy measures the number of microstates of a system."),
+        add_chunk(session, book, 1, "A heat engine converts heat into work."),
+        add_chunk(session, recipes, 0, "Entropy of a souffle: it always collapses."),
+    ]
+    session.add(Note(content="Entropy never decreases in an isolated system", topic_id=unit.id))
+    session.commit()
+    for resource in (book, recipes):
+        vector_index.sync_resource(
+            resource.id, [(c.id, c.content) for c in chunks if c.resource_id == resource.id]
+        )
+    return unit, book
+
+
+def test_retrieve_fuses_lineage_within_budget(client: TestClient, session: Session):
+    unit, book = make_library(session)
+
+    context = retrieve(session, unit.id, "What does entropy measure?", purpose="ask")
+    # The subtopic sees its own note and its parent's book, never another topic's resources
+    assert {p.kind for p in context.passages} == {"resource", "note"}
+    assert all(p.resource_id in (None, book.id) for p in context.passages)
+    assert context.passages[0].content.startswith("Entropy measures")
+    assert [p.score for p in context.passages] == sorted((p.score for p in context.passages), reverse=True)
+    rendered = context.render()
+    assert rendered.startswith("[1] Statistical Physics, p. 1\nEntropy measures")
+
+    small = retrieve(session, unit.id, "What does entropy measure?", purpose="ask", budget=context.passages[0].tokens)
+    assert len(small.passages) == 1 and small.tokens <= small.budget
+    assert retrieve(session, unit.id, "What does entropy measure?", purpose="ask", budget=0).render() == ""
+
+
+def test_ask_cites_retrieved_sources(client: TestClient, session: Session):
+    unit, book = make_library(session)
+
+    with patch.object(topics.llm_service, "chat_with_topic", new_callable=AsyncMock, return_value="See [1]") as chat:
+        data = client.post(f"/topics/{unit.id}/ask", json={"question": "What does entropy measure?"}).json()
+    assert data["answer"] == "See [1]"
+    assert data["sources"][0] == {
+        "kind": "resource", "id": data["sources"][0]["id"], "resource_id": str(book.id),
+        "title": "Statistical Physics", "page": 1,
+    }
+    assert "[1] Statistical Physics, p. 1" in chat.call_args.kwargs["sources"]
+
+    with client.stream("POST", f"/topics/{unit.id}/ask/stream", json={"question": "What does entropy measure?"}) as response:
+        body = "".join(response.iter_text())
+    first = body.split("\n\n")[0]
+    assert first.startswith("event: sources")
+    assert json.loads(first.split("data: ", 1)[1])["sources"] == data["sources"]
+
+
+def test_retrieval_runs_off_the_event_loop(client: TestClient, session: Session):
+    unit, _ = make_library(session)
+    loops = []
+
+    def spy(*args, **kwargs):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return retrieve(*args, **kwargs)
+
+    with patch.object(retrieval, "retrieve", side_effect=spy), \
+         patch.object(topics.llm_service, "chat_with_topic", new_callable=AsyncMock, return_value="See [1]"):
+        data = client.post(f"/topics/{unit.id}/ask", json={"question": "What does entropy measure?"}).json()
+    assert loops == [None]
+    assert data["sources"]
@@ -0,0 +1,26 @@
+import asyncio
+import pytest
+from app.services.scheduler import LLMScheduler
+
+async def _run(scheduler: LLMScheduler, model: str, peaks: dict):
+    async with scheduler.slot(model):
+        peaks["global"] = max(peaks["global"], scheduler.in_flight)
+        peaks[model] = peaks.get(model, 0) + 1
+        peaks[f"{model}_max"] = max(peaks.get(f"{model}_max", 0), peaks[model])
+        await asyncio.sleep(0.01)
+        peaks[model] -= 1
+
+@pytest.mark.asyncio
+async def test_scheduler_bounds_global_and_per_model():
+    scheduler = LLMScheduler(max_concurrency=3, max_per_model=2, model_limits={"slow": 1})
+    peaks = {"global": 0}
+
+    tasks = [_run(scheduler, "fast", peaks) for _ in range(6)]
+    tasks += [_run(scheduler, "slow", peaks) for _ in range(3)]
+    await asyncio.gather(*tasks)
+
+    assert peaks["global"] == 3
+    assert peaks["fast_max"] == 2
+    assert peaks["slow_max"] == 1
+    assert scheduler.in_flight == 0
+    assert scheduler.waiting == 0
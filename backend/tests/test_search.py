@@ -0,0 +1,90 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from app.models import Concept, Note, Resource, ResourceChunk, ResourceType, Topic
+from app.services.search import build_match_query
+
+
+def add_chunk(session: Session, resource: Resource, index: int, content: str) -> ResourceChunk:
+    chunk = ResourceChunk(
+        resource_id=resource.id, chunk_index=index, content=content, start_offset=0,
+        end_offset=len(content), page_start=index + 1, page_end=index + 1, token_count=len(content) // 4,
+        content_hash=str(index),
+    )
+    session.add(chunk)
+    return chunk
+
+
+def test_build_match_query():
+    assert build_match_query("entropy heat") == '"entropy" "heat"'
+    assert build_match_query('"second law" entro*') == '"second law" "entro"*'
+    assert build_match_query("heat engi", prefix=True) == '"heat" "engi"*'
+    # FTS5 syntax in user input is neutralized
+    assert build_match_query('NEAR(a b) OR col:x -"') == '"NEAR" "a" "b" "OR" "col" "x"'
+    assert build_match_query("***") == ""
+
+
+def test_search_ranks_snippets_and_scopes(client: TestClient, session: Session):
+    physics = Topic(title="Thermodynamics", description="Heat and work")
+    unit = Topic(title="Entropy", description="Disorder and the second law", parent_id=physics.id)
+    other = Topic(title="Cooking", description="Heat your pan")
+    book = Resource(topic_id=unit.id, type=ResourceType.PDF, path_or_url="/tmp/book.pdf", title="Statistical Physics")
+    session.add_all([physics, unit, other, book])
+    add_chunk(session, book, 0, "Entropy measures the number of microstates. Entropy never decreases.")
+    add_chunk(session, book, 1, "A heat engine converts heat into work.")
+    session.add(Note(content="Remember: entropy of an isolated system", topic_id=unit.id))
+    session.add(Concept(title="Carnot cycle", description="An idealized heat engine", topic_id=physics.id))
+    session.commit()
+
+    hits = client.get("/search", params={"q": "entropy"}).json()
+    assert {h["kind"] for h in hits} == {"resource", "note", "topic"}
+    chunk_hit = next(h for h in hits if h["kind"] == "resource")
+    assert chunk_hit["resource_id"] == str(book.id)
+    assert chunk_hit["title"] == "Statistical Physics"
+    assert chunk_hit["page"] == 1
+    assert "<mark>Entropy</mark>" in chunk_hit["snippet"]
+    assert [h["score"] for h in hits] == sorted(h["score"] for h in hits)
+
+    # Porter stemming and prefixes
+    assert any(h["kind"] == "concept" for h in client.get("/search", params={"q": "engines"}).json())
+    assert client.get("/search", params={"q": "microst*"}).json()[0]["chunk_index"] == 0
+    assert client.get("/search", params={"q": "microst", "prefix": True}).json()
+
+    # Scoping to a topic covers its subtopics and nothing else
+    scoped = client.get("/search", params={"q": "heat", "topic_id": str(physics.id)}).json()
+    assert scoped and all(h["topic_id"] in (str(physics.id), str(unit.id)) for h in scoped)
+    everywhere = client.get("/search", params={"q": "heat"}).json()
+    assert any(h["topic_id"] == str(other.id) for h in everywhere)
+
+    only_topics = client.get("/search", params={"q": "heat", "kinds": ["topic"]}).json()
+    assert {h["kind"] for h in only_topics} == {"topic"}
+    assert client.get("/search", params={"q": "heat", "kinds": ["bogus"]}).status_code == 400
+
+
+def test_search_index_follows_writes(client: TestClient, session: Session):
+    topic = Topic(title="Placeholder")
+    session.add(topic)
+    session.commit()
+    assert client.get("/search", params={"q": "placeholder"}).json()
+
+    topic.title = "Quantum mechanics"
+    session.add(topic)
+    session.commit()
+    assert not client.get("/search", params={"q": "placeholder"}).json()
+    assert client.get("/search", params={"q": "quantum"}).json()[0]["id"] == str(topic.id)
+
+    session.delete(topic)
+    session.commit()
+    assert not client.get("/search", params={"q": "quantum"}).json()
+
+
+def test_rebuild_indexes_existing_rows(session: Session):
+    from app.services import search
+
+    session.add(Topic(title="Backfilled"))
+    session.commit()
+    session.connection().exec_driver_sql("INSERT INTO topic_fts(topic_fts) VALUES ('delete-all')")
+    assert not search.search(session, "backfilled")
+
+    counts = search.rebuild(session, optimize=True)
+    assert counts["topic_fts"] == 1
+    assert search.search(session, "backfilled")[0].title == "Backfilled"
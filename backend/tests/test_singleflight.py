@@ -0,0 +1,35 @@
+import asyncio
+import pytest
+from app.services.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["row"]
+
+    results = await asyncio.gather(*[flights.do(("concepts/generate", "t1", None), work) for _ in range(5)])
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flights.coalesced == 4
+    assert flights.in_flight() == 0
+
+    # Once finished, the same key runs again rather than returning a stale result
+    await flights.do(("concepts/generate", "t1", None), work)
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_waiters():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*[flights.do("k", fail) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flights.in_flight() == 0
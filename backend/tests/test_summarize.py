@@ -0,0 +1,63 @@
+import random
+import pytest
+from app.services import llm as llm_module
+from app.services.llm import LLMService
+from app.services.llm_cache import LLMCache
+from app.services.providers import LLMProvider, GenerationRequest, GenerationResult
+from app.services.chunking import split_text, estimate_tokens
+
+def make_document(n_lines: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ["entropy", "signal", "graph", "vector", "proof", "lemma", "cache", "thread", "kernel", "matrix"]
+    return "\n".join(" ".join(rng.choice(words) for _ in range(12)) for _ in range(n_lines))
+
+def test_split_text_bounds_and_reassembles():
+    text = make_document(2000)
+    chunks = split_text(text, max_tokens=500)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 500 for c in chunks)
+    assert "".join(chunks) == text
+
+def test_split_text_is_stable_under_local_edit():
+    text = make_document(2000)
+    lines = text.split("\n")
+    lines[100] = "an edited line near the start of the document"
+    edited = "\n".join(lines)
+
+    before = split_text(text, max_tokens=500)
+    after = split_text(edited, max_tokens=500)
+    unchanged = set(before) & set(after)
+    assert len(unchanged) >= len(before) - 3
+
+class RecordingProvider(LLMProvider):
+    name = "recording"
+    default_model = "recording-model"
+    remote = False
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        self.prompts.append(request.prompt)
+        return GenerationResult(text=f"note {len(self.prompts)}")
+
+@pytest.mark.asyncio
+async def test_summarize_map_reduce_reuses_unchanged_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_module, "SUMMARY_CHUNK_TOKENS", 500)
+    monkeypatch.setattr(llm_module, "llm_cache", LLMCache(path=str(tmp_path / "cache.db")))
+    provider = RecordingProvider()
+    service = LLMService(provider=provider)
+
+    text = make_document(400)
+    chunk_count = len(split_text(text, max_tokens=500))
+    summary = await service.summarize_text(text)
+    assert summary.startswith("note")
+    first_run = len(provider.prompts)
+    assert first_run >= chunk_count + 1  # map calls + at least one reduce
+
+    lines = text.split("\n")
+    lines[-1] = "a changed final line"
+    provider.prompts = []
+    await service.summarize_text("\n".join(lines))
+    # Only the tail chunk(s) and the reduce step are regenerated
+    assert len(provider.prompts) <= 3
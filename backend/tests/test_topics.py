@@ -1,4 +1,8 @@
+import json
+import uuid
+from sqlmodel import Session
 from fastapi.testclient import TestClient
+from app.models import Topic
 
 def test_generate_topic_mock(client: TestClient):
     # This tests the endpoint without a real API key (unless set in env),
@@ -10,3 +14,100 @@ def test_generate_topic_mock(client: TestClient):
     assert data["title"] == "TestTopic"
     # Depending on whether API_KEY is present, the structure differs slightly in content,
     # but the schema should hold.
+
+def test_ask_topic_stream(client: TestClient, session: Session):
+    topic = Topic(title="Streams", description="Desc")
+    session.add(topic)
+    session.commit()
+
+    with client.stream("POST", f"/topics/{topic.id}/ask/stream", json={"question": "Why?"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+
+    frames = [f for f in body.split("\n\n") if f]
+    tokens = [json.loads(f[len("data: "):])["token"] for f in frames if f.startswith("data: ")]
+    assert "".join(tokens) == "Mock answer to 'Why?' regarding Streams."
+    assert frames[-1].startswith("event: done")
+
+def test_generate_topic_inserts_tree_in_one_statement(client: TestClient, session: Session):
+    from unittest.mock import AsyncMock, patch
+    from sqlmodel import select
+    from app import metrics
+    from app.routers import topics
+
+    syllabus = {"title": "Root", "subtopics": [
+        {"title": f"Unit {i}", "subtopics": [{"title": f"Lesson {i}.{j}"} for j in range(5)]}
+        for i in range(10)
+    ]}
+    inserts_before = metrics.DB_QUERIES.value(operation="INSERT")
+    with patch.object(topics.llm_service, "generate_syllabus", new_callable=AsyncMock) as mock_generate:
+        mock_generate.return_value = syllabus
+        response = client.post("/topics/generate?prompt=Big")
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Root"
+    assert metrics.DB_QUERIES.value(operation="INSERT") - inserts_before == 1
+
+    rows = session.exec(select(Topic)).all()
+    assert len(rows) == 61
+    by_id = {t.id: t for t in rows}
+    lesson = next(t for t in rows if t.title == "Lesson 3.4")
+    assert lesson.order_index == 4
+    assert by_id[lesson.parent_id].title == "Unit 3"
+    assert by_id[by_id[lesson.parent_id].parent_id].title == "Root"
+
+def test_topic_tree(client: TestClient, session: Session):
+    from app import metrics
+    from app.models import Activity, ActivityStatus, ActivityType, Concept
+
+    root = Topic(title="Root")
+    other = Topic(title="Other root")
+    units = [Topic(title=f"Unit {i}", parent_id=root.id, order_index=i) for i in (1, 0)]
+    lesson = Topic(title="Lesson", parent_id=units[1].id)
+    concept = Concept(title="Idea", topic_id=units[1].id)
+    session.add_all([root, other, *units, lesson, concept])
+    session.add_all([
+        Activity(concept_id=concept.id, type=ActivityType.READ, instructions="a", status=ActivityStatus.COMPLETED),
+        Activity(concept_id=concept.id, type=ActivityType.QUIZ, instructions="b"),
+    ])
+    session.commit()
+
+    ctes_before = metrics.DB_QUERIES.value(operation="WITH")
+    response = client.get("/topics/tree", params={"root_id": str(root.id)})
+    assert response.status_code == 200
+    # The whole subtree, counts included, comes back from one recursive statement
+    assert metrics.DB_QUERIES.value(operation="WITH") - ctes_before == 1
+
+    [tree] = response.json()
+    assert tree["title"] == "Root" and tree["depth"] == 0 and tree["child_count"] == 2
+    assert [c["title"] for c in tree["children"]] == ["Unit 0", "Unit 1"]
+    unit = tree["children"][0]
+    assert unit["concept_count"] == 1
+    assert unit["activity_count"] == 2 and unit["completed_activity_count"] == 1
+    assert [c["title"] for c in unit["children"]] == ["Lesson"]
+    assert unit["children"][0]["depth"] == 2
+
+    shallow = client.get("/topics/tree", params={"root_id": str(root.id), "max_depth": 1}).json()[0]
+    assert [c["children"] for c in shallow["children"]] == [[], []]
+    assert shallow["children"][0]["child_count"] == 1
+
+    forest = client.get("/topics/tree").json()
+    assert {t["title"] for t in forest} == {"Root", "Other root"}
+
+    assert client.get(f"/topics/tree?root_id={uuid.uuid4()}").status_code == 404
+
+def test_elaborate_tolerates_invented_activity_types(client: TestClient, session: Session):
+    from unittest.mock import AsyncMock, patch
+    from sqlmodel import select
+    from app.models import Activity
+    from app.routers import topics
+    topic = Topic(title="Optics", description="Light")
+    session.add(topic)
+    session.commit()
+
+    data = {"concepts": [{"title": "Refraction", "activities": [{"type": "simulation", "instructions": "Bend light"}]}]}
+    with patch.object(topics.llm_service, "elaborate_topic", new_callable=AsyncMock, return_value=data):
+        response = client.post(f"/topics/{topic.id}/elaborate", json={"instruction": ""})
+    assert response.status_code == 200
+    assert [a.type.value for a in session.exec(select(Activity)).all()] == ["read"]
@@ -0,0 +1,143 @@
+import asyncio
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.models import Topic
+from app.services.embeddings import HashingEmbedder, get_embedder
+from app.services.jobs import job_queue
+from app.services.vector_index import VectorIndex
+
+
+def test_hashing_embedder():
+    embedder = HashingEmbedder(dim=256)
+    vectors = embedder.embed([
+        "Entropy measures the disorder of a thermodynamic system",
+        "the disorder of a system is measured by its entropy",
+        "Bake the bread until golden",
+        "",
+    ])
+    assert vectors.shape == (4, 256) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0)
+    assert not vectors[3].any()
+    assert vectors[0] @ vectors[1] > 0.5 > vectors[0] @ vectors[2]
+    # Stable across calls (and processes): stored vectors stay comparable to new queries
+    assert np.array_equal(embedder.embed(["Entropy"]), embedder.embed(["Entropy"]))
+
+
+def test_index_is_incremental_and_persistent(tmp_path):
+    index = VectorIndex(str(tmp_path), embedder_name="hashing")
+    book, recipe = uuid.uuid4(), uuid.uuid4()
+    assert index.sync_resource(book, [(1, "entropy and the second law"), (2, "heat engines do work")]) == (2, 0)
+    assert index.sync_resource(recipe, [(3, "bread dough needs yeast")]) == (1, 0)
+    # Unchanged chunks are kept, new ones embedded, missing ones dropped
+    assert index.sync_resource(book, [(2, "heat engines do work"), (4, "carnot efficiency")]) == (1, 1)
+
+    hits = index.search("carnot efficiency", k=3)
+    assert hits[0].chunk_id == 4 and hits[0].resource_id == book
+    assert [h.chunk_id for h in index.search("yeast", owners=[book])] == []
+
+    reopened = VectorIndex(str(tmp_path), embedder_name="hashing")
+    assert len(reopened) == 3
+    assert sorted(reopened.chunk_ids(book)) == [2, 4]
+    assert reopened.search("bread yeast")[0].chunk_id == 3
+
+    # Dropping most rows compacts the files
+    reopened.sync_resource(book, [])
+    assert len(reopened) == 1 and reopened._state["count"] == 1
+
+
+def test_crash_during_compaction_keeps_the_committed_index(tmp_path):
+    index = VectorIndex(str(tmp_path), embedder_name="hashing")
+    book, recipe = uuid.uuid4(), uuid.uuid4()
+    index.sync_resource(book, [(1, "entropy and the second law"), (2, "heat engines do work")])
+    index.sync_resource(recipe, [(3, "bread dough needs yeast")])
+
+    # Compaction has written the new files, then the process dies before meta.json
+    with patch.object(VectorIndex, "_commit", side_effect=SystemExit):
+        try:
+            index.sync_resource(book, [])
+        except SystemExit:
+            pass
+
+    # The committed rows are intact; only the tombstones had been written
+    reopened = VectorIndex(str(tmp_path), embedder_name="hashing")
+    assert len(reopened) == 1 and reopened._state["count"] == 3
+    assert reopened.chunk_ids(book) == [] and reopened.chunk_ids(recipe) == [3]
+    assert [h.chunk_id for h in reopened.search("bread yeast")] == [3]
+    # The next compaction commits and leaves only its own files behind
+    reopened.sync_resource(recipe, [(3, "bread dough needs yeast"), (4, "rye flour")])
+    reopened.sync_resource(recipe, [(4, "rye flour")])
+    assert sorted(os.listdir(tmp_path)) == ["ids.2.i64", "meta.json", "owners.2.bin", "vectors.2.f32"]
+    assert VectorIndex(str(tmp_path), embedder_name="hashing").chunk_ids(recipe) == [4]
+
+
+def test_concurrent_first_use_loads_one_state(tmp_path):
+    index = VectorIndex(str(tmp_path), embedder_name="hashing")
+    real = get_embedder
+
+    def slow_embedder(name):
+        time.sleep(0.05)
+        return real(name)
+
+    with patch("app.services.vector_index.get_embedder", side_effect=slow_embedder):
+        with ThreadPoolExecutor(2) as pool:
+            states = list(pool.map(lambda _: index._load(), range(2)))
+    assert states[0] is states[1] is index._state
+
+
+def test_ivf_matches_brute_force_on_clustered_vectors(tmp_path):
+    rng = np.random.default_rng(1)
+    centers = rng.standard_normal((20, 64)).astype(np.float32)
+    data = centers[rng.integers(20, size=3000)] + 0.3 * rng.standard_normal((3000, 64)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+
+    class Fixed:
+        dim, name = 64, "fixed-64"
+
+        def embed(self, texts):
+            return data[[int(t) for t in texts]]
+
+    index = VectorIndex(str(tmp_path), ivf_min_vectors=1000, ivf_probes=4)
+    with patch("app.services.vector_index.get_embedder", return_value=Fixed()):
+        index.sync_resource(uuid.uuid4(), [(i, str(i)) for i in range(2900)])
+        recall = []
+        for q in range(2900, 3000):
+            exact = {h.chunk_id for h in index.search(str(q), k=10, exact=True)}
+            approx = {h.chunk_id for h in index.search(str(q), k=10)}
+            recall.append(len(exact & approx) / 10)
+        assert index._state["ivf"] is not None
+        assert np.mean(recall) > 0.9
+
+
+def test_semantic_search_after_ingest(client: TestClient, session: Session):
+    physics = Topic(title="Physics")
+    cooking = Topic(title="Cooking")
+    session.add_all([physics, cooking])
+    session.commit()
+
+    texts = {
+        "http://example.com/entropy": "Entropy is a measure of disorder. The second law says entropy never decreases.",
+        "http://example.com/bread": "Knead the dough, let the yeast rise, then bake the bread.",
+    }
+    with patch("app.routers.resources.ingest.extract_text_from_url", new_callable=AsyncMock) as mock_extract:
+        mock_extract.side_effect = lambda url: texts[url]
+        client.post("/resources/add/url", params={"topic_id": str(physics.id), "url": "http://example.com/entropy"})
+        client.post("/resources/add/url", params={"topic_id": str(cooking.id), "url": "http://example.com/bread"})
+        asyncio.run(job_queue.run_until_idle())
+
+    hits = client.get("/search/semantic", params={"q": "does entropy decrease?"}).json()
+    assert hits[0]["topic_id"] == str(physics.id)
+    assert "second law" in hits[0]["content"]
+    assert hits[0]["title"] == "http://example.com/entropy"
+    assert hits[0]["score"] > 0
+
+    scoped = client.get("/search/semantic", params={"q": "entropy", "topic_id": str(cooking.id)}).json()
+    assert all(h["topic_id"] == str(cooking.id) for h in scoped)
+    assert client.get("/search/semantic", params={"q": "x", "topic_id": str(uuid.uuid4())}).status_code == 404
@@ -1,14 +1,23 @@
 import { useState, useEffect } from 'react';
-import { generateSyllabus, getTopics, getModels } from './api';
-import type { Topic, LLMModel } from './api';
+import { generateSyllabus, getTopicTree, getModels } from './api';
+import type { Topic, TopicTreeNode, LLMModel } from './api';
 import './App.css';
 import TopicList from './components/TopicList';
 import TopicDetail from './components/TopicDetail';
 
+function findTopic(nodes: TopicTreeNode[], id: string): Topic | undefined {
+    for (const node of nodes) {
+        if (node.id === id) return node;
+        const found = findTopic(node.children, id);
+        if (found) return found;
+    }
+    return undefined;
+}
+
 function App() {
     const [prompt, setPrompt] = useState("");
     const [isLoading, setIsLoading] = useState(false);
-    const [topics, setTopics] = useState<Topic[]>([]);
+    const [tree, setTree] = useState<TopicTreeNode[]>([]);
     const [selectedTopic, setSelectedTopic] = useState<Topic | null>(null);
     const [models, setModels] = useState<LLMModel[]>([]);
     const [selectedModel, setSelectedModel] = useState("");
@@ -24,18 +33,17 @@ function App() {
 
     const loadTopics = async () => {
         try {
-            const data = await getTopics();
-            setTopics(data);
+            const data = await getTopicTree();
+            setTree(data);
             // If selected topic exists, update it with fresh data
             if (selectedTopic) {
-                const fresh = data.find(t => t.id === selectedTopic.id);
+                const fresh = findTopic(data, selectedTopic.id);
                 if (fresh) setSelectedTopic(fresh);
             }
 
             // Auto-expand root topics on initial load if set is empty
             if (expandedIds.size === 0 && data.length > 0) {
-                const roots = data.filter(t => !t.parent_id);
-                setExpandedIds(new Set(roots.map(r => r.id)));
+                setExpandedIds(new Set(data.map(r => r.id)));
             }
         } catch (e) {
             console.error(e);
@@ -85,8 +93,6 @@ function App() {
         setExpandedIds(new Set());
     };
 
-    const rootTopics = topics.filter(t => !t.parent_id);
-
     return (
         <div style={{ display: 'flex', height: '100vh', overflow: 'hidden' }}>
             {/* Left Column (Syllabus) */}
@@ -152,14 +158,13 @@ function App() {
                     </label>
                 </div>
 
-                {topics.length === 0 && <p style={{ color: '#888' }}>No topics yet.</p>}
+                {tree.length === 0 && <p style={{ color: '#888' }}>No topics yet.</p>}
 
                 <div>
-                    {rootTopics.map(root => (
+                    {tree.map(root => (
                         <TopicList
                             key={root.id}
                             topic={root}
-                            allTopics={topics}
                             onSelect={setSelectedTopic}
                             showAll={showAll}
                             expandedIds={expandedIds}
@@ -8,12 +8,23 @@ export interface Topic {
     status: "pending" | "completed";
 }
 
+export interface TopicTreeNode extends Topic {
+    depth: number;
+    child_count: number;
+    concept_count: number;
+    activity_count: number;
+    completed_activity_count: number;
+    children: TopicTreeNode[];
+}
+
 export interface Resource {
     id: string;
     topic_id: string;
     type: "pdf" | "url" | "text";
     path_or_url: string;
+    title?: string;
     content_summary?: string;
+    summary_status: "pending" | "completed" | "failed";
     raw_content?: string;
     created_at: string;
 }
@@ -55,7 +66,16 @@ export async function elaborateTopic(topicId: string, instruction: string, model
     return response.json();
 }
 
-export async function askTopic(topicId: string, question: string, modelName?: string): Promise<{ answer: string }> {
+// A passage from the learner's resources or notes that an answer was grounded in; cited as [n] in list order
+export interface AnswerSource {
+    kind: "resource" | "note";
+    id: string;
+    resource_id?: string;
+    title?: string;
+    page?: number;
+}
+
+export async function askTopic(topicId: string, question: string, modelName?: string): Promise<{ answer: string; sources: AnswerSource[] }> {
     const response = await fetch(`${API_BASE}/topics/${topicId}/ask`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
@@ -67,6 +87,67 @@ export async function askTopic(topicId: string, question: string, modelName?: st
     return response.json();
 }
 
+/**
+ * Streams an answer over Server-Sent Events. `onToken` is called for every chunk
+ * as it arrives; the promise resolves with the full answer once the server sends `done`.
+ */
+export async function askTopicStream(
+    topicId: string,
+    question: string,
+    onToken: (token: string) => void,
+    modelName?: string,
+    signal?: AbortSignal,
+    onSources?: (sources: AnswerSource[]) => void
+): Promise<string> {
+    const response = await fetch(`${API_BASE}/topics/${topicId}/ask/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json", "Accept": "text/event-stream" },
+        body: JSON.stringify({ question, model_name: modelName }),
+        signal,
+    });
+    if (!response.ok || !response.body) {
+        throw new Error("Failed to ask question");
+    }
+
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    let answer = "";
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+
+        // Events are separated by a blank line; keep any partial event in the buffer.
+        let boundary = buffer.indexOf("\n\n");
+        while (boundary !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            boundary = buffer.indexOf("\n\n");
+
+            let event = "message";
+            let data = "";
+            for (const line of frame.split("\n")) {
+                if (line.startsWith("event: ")) event = line.slice(7);
+                else if (line.startsWith("data: ")) data += line.slice(6);
+            }
+            const payload = data ? JSON.parse(data) : {};
+            if (event === "error") {
+                throw new Error(payload.detail || "Failed to ask question");
+            }
+            if (event === "done") {
+                return answer;
+            }
+            if (event === "sources") {
+                onSources?.(payload.sources);
+                continue;
+            }
+            answer += payload.token;
+            onToken(payload.token);
+        }
+    }
+    return answer;
+}
+
 export async function generateSyllabus(prompt: string, modelName?: string): Promise<Topic> {
     let url = `${API_BASE}/topics/generate?prompt=${encodeURIComponent(prompt)}`;
     if (modelName) {
@@ -81,23 +162,92 @@ export async function generateSyllabus(prompt: string, modelName?: string): Prom
     return response.json();
 }
 
+// List endpoints are paginated: follow X-Next-Cursor until the last page
+async function fetchAllPages<T>(url: string, errorMessage: string): Promise<T[]> {
+    const items: T[] = [];
+    let cursor: string | null = null;
+    do {
+        const pageUrl: string = cursor
+            ? `${url}${url.includes("?") ? "&" : "?"}cursor=${encodeURIComponent(cursor)}`
+            : url;
+        const response = await fetch(pageUrl);
+        if (!response.ok) {
+            throw new Error(errorMessage);
+        }
+        items.push(...await response.json());
+        cursor = response.headers.get("X-Next-Cursor");
+    } while (cursor);
+    return items;
+}
+
 export async function getTopics(): Promise<Topic[]> {
-    const response = await fetch(`${API_BASE}/topics/`);
+    return fetchAllPages<Topic>(`${API_BASE}/topics/`, "Failed to fetch topics");
+}
+
+export async function getTopicTree(rootId?: string, maxDepth?: number): Promise<TopicTreeNode[]> {
+    const params = new URLSearchParams();
+    if (rootId) params.set("root_id", rootId);
+    if (maxDepth !== undefined) params.set("max_depth", String(maxDepth));
+    const response = await fetch(`${API_BASE}/topics/tree?${params}`);
     if (!response.ok) {
-        throw new Error("Failed to fetch topics");
+        throw new Error("Failed to fetch topic tree");
     }
     return response.json();
 }
 
+// Listed resources omit raw_content; getResource returns the full row
 export async function getResources(topicId: string): Promise<Resource[]> {
-    const response = await fetch(`${API_BASE}/resources/topic/${topicId}`);
+    return fetchAllPages<Resource>(`${API_BASE}/resources/topic/${topicId}`, "Failed to fetch resources");
+}
+
+export async function getResource(resourceId: string): Promise<Resource> {
+    const response = await fetch(`${API_BASE}/resources/${resourceId}`);
+    if (!response.ok) {
+        throw new Error("Failed to fetch resource");
+    }
+    return response.json();
+}
+
+export interface Job {
+    id: string;
+    kind: string;
+    status: "queued" | "running" | "succeeded" | "failed";
+    stage?: string;
+    resource_id?: string;
+    attempts: number;
+    max_attempts: number;
+    error?: string;
+}
+
+export interface IngestAccepted {
+    job_id?: string;
+    resource: Resource;
+}
+
+export async function getJob(jobId: string): Promise<Job> {
+    const response = await fetch(`${API_BASE}/jobs/${jobId}`);
     if (!response.ok) {
-        throw new Error("Failed to fetch resources");
+        throw new Error("Failed to fetch job");
     }
     return response.json();
 }
 
-export async function addUrlResource(topicId: string, url: string, modelName?: string): Promise<Resource> {
+// Polls until the job finishes; rejects if it is still queued or running after timeoutMs
+export async function waitForJob(jobId: string, intervalMs = 1500, timeoutMs = 10 * 60 * 1000): Promise<Job> {
+    const deadline = Date.now() + timeoutMs;
+    for (;;) {
+        const job = await getJob(jobId);
+        if (job.status === "succeeded" || job.status === "failed") {
+            return job;
+        }
+        if (Date.now() + intervalMs > deadline) {
+            throw new Error(`Job ${jobId} did not finish within ${Math.round(timeoutMs / 1000)}s (last status: ${job.status})`);
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
+export async function addUrlResource(topicId: string, url: string, modelName?: string): Promise<IngestAccepted> {
     let fetchUrl = `${API_BASE}/resources/add/url?topic_id=${topicId}&url=${encodeURIComponent(url)}`;
     if (modelName) {
         fetchUrl += `&model_name=${encodeURIComponent(modelName)}`;
@@ -111,7 +261,7 @@ export async function addUrlResource(topicId: string, url: string, modelName?: s
     return response.json();
 }
 
-export async function uploadPdfResource(topicId: string, file: File, modelName?: string): Promise<Resource> {
+export async function uploadPdfResource(topicId: string, file: File, modelName?: string): Promise<IngestAccepted> {
     const formData = new FormData();
     formData.append("topic_id", topicId);
     formData.append("file", file);
@@ -129,6 +279,37 @@ export async function uploadPdfResource(topicId: string, file: File, modelName?:
     return response.json();
 }
 
+export interface BulkIngestItem {
+    source: string;
+    status: "queued" | "created" | "duplicate" | "failed";
+    resource_id?: string;
+    error?: string;
+}
+
+export interface BulkIngestAccepted {
+    job_id?: string;
+    items: BulkIngestItem[];
+}
+
+export async function bulkIngestResources(topicId: string, urls: string[], files: File[] = [], modelName?: string): Promise<BulkIngestAccepted> {
+    const formData = new FormData();
+    formData.append("topic_id", topicId);
+    urls.forEach(url => formData.append("urls", url));
+    files.forEach(file => formData.append("files", file));
+    if (modelName) {
+        formData.append("model_name", modelName);
+    }
+
+    const response = await fetch(`${API_BASE}/resources/bulk`, {
+        method: "POST",
+        body: formData,
+    });
+    if (!response.ok) {
+        throw new Error("Failed to add resources");
+    }
+    return response.json();
+}
+
 // --- Pedagogy ---
 
 export interface Concept {
@@ -150,11 +331,7 @@ export interface Activity {
 }
 
 export async function getConcepts(topicId: string): Promise<Concept[]> {
-    const response = await fetch(`${API_BASE}/pedagogy/concepts/?topic_id=${topicId}`);
-    if (!response.ok) {
-        throw new Error("Failed to fetch concepts");
-    }
-    return response.json();
+    return fetchAllPages<Concept>(`${API_BASE}/pedagogy/concepts/?topic_id=${topicId}`, "Failed to fetch concepts");
 }
 
 export async function generateConcepts(topicId: string, modelName?: string): Promise<Concept[]> {
@@ -170,11 +347,7 @@ export async function generateConcepts(topicId: string, modelName?: string): Pro
 }
 
 export async function getActivities(conceptId: string): Promise<Activity[]> {
-    const response = await fetch(`${API_BASE}/pedagogy/activities/?concept_id=${conceptId}`);
-    if (!response.ok) {
-        throw new Error("Failed to fetch activities");
-    }
-    return response.json();
+    return fetchAllPages<Activity>(`${API_BASE}/pedagogy/activities/?concept_id=${conceptId}`, "Failed to fetch activities");
 }
 
 export async function generateActivities(conceptId: string, modelName?: string): Promise<Activity[]> {
@@ -200,3 +373,47 @@ export async function completeActivity(activityId: string, score: number): Promi
     }
     return response.json();
 }
+
+export interface SearchHit {
+    kind: "resource" | "note" | "topic" | "concept";
+    id: string;
+    topic_id?: string;
+    resource_id?: string;
+    title?: string;
+    snippet: string; // Matches wrapped in <mark></mark>
+    score: number;
+    chunk_index?: number;
+    page?: number;
+}
+
+export async function searchLibrary(q: string, topicId?: string, prefix = false): Promise<SearchHit[]> {
+    const params = new URLSearchParams({ q });
+    if (topicId) params.set("topic_id", topicId);
+    if (prefix) params.set("prefix", "true");
+    const response = await fetch(`${API_BASE}/search?${params}`);
+    if (!response.ok) {
+        throw new Error("Search failed");
+    }
+    return response.json();
+}
+
+export interface SemanticHit {
+    chunk_id: number;
+    resource_id: string;
+    topic_id: string;
+    title?: string;
+    chunk_index: number;
+    page?: number;
+    content: string;
+    score: number; // Cosine similarity
+}
+
+export async function semanticSearch(q: string, topicId?: string, k = 10): Promise<SemanticHit[]> {
+    const params = new URLSearchParams({ q, k: String(k) });
+    if (topicId) params.set("topic_id", topicId);
+    const response = await fetch(`${API_BASE}/search/semantic?${params}`);
+    if (!response.ok) {
+        throw new Error("Semantic search failed");
+    }
+    return response.json();
+}
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
-import { getResources, addUrlResource, uploadPdfResource, updateTopicStatus, elaborateTopic, askTopic } from '../api';
+import { getResources, addUrlResource, uploadPdfResource, updateTopicStatus, elaborateTopic, askTopicStream, waitForJob } from '../api';
+import type { IngestAccepted } from '../api';
 import type { Topic, Resource } from '../api';
 import PedagogyView from './PedagogyView';
 
@@ -34,12 +35,19 @@ const TopicDetails = ({ topic, onClose, selectedModel, onUpdate }: TopicDetailsP
         }
     };
 
+    // Ingestion runs in the background: show the pending resource now, refresh when its job ends
+    const trackIngestion = async (accepted: IngestAccepted) => {
+        await loadResources();
+        if (accepted.job_id) {
+            waitForJob(accepted.job_id).then(loadResources).catch(console.error);
+        }
+    };
+
     const handleAddUrl = async () => {
         if (!newUrl) return;
         setIsUploading(true);
         try {
-            await addUrlResource(topic.id, newUrl, selectedModel);
-            await loadResources();
+            await trackIngestion(await addUrlResource(topic.id, newUrl, selectedModel));
             setNewUrl("");
         } catch (e) {
             alert("Error adding URL: " + e);
@@ -52,8 +60,7 @@ const TopicDetails = ({ topic, onClose, selectedModel, onUpdate }: TopicDetailsP
         if (!e.target.files || e.target.files.length === 0) return;
         setIsUploading(true);
         try {
-            await uploadPdfResource(topic.id, e.target.files[0], selectedModel);
-            await loadResources();
+            await trackIngestion(await uploadPdfResource(topic.id, e.target.files[0], selectedModel));
         } catch (e) {
             alert("Error uploading PDF: " + e);
         } finally {
@@ -90,8 +97,13 @@ const TopicDetails = ({ topic, onClose, selectedModel, onUpdate }: TopicDetailsP
         if (!assistantInput) return;
         setIsThinking(true);
         try {
-            const res = await askTopic(topic.id, assistantInput, selectedModel);
-            setChatResponse(res.answer);
+            setChatResponse("");
+            await askTopicStream(
+                topic.id,
+                assistantInput,
+                token => setChatResponse(prev => (prev ?? "") + token),
+                selectedModel
+            );
         } catch (e) {
             alert("Error asking: " + e);
         } finally {
@@ -157,7 +169,7 @@ const TopicDetails = ({ topic, onClose, selectedModel, onUpdate }: TopicDetailsP
                                         {res.path_or_url}
                                     </a>
                                 ) : (
-                                    <span style={{ marginLeft: '5px' }}>{res.path_or_url}</span>
+                                    <span style={{ marginLeft: '5px' }}>{res.title || res.path_or_url}</span>
                                 )}
                             </div>
                             {res.content_summary && (
@@ -165,6 +177,11 @@ const TopicDetails = ({ topic, onClose, selectedModel, onUpdate }: TopicDetailsP
                                     <strong>Summary:</strong> {res.content_summary}
                                 </div>
                             )}
+                            {res.summary_status !== 'completed' && (
+                                <div style={{ fontSize: '0.9em', color: '#888', marginTop: '5px' }}>
+                                    <em>{res.summary_status === 'pending' ? 'Summarizing…' : 'Summary failed.'}</em>
+                                </div>
+                            )}
                         </li>
                     ))}
                     {resources.length === 0 && !isUploading && <p style={{ color: '#888' }}>No resources yet.</p>}
@@ -1,18 +1,15 @@
-import type { Topic } from '../api';
+import type { Topic, TopicTreeNode } from '../api';
 
 interface TopicNodeProps {
-    topic: Topic;
-    allTopics: Topic[];
+    topic: TopicTreeNode;
     onSelect: (t: Topic) => void;
     showAll: boolean;
     expandedIds: Set<string>;
     toggleExpand: (id: string) => void;
 }
 
-const TopicList = ({ topic, allTopics, onSelect, showAll, expandedIds, toggleExpand }: TopicNodeProps) => {
-    const children = allTopics
-        .filter(t => t.parent_id === topic.id)
-        .sort((a, b) => a.order_index - b.order_index);
+const TopicList = ({ topic, onSelect, showAll, expandedIds, toggleExpand }: TopicNodeProps) => {
+    const children = topic.children; // Already in syllabus order
 
     const isExpanded = expandedIds.has(topic.id);
     const hasChildren = children.length > 0;
@@ -54,6 +51,11 @@ const TopicList = ({ topic, allTopics, onSelect, showAll, expandedIds, toggleExp
                     }}>
                         {topic.title}
                     </span>
+                    {topic.activity_count > 0 && (
+                        <span style={{ marginLeft: '6px', fontSize: '0.75em', color: '#888' }}>
+                            {topic.completed_activity_count}/{topic.activity_count}
+                        </span>
+                    )}
                 </div>
             </div>
 
@@ -63,7 +65,6 @@ const TopicList = ({ topic, allTopics, onSelect, showAll, expandedIds, toggleExp
                         <TopicList
                             key={child.id}
                             topic={child}
-                            allTopics={allTopics}
                             onSelect={onSelect}
                             showAll={showAll}
                             expandedIds={expandedIds}